@@ -1,16 +1,22 @@
 from flask import Flask, render_template, request, jsonify, session, redirect, url_for, flash
-from flask_bcrypt import Bcrypt
 from flask_login import LoginManager, UserMixin, login_user, logout_user, login_required, current_user
+import logging
 import os
 from datetime import datetime, timedelta
 import json
 from bson import ObjectId
 from dotenv import load_dotenv
 from functools import wraps
+import click
 
 # Chargement des variables d'environnement
 load_dotenv()
 
+# Journaux JSON écrits par un thread dédié (file non bloquante), avant tout autre import
+from services.logs import setup_logging, start_log_listener, init_logging, log_queue_stats
+setup_logging()
+logger = logging.getLogger(__name__)
+
 app = Flask(__name__)
 app.secret_key = os.getenv('SECRET_KEY', 'sante_maternelle_secret_key')
 app.config['PERMANENT_SESSION_LIFETIME'] = timedelta(days=7)
@@ -19,30 +25,119 @@ app.config['SESSION_COOKIE_HTTPONLY'] = True
 app.config['SESSION_COOKIE_SAMESITE'] = 'Lax'
 
 # Configuration de l'authentification Flask-Login
-bcrypt = Bcrypt(app)
 login_manager = LoginManager()
 login_manager.init_app(app)
 login_manager.login_view = 'login'
 login_manager.login_message = "🔒 Vous devez vous connecter pour accéder à cette page"
 login_manager.login_message_category = "warning"
 
+# Identifiant de requête (X-Request-ID) repris dans chaque ligne de journal
+init_logging(app)
+
+# Assets statiques fingerprintés et précompressés (`flask --app app build-assets`)
+from services.assets import init_assets
+init_assets(app)
+
+# Compression gzip/brotli des réponses dynamiques, GET conditionnels sur les routes JSON
+from services.http_cache import init_http_cache, conditional
+init_http_cache(app)
+
+# Encodage JSON des documents MongoDB (ObjectId, datetime) sans conversion champ par champ
+from services.serialization import init_serialization
+init_serialization(app)
+
+# Cache des fragments de templates ({% cache %}), invalidé par users.data_versions
+from services.fragment_cache import init_fragment_cache
+init_fragment_cache(app)
+
 # Import des modules MongoDB
 from nlp.processor import process_question
 from services.database import init_db, save_consultation, get_user_consultations, db_manager
-from services.notification import send_sms_alert
+from services.notification import send_sms_alert, notification_service
 from services.vaccine_tracker import VaccineTracker
+from services.pagination import page_size
+from services.query_profiler import query_profiler
+from services.passwords import password_hasher, hash_password, PasswordPoolBusy
+from services.pregnancy_progress import trimester_for_week, week_content
 from models.pregnancy import Pregnancy
 from models.user import User
 
-print("✅ Tous les modules MongoDB chargés avec succès")
+logger.info("Tous les modules MongoDB chargés avec succès")
 
-# Initialisation au démarrage
-with app.app_context():
-    try:
-        init_db()
-        print("✅ Application initialisée avec succès")
-    except Exception as e:
-        print(f"❌ Erreur initialisation: {e}")
+# Métriques Prometheus (/metrics) : routes, méthodes MongoDB, étapes NLP, envois de notifications
+from services.metrics import init_metrics, cache_hit_ratio, metrics_auth_required, LOGIN_SECONDS
+from services.fragment_cache import fragment_cache
+from services.notification_templates import template_cache_stats
+init_metrics(app, gauges={
+    'fragment_cache_hit_ratio': ("Taux de succès du cache de fragments de templates",
+                                 lambda: cache_hit_ratio(fragment_cache.stats())),
+    'fragment_cache_entries': ("Fragments en cache", lambda: fragment_cache.stats()['entries']),
+    'notification_template_cache_hit_ratio': ("Taux de succès des gabarits de campagne pré-rendus",
+                                              lambda: cache_hit_ratio(template_cache_stats())),
+    'db_pool_open_connections': ("Connexions MongoDB ouvertes",
+                                 lambda: db_manager.pool_stats()['open_connections']),
+    'db_pool_checked_out': ("Connexions MongoDB en cours d'utilisation",
+                            lambda: db_manager.pool_stats()['checked_out']),
+    'db_pool_max_size': ("Taille maximale du pool MongoDB", lambda: db_manager.pool_stats()['max_pool_size']),
+    'scheduler_due_jobs': ("Tâches planifiées échues en attente d'exécution",
+                           notification_service.scheduler_backlog),
+    'log_queue_depth': ("Événements de journal en attente d'écriture", lambda: log_queue_stats()['depth']),
+    'log_records_dropped': ("Événements de journal abandonnés (file pleine)",
+                            lambda: log_queue_stats()['dropped']),
+    'password_pool_pending': ("Opérations bcrypt en cours ou en attente du pool",
+                              lambda: password_hasher.stats()['pending']),
+    'password_rehash_backlog': ("Anciens hash de mots de passe en attente de conversion",
+                                lambda: password_hasher.stats()['rehash_backlog']),
+})
+
+# Les index et migrations ne sont plus appliqués au démarrage des workers
+@app.cli.command('init-db')
+def init_db_command():
+    """Applique les migrations de schéma (index, données dérivées)"""
+    init_db()
+
+@app.cli.command('index-advisor')
+@click.option('--users', default=500, show_default=True, help="Utilisateurs synthétiques à générer")
+@click.option('--keep', is_flag=True, help="Conserver la base de travail après l'analyse")
+def index_advisor_command(users, keep):
+    """Explique chaque forme de requête et suggère les index manquants"""
+    from services.index_advisor import run_advisor, print_report
+    print_report(run_advisor(db_manager, users, keep))
+
+@app.cli.command('seed')
+@click.option('--users', default=1000, show_default=True, help="Utilisatrices synthétiques à générer")
+@click.option('--seed', 'seed', default=42, show_default=True, help="Graine du générateur")
+@click.option('--start', default=0, show_default=True, help="Rang de la première utilisatrice (remplissage par plages)")
+@click.option('--batch-size', default=5000, show_default=True, help="Documents par insert_many")
+@click.option('--database', default=None, help="Base cible (par défaut celle de l'application)")
+@click.option('--drop', is_flag=True, help="Vider les collections peuplées (et rejouer les migrations) avant l'insertion")
+def seed_command(users, seed, start, batch_size, database, drop):
+    """Peuple la base avec des données synthétiques reproductibles"""
+    from services.seed import run_seed
+    run_seed(db_manager, users, seed, start, batch_size, database, drop)
+
+# ============ CYCLE DE VIE DES PROCESSUS ============
+
+def init_worker():
+    """Initialise les ressources propres à un processus (après le fork d'un worker)"""
+    # Thread des journaux, client MongoDB, client Twilio et scheduler ne survivent pas à un fork
+    start_log_listener()
+    db_manager.reset()
+    notification_service.init_worker()
+    notification_service.start_scheduler()
+    logger.info("Worker %s initialisé", os.getpid())
+
+def create_app(prefork=False):
+    """Fabrique d'application
+
+    L'état partagé en lecture seule (modèle spaCy, matrices des intents, templates)
+    est chargé à l'import, avant le fork. Avec un serveur pre-fork (gunicorn
+    --preload), init_worker() est appelé par le hook post_fork de chaque worker ;
+    sinon il est appelé immédiatement.
+    """
+    if not prefork:
+        init_worker()
+    return app
 
 # 🔐 Configuration Flask-Login
 @login_manager.user_loader
@@ -54,7 +149,7 @@ def load_user(user_id):
             user = User(user_data)
             return user
     except Exception as e:
-        print(f"❌ Erreur chargement utilisateur: {e}")
+        logger.error("Erreur chargement utilisateur: %s", e)
     return None
 
 # 🔐 DECORATEURS D'AUTHENTIFICATION
@@ -66,6 +161,16 @@ def guest_allowed(f):
         return f(*args, **kwargs)
     return decorated_function
 
+def admin_required(f):
+    """Décorateur pour les routes réservées aux administrateurs"""
+    @wraps(f)
+    @login_required
+    def decorated_function(*args, **kwargs):
+        if getattr(current_user, 'role', 'user') != 'admin':
+            return jsonify({'error': 'Accès réservé aux administrateurs'}), 403
+        return f(*args, **kwargs)
+    return decorated_function
+
 # Middleware pour gérer l'utilisateur
 @app.before_request
 def before_request():
@@ -114,12 +219,6 @@ def handle_registration(form_data):
         
         email = form_data['email'].strip().lower()
         
-        # Vérifier si l'utilisateur existe déjà
-        existing_user = db_manager.get_user_by_email(email)
-        if existing_user:
-            flash("Cet email est déjà utilisé", "error")
-            return render_template('register.html')
-        
         # Vérifier la confirmation du mot de passe
         if form_data.get('password') != form_data.get('confirm_password'):
             flash("Les mots de passe ne correspondent pas", "error")
@@ -164,37 +263,29 @@ def handle_registration(form_data):
         
         # Utiliser Bcrypt pour le hash du mot de passe
         user = User(user_data)
-        user.password_hash = bcrypt.generate_password_hash(form_data['password']).decode('utf-8')
-        
-        # Sauvegarder l'utilisateur
-        user_id = db_manager.save_user(user.to_dict())
-        
-        if not user_id:
-            flash("Erreur lors de la création du compte", "error")
-            return render_template('register.html')
+        user.password_hash = hash_password(form_data['password'])
         
-        # Si l'utilisateur est enceinte, enregistrer la grossesse
+        # Grossesse enregistrée avec l'utilisateur (même transaction)
+        pregnancy_data = None
         if form_data.get('statut') in ['enceinte', 'les_deux'] and form_data.get('start_date'):
             try:
                 start_date = datetime.strptime(form_data['start_date'], '%Y-%m-%d')
-                due_date = start_date + timedelta(days=280)  # 40 semaines
-                
                 pregnancy_data = {
-                    'user_id': user_id,
                     'start_date': start_date,
-                    'due_date': due_date,
-                    'current_week': int(form_data.get('current_week', 12)),
-                    'created_at': datetime.utcnow(),
-                    'updated_at': datetime.utcnow()
+                    'due_date': start_date + timedelta(days=280)  # 40 semaines
                 }
-                
-                db_manager.save_pregnancy(pregnancy_data)
-            except Exception as e:
-                print(f"⚠️ Erreur sauvegarde grossesse: {e}")
-                # Ne pas bloquer l'inscription si la grossesse échoue
-        
-        # Connecter l'utilisateur automatiquement
-        saved_user_data = db_manager.get_user_by_id(user_id)
+            except ValueError as e:
+                logger.warning("Date de début de grossesse invalide: %s", e)
+                # Ne pas bloquer l'inscription si la date est illisible
+        
+        # Doublon d'email ou de téléphone détecté par les index uniques (ValueError)
+        try:
+            saved_user_data = db_manager.register_user(user.to_dict(), pregnancy_data)
+        except ValueError as e:
+            flash(str(e), "error")
+            return render_template('register.html')
+        
+        # Connecter l'utilisateur à partir du document inséré (pas de relecture)
         if saved_user_data:
             user_obj = User(saved_user_data)
             login_user(user_obj)
@@ -204,11 +295,15 @@ def handle_registration(form_data):
         flash("Erreur lors de la création du compte", "error")
         return render_template('register.html')
         
+    except PasswordPoolBusy:
+        flash("⏳ Trop de demandes en cours, réessayez dans quelques secondes", "error")
+        return render_template('register.html'), 503
     except Exception as e:
-        print(f"❌ Erreur inscription: {e}")
+        logger.error("Erreur inscription: %s", e)
         flash("Une erreur est survenue lors de l'inscription", "error")
         return render_template('register.html')
 
+@LOGIN_SECONDS.time(route='login')
 def handle_login(form_data):
     """Gère la connexion d'un utilisateur"""
     try:
@@ -227,29 +322,22 @@ def handle_login(form_data):
             flash("Email ou mot de passe incorrect", "error")
             return render_template('login.html')
         
-        # Vérifier le mot de passe
+        # Vérifier le mot de passe (bcrypt dans le pool borné, ancien SHA256 converti en différé)
         user = User(user_data)
         
-        # Vérifier avec Bcrypt d'abord (si le hash est bcrypt)
-        if user.password_hash and user.password_hash.startswith('$2b$'):
-            if bcrypt.check_password_hash(user.password_hash, password):
-                login_user(user, remember=remember)
-                flash(f"👋 Bienvenue {user.prenom} !", "success")
-                return redirect(url_for('dashboard'))
-        # Sinon vérifier avec l'ancienne méthode SHA256
-        elif user.check_password(password):
-            # Mettre à jour le hash vers Bcrypt
-            user.password_hash = bcrypt.generate_password_hash(password).decode('utf-8')
-            db_manager.update_user(user.id, {'password_hash': user.password_hash})
+        if password_hasher.verify_user(user, password):
             login_user(user, remember=remember)
-            flash(f"👋 Bienvenue {user.prenom} ! (Votre mot de passe a été mis à jour)", "success")
+            flash(f"👋 Bienvenue {user.prenom} !", "success")
             return redirect(url_for('dashboard'))
         
         flash("Email ou mot de passe incorrect", "error")
         return render_template('login.html')
         
+    except PasswordPoolBusy:
+        flash("⏳ Trop de connexions en cours, réessayez dans quelques secondes", "error")
+        return render_template('login.html'), 503
     except Exception as e:
-        print(f"❌ Erreur connexion: {e}")
+        logger.error("Erreur connexion: %s", e)
         flash("Une erreur est survenue lors de la connexion", "error")
         return render_template('login.html')
 
@@ -293,15 +381,8 @@ def dashboard():
             pregnancy_data['trimester'] = trimester
         
         vaccine_reminders = []
-        if user_data and 'children' in user_data:
-            tracker = VaccineTracker()
-            for child in user_data.get('children', []):
-                if 'birth_date' in child:
-                    birth_date = child['birth_date']
-                    reminders = tracker.get_upcoming_vaccines(birth_date)
-                    for rem in reminders:
-                        rem['child_name'] = child.get('name', 'Bébé')
-                    vaccine_reminders.extend(reminders)
+        if user_data and user_data.get('children'):
+            vaccine_reminders = VaccineTracker().get_user_reminders(user_id)
         
         return render_template('dashboard.html', 
                              pregnancy=pregnancy_data,
@@ -312,7 +393,7 @@ def dashboard():
                              trimester=trimester)
     
     except Exception as e:
-        print(f"❌ Erreur dashboard: {e}")
+        logger.error("Erreur dashboard: %s", e)
         flash("Erreur lors du chargement du tableau de bord", "error")
         # Rediriger vers le profil si erreur
         return redirect(url_for('profile'))
@@ -347,7 +428,7 @@ def pregnancy_tracker():
                              trimester=trimester)
     
     except Exception as e:
-        print(f"❌ Erreur pregnancy_tracker: {e}")
+        logger.error("Erreur pregnancy_tracker: %s", e)
         flash("Erreur lors du chargement du suivi de grossesse", "error")
         return redirect(url_for('dashboard'))
 
@@ -366,7 +447,7 @@ def profile():
                              user_data=user_data, 
                              pregnancy=pregnancy_data)
     except Exception as e:
-        print(f"❌ Erreur profil: {e}")
+        logger.error("Erreur profil: %s", e)
         flash("Erreur lors du chargement du profil", "error")
         return redirect(url_for('dashboard'))
 
@@ -392,7 +473,7 @@ def update_profile(form_data):
                 flash("Les mots de passe ne correspondent pas", "error")
                 return redirect(url_for('profile'))
             
-            update_data['password_hash'] = bcrypt.generate_password_hash(new_password).decode('utf-8')
+            update_data['password_hash'] = hash_password(new_password)
         
         # Mettre à jour dans la base de données
         success = db_manager.update_user(current_user.id, update_data)
@@ -404,8 +485,11 @@ def update_profile(form_data):
         
         return redirect(url_for('profile'))
         
+    except PasswordPoolBusy:
+        flash("⏳ Trop de demandes en cours, réessayez dans quelques secondes", "error")
+        return redirect(url_for('profile'))
     except Exception as e:
-        print(f"❌ Erreur mise à jour profil: {e}")
+        logger.error("Erreur mise à jour profil: %s", e)
         flash("Erreur lors de la mise à jour du profil", "error")
         return redirect(url_for('profile'))
 
@@ -470,7 +554,7 @@ def chat_api():
         })
     
     except Exception as e:
-        print(f"❌ Erreur chat API: {e}")
+        logger.error("Erreur chat API: %s", e)
         return jsonify({'error': 'Erreur interne du serveur'}), 500
 
 @app.route('/api/profile', methods=['POST', 'PUT'])
@@ -503,11 +587,12 @@ def api_update_profile():
             return jsonify({'error': 'Erreur lors de la mise à jour'}), 500
     
     except Exception as e:
-        print(f"❌ Erreur API profil: {e}")
+        logger.error("Erreur API profil: %s", e)
         return jsonify({'error': 'Erreur serveur'}), 500
 
 @app.route('/api/login', methods=['POST'])
 @guest_allowed
+@LOGIN_SECONDS.time(route='api_login')
 def api_login():
     """API de connexion (pour compatibilité AJAX)"""
     try:
@@ -526,19 +611,8 @@ def api_login():
         
         user = User(user_data)
         
-        # Vérifier le mot de passe
-        password_valid = False
-        
-        if user.password_hash and user.password_hash.startswith('$2b$'):
-            password_valid = bcrypt.check_password_hash(user.password_hash, password)
-        else:
-            password_valid = user.check_password(password)
-            if password_valid:
-                # Mettre à jour vers Bcrypt
-                user.password_hash = bcrypt.generate_password_hash(password).decode('utf-8')
-                db_manager.update_user(user.id, {'password_hash': user.password_hash})
-        
-        if password_valid:
+        # Vérifier le mot de passe (bcrypt dans le pool borné, ancien SHA256 converti en différé)
+        if password_hasher.verify_user(user, password):
             login_user(user)
             return jsonify({
                 'status': 'success',
@@ -552,8 +626,10 @@ def api_login():
         else:
             return jsonify({'error': 'Email ou mot de passe incorrect'}), 401
             
+    except PasswordPoolBusy:
+        return jsonify({'error': 'Trop de connexions en cours, réessayez'}), 503, {'Retry-After': '2'}
     except Exception as e:
-        print(f"❌ Erreur API connexion: {e}")
+        logger.error("Erreur API connexion: %s", e)
         return jsonify({'error': 'Erreur de connexion'}), 500
 
 # ============ AUTRES ROUTES API ============
@@ -604,14 +680,15 @@ def update_pregnancy():
         })
     
     except ValueError as e:
-        print(f"❌ Erreur format date: {e}")
+        logger.error("Erreur format date: %s", e)
         return jsonify({'error': 'Format de date invalide. Utilisez YYYY-MM-DD'}), 400
     except Exception as e:
-        print(f"❌ Erreur grossesse: {e}")
+        logger.error("Erreur grossesse: %s", e)
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/baby-development')
 @login_required
+@conditional('pregnancy', daily=True)
 def baby_development():
     """Retourne le développement du bébé selon la semaine"""
     try:
@@ -647,10 +724,10 @@ def add_child():
             'birth_weight': data.get('birth_weight')
         }
         
-        success = db_manager.save_child_info(user_id, child_data)
+        child_id = db_manager.save_child_info(user_id, child_data)
         
-        if success:
-            return jsonify({'status': 'success', 'message': 'Enfant ajouté avec succès'})
+        if child_id:
+            return jsonify({'status': 'success', 'message': 'Enfant ajouté avec succès', 'child_id': child_id})
         else:
             return jsonify({'error': 'Erreur sauvegarde enfant'}), 500
     
@@ -659,6 +736,7 @@ def add_child():
 
 @app.route('/api/vaccine-reminders')
 @login_required
+@conditional('children', daily=True)
 def get_vaccine_reminders():
     """Retourne les rappels de vaccins pour l'utilisateur connecté"""
     try:
@@ -666,35 +744,105 @@ def get_vaccine_reminders():
         user_data = db_manager.get_user_by_id(user_id)
         
         reminders = []
-        if user_data and 'children' in user_data:
-            tracker = VaccineTracker()
-            for child in user_data['children']:
-                if 'birth_date' in child:
-                    birth_date = child['birth_date']
-                    child_reminders = tracker.get_upcoming_vaccines(birth_date)
-                    for rem in child_reminders:
-                        rem['child_name'] = child.get('name', 'Bébé')
-                    reminders.extend(child_reminders)
+        if user_data and user_data.get('children'):
+            reminders = VaccineTracker().get_user_reminders(user_id)
         
         return jsonify({'reminders': reminders})
     
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/vaccines/dose', methods=['POST'])
+@login_required
+def record_vaccine_dose():
+    """Enregistre une dose de vaccin administrée à un enfant"""
+    try:
+        data = request.get_json(silent=True) or {}
+        child_id = data.get('child_id')
+        milestone = data.get('milestone')
+        
+        if not isinstance(child_id, str) or milestone not in VaccineTracker().vaccine_schedule:
+            return jsonify({'error': 'Enfant ou étape vaccinale invalide'}), 400
+        
+        administered_at = None
+        if data.get('administered_at'):
+            administered_at = datetime.strptime(data['administered_at'], '%Y-%m-%d')
+        
+        success = db_manager.record_vaccine_dose(current_user.id, child_id, milestone, administered_at)
+        
+        if success:
+            return jsonify({'status': 'success', 'message': 'Dose enregistrée'})
+        else:
+            return jsonify({'error': 'Enfant non trouvé'}), 404
+    
+    except ValueError:
+        return jsonify({'error': 'Format de date invalide. Utilisez YYYY-MM-DD'}), 400
+    except Exception as e:
+        logger.error("Erreur enregistrement dose: %s", e)
+        return jsonify({'error': 'Erreur serveur'}), 500
+
+@app.route('/api/admin/vaccine-coverage')
+@admin_required
+def vaccine_coverage():
+    """Couverture vaccinale de toute la population par étape"""
+    try:
+        return jsonify(VaccineTracker().get_population_report())
+    
+    except Exception as e:
+        logger.error("Erreur couverture vaccinale: %s", e)
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/admin/slow-queries')
+@admin_required
+def slow_queries():
+    """Formes de requêtes MongoDB les plus lentes de ce worker
+
+    Paramètres : limit (20 par défaut), sort (max_ms, total_ms, avg_ms, slow_count, count).
+    """
+    limit = min(request.args.get('limit', 20, type=int), 200)
+    return jsonify({
+        'pid': os.getpid(),
+        'slow_query_ms': query_profiler.slow_ms,
+        'explain_threshold_ms': query_profiler.explain_ms,
+        'window_seconds': query_profiler.window_seconds,
+        'queries': query_profiler.top(limit, request.args.get('sort', 'max_ms'))
+    })
+
 @app.route('/api/consultations')
 @login_required
+@conditional('consultations')
 def get_consultations():
-    """Retourne l'historique des consultations de l'utilisateur connecté"""
+    """Retourne une page de l'historique des consultations de l'utilisateur connecté
+    
+    Paramètres : limit (taille de page), cursor (next_cursor de la page précédente),
+    include=response pour inclure le texte complet des réponses.
+    """
     try:
         user_id = current_user.id
-        limit = request.args.get('limit', 10, type=int)
+        limit = page_size(request.args.get('limit', type=int))
+        cursor = request.args.get('cursor')
+        include_response = request.args.get('include') == 'response'
         
-        consultations = get_user_consultations(user_id, limit)
-        return jsonify({'consultations': consultations})
+        consultations, next_cursor = db_manager.get_consultations_page(
+            user_id, limit, cursor, include_response
+        )
+        return jsonify({'consultations': consultations, 'next_cursor': next_cursor})
     
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/consultations/<consultation_id>')
+@login_required
+@conditional('consultations')
+def get_consultation(consultation_id):
+    """Retourne une consultation complète, avec la réponse de l'assistant"""
+    consultation = db_manager.get_consultation(current_user.id, consultation_id)
+    if not consultation:
+        return jsonify({'error': 'Consultation non trouvée'}), 404
+    return jsonify({'consultation': consultation})
+
 # ============ ROUTES UTILITAIRES ============
 
 @app.route('/health')
@@ -708,6 +856,21 @@ def health_check():
         'authenticated': current_user.is_authenticated
     })
 
+@app.route('/ready')
+def readiness_check():
+    """Sonde de disponibilité : l'application peut-elle servir des requêtes ?"""
+    if db_manager.ping():
+        return jsonify({'status': 'ready', 'database': 'up'})
+    return jsonify({'status': 'unavailable', 'database': 'down'}), 503
+
+@app.route('/metrics/db-pool')
+@metrics_auth_required
+def db_pool_metrics():
+    """Statistiques du pool de connexions MongoDB de ce worker"""
+    stats = db_manager.pool_stats()
+    stats['pid'] = os.getpid()
+    return jsonify(stats)
+
 @app.route('/debug-session')
 def debug_session():
     """Route de debug pour vérifier la session"""
@@ -722,55 +885,33 @@ def debug_session():
 
 @app.route('/api/notifications')
 @login_required
+@conditional('notifications')
 def get_notifications():
-    """Retourne les notifications de l'utilisateur"""
+    """Retourne une page de la boîte de notifications de l'utilisateur connecté
+    
+    Paramètres : limit (taille de page), cursor (next_cursor de la page précédente),
+    unread=1 pour les seules non lues. unread_count est le compteur de l'utilisateur.
+    """
     try:
-        user_id = current_user.id
+        limit = page_size(request.args.get('limit', type=int))
+        cursor = request.args.get('cursor')
+        unread_only = request.args.get('unread') == '1'
         
-        # Pour l'instant, retourner des notifications simulées
-        notifications = [
-            {
-                'id': '1',
-                'type': 'info',
-                'title': 'Bienvenue sur votre tableau de bord',
-                'message': 'Votre espace personnalisé est prêt !',
-                'read': False,
-                'created_at': datetime.utcnow().isoformat()
-            }
-        ]
-        
-        # Récupérer les rappels de vaccins
-        vaccine_reminders = []
-        try:
-            user_data = db_manager.get_user_by_id(user_id)
-            if user_data and 'children' in user_data:
-                tracker = VaccineTracker()
-                for child in user_data.get('children', []):
-                    if 'birth_date' in child:
-                        reminders = tracker.get_upcoming_vaccines(child['birth_date'])
-                        for rem in reminders:
-                            vaccine_reminders.append({
-                                'id': f"vaccine_{len(vaccine_reminders)}",
-                                'type': 'vaccine',
-                                'title': f'Rappel vaccin - {child.get("name", "Bébé")}',
-                                'message': f'{", ".join(rem.get("vaccines", []))} - {rem.get("milestone", "")}',
-                                'read': False,
-                                'data': rem,
-                                'created_at': datetime.utcnow().isoformat()
-                            })
-        except Exception as e:
-            print(f"⚠️ Erreur récupération rappels vaccins: {e}")
-        
-        notifications.extend(vaccine_reminders)
+        notifications, next_cursor = db_manager.get_user_notifications(
+            current_user.id, unread_only, limit, cursor
+        )
         
         return jsonify({
             'notifications': notifications,
-            'unread_count': len([n for n in notifications if not n.get('read', False)])
+            'next_cursor': next_cursor,
+            'unread_count': max(current_user.unread_notifications, 0)
         })
     
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
-        print(f"❌ Erreur récupération notifications: {e}")
-        return jsonify({'notifications': [], 'unread_count': 0})
+        logger.error("Erreur récupération notifications: %s", e)
+        return jsonify({'notifications': [], 'next_cursor': None, 'unread_count': 0})
 
 @app.route('/api/notifications/<notification_id>/read', methods=['POST'])
 @login_required
@@ -785,7 +926,7 @@ def mark_notification_as_read(notification_id):
             return jsonify({'error': 'Notification non trouvée'}), 404
     
     except Exception as e:
-        print(f"❌ Erreur marquage notification: {e}")
+        logger.error("Erreur marquage notification: %s", e)
         return jsonify({'error': 'Erreur serveur'}), 500
 
 @app.route('/api/notifications/read-all', methods=['POST'])
@@ -801,7 +942,7 @@ def mark_all_notifications_as_read():
             return jsonify({'error': 'Erreur lors du marquage'}), 500
     
     except Exception as e:
-        print(f"❌ Erreur marquage toutes notifications: {e}")
+        logger.error("Erreur marquage toutes notifications: %s", e)
         return jsonify({'error': 'Erreur serveur'}), 500
 
 @app.route('/api/notifications/settings', methods=['POST'])
@@ -826,7 +967,7 @@ def update_notification_settings():
             return jsonify({'error': 'Erreur mise à jour paramètres'}), 500
     
     except Exception as e:
-        print(f"❌ Erreur mise à jour paramètres: {e}")
+        logger.error("Erreur mise à jour paramètres: %s", e)
         return jsonify({'error': 'Erreur serveur'}), 500
 
 @app.route('/api/notifications/check')
@@ -872,7 +1013,7 @@ def check_new_notifications():
         return jsonify({'has_new': False})
     
     except Exception as e:
-        print(f"❌ Erreur vérification notifications: {e}")
+        logger.error("Erreur vérification notifications: %s", e)
         return jsonify({'has_new': False})
 
 @app.route('/api/test/notification')
@@ -893,9 +1034,9 @@ def test_notification():
         # Sauvegarder (si la méthode existe)
         try:
             notification_id = db_manager.save_notification(test_notification)
-            print(f"✅ Notification de test créée: {notification_id}")
+            logger.info("Notification de test créée: %s", notification_id)
         except AttributeError:
-            print("⚠️ save_notification non disponible, simulation seulement")
+            logger.warning("save_notification non disponible, simulation seulement")
         
         return jsonify({
             'status': 'success',
@@ -910,7 +1051,7 @@ def test_notification():
         })
     
     except Exception as e:
-        print(f"❌ Erreur test notification: {e}")
+        logger.error("Erreur test notification: %s", e)
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/notifications/stats')
@@ -918,30 +1059,14 @@ def test_notification():
 def notification_stats():
     """Retourne les statistiques des notifications"""
     try:
-        # Statistiques simulées
-        stats = {
-            'total': 5,
-            'unread': 2,
-            'last_24h': 3,
-            'by_type': {
-                'vaccine': {'total': 2, 'unread': 1},
-                'appointment': {'total': 1, 'unread': 0},
-                'pregnancy': {'total': 2, 'unread': 1}
-            }
-        }
-        
-        # Essayer de récupérer les vraies stats si la méthode existe
-        try:
-            real_stats = db_manager.get_notification_stats(current_user.id)
-            if real_stats:
-                stats = real_stats
-        except AttributeError:
-            print("⚠️ get_notification_stats non disponible, utilisation des stats simulées")
+        stats = db_manager.get_notification_stats(current_user.id)
+        if stats is None:
+            return jsonify({'error': 'Statistiques indisponibles'}), 500
         
         return jsonify(stats)
     
     except Exception as e:
-        print(f"❌ Erreur stats notifications: {e}")
+        logger.error("Erreur stats notifications: %s", e)
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/notifications/weekly', methods=['POST'])
@@ -961,11 +1086,11 @@ def send_weekly_notification():
             success = notification_service.send_weekly_pregnancy_update(
                 current_user.id,
                 week,
-                calculate_trimester(week),
-                get_week_development(week)
+                trimester_for_week(week),
+                week_content(week)['summary']
             )
         except (ImportError, AttributeError):
-            print("⚠️ notification_service non disponible")
+            logger.warning("notification_service non disponible")
             success = False
         
         if success:
@@ -974,7 +1099,7 @@ def send_weekly_notification():
             return jsonify({'error': 'Erreur envoi notification'}), 500
     
     except Exception as e:
-        print(f"❌ Erreur envoi notification hebdomadaire: {e}")
+        logger.error("Erreur envoi notification hebdomadaire: %s", e)
         return jsonify({'error': 'Erreur serveur'}), 500
 
 # ============ FONCTIONS UTILITAIRES ============
@@ -995,34 +1120,6 @@ def get_relative_time(timestamp):
     else:
         return "à l'instant"
 
-def calculate_trimester(week):
-    """Calcule le trimestre à partir de la semaine"""
-    if week <= 13:
-        return 1
-    elif week <= 27:
-        return 2
-    else:
-        return 3
-
-def get_week_development(week):
-    """Retourne le développement pour la semaine"""
-    developments = {
-        1: "Première semaine - Début du voyage !",
-        4: "Cœur qui commence à battre",
-        8: "Tous les organes sont présents",
-        12: "Bébé fait ses premiers mouvements",
-        16: "Peut sucer son pouce",
-        20: "Vous pouvez sentir les mouvements",
-        24: "Bébé est viable",
-        28: "Ouverture des yeux",
-        32: "Bébé prend sa position finale",
-        36: "Prêt à naître !",
-        40: "Terme - Prêt pour la rencontre !"
-    }
-    
-    closest_week = min(developments.keys(), key=lambda x: abs(x - week))
-    return developments.get(closest_week, "Développement en cours")
-
 # ============ GESTION DES ERREURS ============
 
 @app.errorhandler(404)
@@ -1051,4 +1148,4 @@ if __name__ == '__main__':
     print(f"🔒 Authentification: Flask-Login + Bcrypt")
     print(f"🗄️ Base de données: MongoDB")
     
-    app.run(debug=debug, host='0.0.0.0', port=port)
\ No newline at end of file
+    create_app().run(debug=debug, host='0.0.0.0', port=port)
\ No newline at end of file
@@ -0,0 +1,488 @@
+"""Test de charge de bout en bout d'un nœud : gunicorn + MongoDB local + faux Twilio
+
+Des utilisatrices virtuelles rejouent le parcours complet sur l'application réelle
+(gunicorn -c gunicorn.conf.py) :
+  inscription → déconnexion → connexion (/api/login) → tableau de bord
+  → questions au chat (dont une part de messages d'urgence) → relevés des notifications
+
+Les SMS partent vers un faux serveur Twilio local (TWILIO_API_URL) qui les
+enregistre : chaque réponse d'urgence 'high' du chat doit produire un SMS. La
+concurrence augmente par paliers ; pour chacun sont rapportés le débit, les
+percentiles de latence par route et le taux d'erreurs.
+
+Prérequis : mongod local (--mongodb-uri), gunicorn et le modèle spaCy installés.
+Le générateur de charge est un processus Python à threads : au-delà de quelques
+centaines d'utilisatrices simultanées, le lancer sur une autre machine (--url).
+
+Lancement : python -m benchmarks.load_test --concurrency 1,5,10,25,50 --duration 30
+"""
+import argparse
+import http.client
+import itertools
+import json
+import math
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+from http.cookies import SimpleCookie
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlencode, urlsplit
+
+from services.seed import SEED_PASSWORD, load_intents, seed_email
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+TWILIO_ACCOUNT_SID = 'AC' + '0' * 32
+TWILIO_PHONE_NUMBER = '+15005550006'
+
+# Messages déclenchant la détection d'urgence (phrases critiques du processeur NLP)
+EMERGENCY_MESSAGES = (
+    "Mon bébé ne bouge plus depuis ce matin",
+    "J'ai un saignement abondant, que faire ?",
+    "Perte des eaux et contractions régulières",
+    "Douleur intense dans le ventre et vision floue",
+    "Mon enfant a une difficulté à respirer",
+)
+
+# ============ FAUX TWILIO ============
+
+class FakeTwilioServer(ThreadingHTTPServer):
+    """API Messages de Twilio simulée : enregistre chaque SMS et répond 201"""
+    daemon_threads = True
+
+    def __init__(self, address=('127.0.0.1', 0), latency=0.0):
+        super().__init__(address, FakeTwilioHandler)
+        self.latency = latency
+        self.lock = threading.Lock()
+        self.messages = []
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def message_count(self):
+        with self.lock:
+            return len(self.messages)
+
+class FakeTwilioHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        form = {key: values[0] for key, values in parse_qs(self.rfile.read(length).decode('utf-8')).items()}
+        if not self.path.endswith('/Messages.json'):
+            return self._reply(404, {'code': 20404, 'message': 'Not found', 'status': 404})
+
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        with self.server.lock:
+            sid = f"SM{len(self.server.messages):032x}"
+            self.server.messages.append({'sid': sid, 'to': form.get('To'), 'body': form.get('Body'),
+                                         'received_at': time.time()})
+        self._reply(201, {
+            'sid': sid,
+            'account_sid': self.path.split('/')[3],
+            'from': form.get('From'),
+            'to': form.get('To'),
+            'body': form.get('Body'),
+            'status': 'queued',
+            'num_segments': '1',
+            'direction': 'outbound-api'
+        })
+
+    def _reply(self, status, payload):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+# ============ CLIENT HTTP ============
+
+class Session:
+    """Connexion keep-alive et cookies d'une utilisatrice virtuelle"""
+
+    def __init__(self, base_url, stats, timeout=30):
+        parts = urlsplit(base_url)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.stats = stats
+        self.timeout = timeout
+        self.connection = None
+        self.cookies = {}
+        self.etags = {}
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+    def request(self, name, method, path, json_body=None, form=None, expect=(200,), conditional=False):
+        """Envoie une requête et la comptabilise sous `name` ; renvoie (statut, corps) ou None"""
+        headers = {}
+        body = None
+        if json_body is not None:
+            body = json.dumps(json_body).encode('utf-8')
+            headers['Content-Type'] = 'application/json'
+        elif form is not None:
+            body = urlencode(form).encode('utf-8')
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+        if self.cookies:
+            headers['Cookie'] = '; '.join(f"{key}={value}" for key, value in self.cookies.items())
+        if conditional and path in self.etags:
+            headers['If-None-Match'] = self.etags[path]
+
+        started = time.perf_counter()
+        try:
+            if self.connection is None:
+                self.connection = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+            self.connection.request(method, path, body=body, headers=headers)
+            response = self.connection.getresponse()
+            payload = response.read()
+        except (OSError, http.client.HTTPException) as e:
+            self.close()
+            self.stats.record(name, time.perf_counter() - started, error=type(e).__name__)
+            return None
+
+        elapsed = time.perf_counter() - started
+        for header in response.msg.get_all('Set-Cookie') or []:
+            for key, morsel in SimpleCookie(header).items():
+                if morsel.value:
+                    self.cookies[key] = morsel.value
+                else:
+                    self.cookies.pop(key, None)
+        if response.getheader('ETag'):
+            self.etags[path] = response.getheader('ETag')
+        if response.getheader('Connection', '').lower() == 'close':
+            self.close()
+
+        ok = response.status in expect or (conditional and response.status == 304)
+        self.stats.record(name, elapsed, error=None if ok else f"HTTP {response.status}")
+        return response.status, payload
+
+# ============ STATISTIQUES ============
+
+def percentile(values, fraction):
+    """Percentile au rang le plus proche d'une liste triée"""
+    if not values:
+        return 0.0
+    return values[max(0, math.ceil(fraction * len(values)) - 1)]
+
+class StageStats:
+    """Latences et erreurs d'un palier de concurrence, par route"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = {}
+        self.errors = {}
+        self.journeys = 0
+        self.emergencies = 0
+
+    def record(self, name, seconds, error=None):
+        with self.lock:
+            self.latencies.setdefault(name, []).append(seconds)
+            if error:
+                self.errors.setdefault(name, {}).setdefault(error, 0)
+                self.errors[name][error] += 1
+
+    def count(self, journeys=0, emergencies=0):
+        with self.lock:
+            self.journeys += journeys
+            self.emergencies += emergencies
+
+    def summary(self, concurrency, elapsed, sms_sent):
+        endpoints = {}
+        total = failed = 0
+        with self.lock:
+            for name, values in sorted(self.latencies.items()):
+                values = sorted(values)
+                errors = sum(self.errors.get(name, {}).values())
+                total += len(values)
+                failed += errors
+                endpoints[name] = {
+                    'requests': len(values),
+                    'errors': errors,
+                    'error_rate': round(errors / len(values), 4),
+                    'p50_ms': round(percentile(values, 0.50) * 1000, 1),
+                    'p90_ms': round(percentile(values, 0.90) * 1000, 1),
+                    'p99_ms': round(percentile(values, 0.99) * 1000, 1),
+                    'max_ms': round(values[-1] * 1000, 1),
+                    'error_kinds': dict(self.errors.get(name, {}))
+                }
+            return {
+                'concurrency': concurrency,
+                'duration_s': round(elapsed, 1),
+                'journeys': self.journeys,
+                'requests': total,
+                'throughput_rps': round(total / elapsed, 1) if elapsed else 0.0,
+                'error_rate': round(failed / total, 4) if total else 0.0,
+                'emergency_replies': self.emergencies,
+                'sms_sent': sms_sent,
+                'endpoints': endpoints
+            }
+
+# ============ PARCOURS ============
+
+class StageOver(Exception):
+    pass
+
+class Journey:
+    """Parcours d'une utilisatrice : inscription, connexion, tableau de bord, chat, notifications"""
+
+    def __init__(self, session, rng, number, run_tag, intents, options):
+        self.session = session
+        self.rng = rng
+        self.number = number
+        self.run_tag = run_tag
+        self.intents = intents
+        self.options = options
+
+    def _call(self, deadline, *args, **kwargs):
+        if time.monotonic() >= deadline:
+            raise StageOver()
+        return self.session.request(*args, **kwargs)
+
+    def run(self, deadline):
+        rng = self.rng
+        options = self.options
+        email = f"load-{self.run_tag}-{self.number}@loadtest.example.com"
+        statut = rng.choice(('enceinte', 'maman', 'les_deux'))
+        form = {
+            'prenom': 'Charge',
+            'nom': f"Test{self.number}",
+            'email': email,
+            'phone': f"+2268{self.run_tag}{self.number:06d}",
+            'password': SEED_PASSWORD,
+            'confirm_password': SEED_PASSWORD,
+            'statut': statut
+        }
+        if statut != 'maman':
+            form['start_date'] = (datetime.utcnow() - timedelta(weeks=rng.randint(1, 39))).strftime('%Y-%m-%d')
+        if statut != 'enceinte':
+            form['children[1][name]'] = 'Bébé'
+            form['children[1][birth_date]'] = (datetime.utcnow() - timedelta(days=rng.randint(1, 700))).strftime('%Y-%m-%d')
+            form['children[1][gender]'] = rng.choice(('F', 'M'))
+
+        self.session.cookies.clear()
+        self.session.etags.clear()
+        self._call(deadline, 'register', 'POST', '/register', form=form, expect=(302,))
+        self._call(deadline, 'logout', 'GET', '/logout', expect=(302,))
+        self._call(deadline, 'login', 'POST', '/api/login',
+                   json_body={'email': email, 'password': SEED_PASSWORD})
+        self._call(deadline, 'dashboard', 'GET', '/dashboard')
+
+        emergencies = 0
+        for _ in range(options.messages):
+            if rng.random() < options.emergency_ratio:
+                name, message = 'chat_emergency', rng.choice(EMERGENCY_MESSAGES)
+            else:
+                name, message = 'chat', rng.choice(rng.choice(self.intents)['patterns'])
+            result = self._call(deadline, name, 'POST', '/api/chat', json_body={'message': message})
+            if result and result[0] == 200 and json.loads(result[1]).get('urgency') == 'high':
+                emergencies += 1
+
+        for _ in range(options.polls):
+            self._call(deadline, 'notifications', 'GET', '/api/notifications', conditional=True)
+            self._call(deadline, 'notifications_check', 'GET', '/api/notifications/check')
+            if options.think_time:
+                time.sleep(options.think_time)
+        return emergencies
+
+class SeededLogin(Journey):
+    """Connexion d'une utilisatrice déjà en base (flask seed), sans inscription"""
+
+    def run(self, deadline):
+        self.session.cookies.clear()
+        self.session.etags.clear()
+        email = seed_email(self.rng.randrange(self.options.seed_users))
+        self._call(deadline, 'login_seeded', 'POST', '/api/login',
+                   json_body={'email': email, 'password': SEED_PASSWORD})
+        self._call(deadline, 'dashboard', 'GET', '/dashboard')
+        for _ in range(self.options.polls):
+            self._call(deadline, 'notifications', 'GET', '/api/notifications', conditional=True)
+        return 0
+
+def run_stage(base_url, concurrency, options, intents, twilio, run_tag, counter):
+    """Palier : `concurrency` utilisatrices enchaînent des parcours pendant options.duration"""
+    stats = StageStats()
+    deadline = time.monotonic() + options.duration
+    sms_before = twilio.message_count() if twilio else 0
+
+    def worker(index):
+        rng = random.Random(f"{options.seed}:{concurrency}:{index}")
+        session = Session(base_url, stats)
+        try:
+            while time.monotonic() < deadline:
+                number = next(counter)
+                journey_class = Journey
+                if options.seed_users and rng.random() < options.seeded_ratio:
+                    journey_class = SeededLogin
+                try:
+                    emergencies = journey_class(session, rng, number, run_tag, intents, options).run(deadline)
+                except StageOver:
+                    break
+                stats.count(journeys=1, emergencies=emergencies)
+        finally:
+            session.close()
+
+    started = time.monotonic()
+    threads = [threading.Thread(target=worker, args=(index,), daemon=True) for index in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - started
+
+    # Laisser aux derniers SMS le temps d'arriver
+    time.sleep(0.5)
+    sms_sent = (twilio.message_count() - sms_before) if twilio else None
+    return stats.summary(concurrency, elapsed, sms_sent)
+
+# ============ NŒUD SOUS TEST ============
+
+def node_environment(options, twilio_url):
+    env = dict(os.environ)
+    env.update({
+        'MONGODB_URI': options.mongodb_uri,
+        'PORT': str(options.port),
+        'WEB_CONCURRENCY': str(options.workers),
+        'GUNICORN_THREADS': str(options.threads),
+        'SCHEDULER_ENABLED': 'false',
+        'LOG_LEVEL': options.log_level,
+        'TWILIO_ACCOUNT_SID': TWILIO_ACCOUNT_SID,
+        'TWILIO_AUTH_TOKEN': 'loadtest',
+        'TWILIO_PHONE_NUMBER': TWILIO_PHONE_NUMBER,
+        'TWILIO_API_URL': twilio_url
+    })
+    return env
+
+def prepare_database(options, env):
+    """Base vidée (--reset), migrations appliquées, données synthétiques (--seed-users)"""
+    if options.reset:
+        from pymongo import MongoClient
+        client = MongoClient(options.mongodb_uri)
+        client.drop_database(client.get_database().name)
+        client.close()
+
+    flask = [sys.executable, '-m', 'flask', '--app', 'app']
+    if options.seed_users:
+        subprocess.run(flask + ['seed', '--users', str(options.seed_users)], cwd=ROOT, env=env, check=True)
+    else:
+        subprocess.run(flask + ['init-db'], cwd=ROOT, env=env, check=True)
+
+def start_node(options, env):
+    """Lance gunicorn avec la configuration de production et attend /ready"""
+    output = None if options.log_level == 'DEBUG' else subprocess.DEVNULL
+    process = subprocess.Popen(['gunicorn', '-c', 'gunicorn.conf.py'], cwd=ROOT, env=env,
+                               stdout=output, stderr=output)
+    deadline = time.monotonic() + options.startup_timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"gunicorn s'est arrêté (code {process.returncode})")
+        try:
+            connection = http.client.HTTPConnection('127.0.0.1', options.port, timeout=2)
+            connection.request('GET', '/ready')
+            if connection.getresponse().status == 200:
+                connection.close()
+                return process
+            connection.close()
+        except OSError:
+            pass
+        time.sleep(0.5)
+    process.terminate()
+    raise RuntimeError("le nœud n'est pas prêt (délai dépassé)")
+
+# ============ RAPPORT ============
+
+def print_stage(summary):
+    sms = '-' if summary['sms_sent'] is None else summary['sms_sent']
+    print(f"\n▶ concurrence {summary['concurrency']} : {summary['journeys']} parcours, "
+          f"{summary['requests']} requêtes en {summary['duration_s']}s — "
+          f"{summary['throughput_rps']} req/s, erreurs {summary['error_rate']:.2%}, "
+          f"urgences {summary['emergency_replies']} / SMS reçus {sms}")
+    print(f"  {'route':<22} {'requêtes':>9} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'max ms':>8} {'erreurs':>8}")
+    for name, row in summary['endpoints'].items():
+        print(f"  {name:<22} {row['requests']:>9} {row['p50_ms']:>8} {row['p90_ms']:>8} "
+              f"{row['p99_ms']:>8} {row['max_ms']:>8} {row['error_rate']:>8.2%}")
+        for kind, count in row['error_kinds'].items():
+            print(f"      {kind}: {count}")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--concurrency', default='1,5,10,25,50',
+                        help="paliers d'utilisatrices simultanées (liste séparée par des virgules)")
+    parser.add_argument('--duration', type=float, default=30, help="durée de chaque palier (s)")
+    parser.add_argument('--messages', type=int, default=4, help="questions au chat par parcours")
+    parser.add_argument('--emergency-ratio', type=float, default=0.1, help="part de messages d'urgence")
+    parser.add_argument('--polls', type=int, default=3, help="relevés des notifications par parcours")
+    parser.add_argument('--think-time', type=float, default=0.0, help="pause entre deux relevés (s)")
+    parser.add_argument('--seed', type=int, default=42, help="graine des parcours")
+    parser.add_argument('--url', help="nœud déjà démarré (ni gunicorn, ni faux Twilio, ni préparation de base)")
+    parser.add_argument('--mongodb-uri', default='mongodb://localhost:27017/maternelle_loadtest')
+    parser.add_argument('--reset', action='store_true', help="vider la base avant le test")
+    parser.add_argument('--seed-users', type=int, default=0,
+                        help="utilisatrices synthétiques à générer (flask seed) avant le test ; "
+                             "avec --url, nombre de celles déjà en base")
+    parser.add_argument('--seeded-ratio', type=float, default=0.5,
+                        help="part des parcours qui se connectent avec un compte généré")
+    parser.add_argument('--port', type=int, default=5055)
+    parser.add_argument('--workers', type=int, default=2, help="workers gunicorn (WEB_CONCURRENCY)")
+    parser.add_argument('--threads', type=int, default=4, help="threads par worker (GUNICORN_THREADS)")
+    parser.add_argument('--twilio-latency', type=float, default=0.05, help="latence simulée de Twilio (s)")
+    parser.add_argument('--startup-timeout', type=float, default=120)
+    parser.add_argument('--log-level', default='WARNING', help="LOG_LEVEL du nœud (DEBUG : journaux affichés)")
+    parser.add_argument('--output', help="fichier JSON des résultats (comparaison entre versions)")
+    options = parser.parse_args(argv)
+    options.stages = [int(value) for value in options.concurrency.split(',') if value.strip()]
+    return options
+
+def run(options):
+    intents = load_intents()
+    run_tag = f"{int(time.time()) % 10000:04d}"
+    # Numéro unique de parcours (email, téléphone), partagé par tous les paliers
+    counter = itertools.count()
+
+    twilio = process = None
+    base_url = options.url
+    if not base_url:
+        twilio = FakeTwilioServer(latency=options.twilio_latency)
+        threading.Thread(target=twilio.serve_forever, daemon=True).start()
+        env = node_environment(options, twilio.url)
+        prepare_database(options, env)
+        process = start_node(options, env)
+        base_url = f"http://127.0.0.1:{options.port}"
+
+    results = {
+        'started_at': datetime.utcnow().isoformat(),
+        'node': {'workers': options.workers, 'threads': options.threads} if process else {'url': base_url},
+        'stages': []
+    }
+    try:
+        print(f"🚦 Test de charge sur {base_url} — paliers {options.stages}, {options.duration:g}s chacun")
+        for concurrency in options.stages:
+            summary = run_stage(base_url, concurrency, options, intents, twilio, run_tag, counter)
+            results['stages'].append(summary)
+            print_stage(summary)
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=30)
+        if twilio is not None:
+            twilio.shutdown()
+
+    if options.output:
+        with open(options.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+    return results
+
+if __name__ == '__main__':
+    run(parse_args())
@@ -0,0 +1,106 @@
+"""Construction d'un million de modèles User, Pregnancy et Consultation
+
+Compare les modèles à __slots__ (dates converties à la demande) avec l'ancienne
+forme : attributs dans __dict__, valeurs par défaut datetime.utcnow() calculées
+à chaque construction. Mesure le temps de construction et la mémoire par instance.
+
+Lancement : python -m benchmarks.models_benchmark [nombre_de_modèles]
+"""
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from bson import ObjectId
+
+from models.consultation import Consultation
+from models.pregnancy import Pregnancy
+from models.user import User
+
+USER_DOC = {
+    '_id': ObjectId(),
+    'nom': 'Martin',
+    'prenom': 'Awa',
+    'email': 'awa.martin@example.com',
+    'phone': '+33600000000',
+    'password_hash': '$2b$12$' + 'x' * 53,
+    'statut': 'enceinte',
+    'children': [],
+    'role': 'user',
+    'is_active': True,
+    'data_versions': {'profile': 3, 'consultations': 12},
+    'date_creation': datetime(2025, 1, 2, 9, 30),
+    'date_modification': datetime(2025, 3, 4, 18, 5),
+}
+
+PREGNANCY_DOC = {
+    '_id': ObjectId(),
+    'user_id': str(USER_DOC['_id']),
+    'start_date': datetime(2025, 2, 1),
+    'due_date': datetime(2025, 11, 8),
+    'current_week': 14,
+    'created_at': datetime(2025, 2, 3),
+    'updated_at': datetime(2025, 2, 3),
+}
+
+CONSULTATION_DOC = {
+    '_id': ObjectId(),
+    'user_id': str(USER_DOC['_id']),
+    'question': 'Puis-je manger du fromage au lait cru ?',
+    'response': 'Non, évitez les fromages au lait cru pendant la grossesse.',
+    'urgency': 'low',
+    'date_consultation': datetime(2025, 3, 4, 18, 5),
+}
+
+class LegacyUser:
+    """Ancienne forme du modèle User (attributs copiés dans __dict__)"""
+    def __init__(self, user_data=None):
+        if user_data is None:
+            user_data = {}
+
+        self._id = user_data.get('_id')
+        self.id = str(self._id) if self._id else None
+        self.nom = user_data.get('nom', '')
+        self.prenom = user_data.get('prenom', '')
+        self.email = user_data.get('email', '')
+        self.phone = user_data.get('phone', '')
+        self.password_hash = user_data.get('password_hash', '')
+        self.password_salt = user_data.get('password_salt', '')
+        self.statut = user_data.get('statut', 'enceinte')
+        self.allergies = user_data.get('allergies', '')
+        self.traitements = user_data.get('traitements', '')
+        self.children = user_data.get('children', [])
+        self.date_creation = user_data.get('date_creation', datetime.utcnow())
+        self.date_modification = user_data.get('date_modification', datetime.utcnow())
+        self.role = user_data.get('role', 'user')
+        self.is_active = user_data.get('is_active', True)
+        self.data_versions = user_data.get('data_versions', {})
+
+def construction_time(model, document, count):
+    start = time.perf_counter()
+    for _ in range(count):
+        model(document)
+    return time.perf_counter() - start
+
+def bytes_per_instance(model, document, count=100_000):
+    tracemalloc.start()
+    instances = [model(document) for _ in range(count)]
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del instances
+    return size / count
+
+def run(count=1_000_000):
+    print(f"📊 Construction de {count:,} modèles")
+    for name, model, document in (
+        ('User (ancien, __dict__)', LegacyUser, USER_DOC),
+        ('User (__slots__)', User, USER_DOC),
+        ('Pregnancy (__slots__)', Pregnancy, PREGNANCY_DOC),
+        ('Consultation (__slots__)', Consultation, CONSULTATION_DOC),
+    ):
+        elapsed = construction_time(model, document, count)
+        memory = bytes_per_instance(model, document)
+        print(f"  {name:<26} {elapsed:6.2f} s  {elapsed / count * 1e9:6.0f} ns/modèle  "
+              f"{memory:5.0f} octets/instance")
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
@@ -0,0 +1,67 @@
+"""Débit de sérialisation d'un historique de 1 000 consultations
+
+Compare, du lot BSON reçu de MongoDB jusqu'au corps de réponse JSON :
+  - l'ancienne chaîne : conversion champ par champ puis json.dumps (Flask par défaut)
+  - services.serialization : documents bruts encodés directement (orjson si installé)
+
+Lancement : python -m benchmarks.serialization_benchmark [nombre_de_documents]
+"""
+import json
+import sys
+import timeit
+from datetime import datetime, timedelta
+import bson
+from bson import ObjectId
+
+from services import serialization
+
+def build_batch(count):
+    """Lot BSON tel que renvoyé par le serveur pour un find() sur consultations"""
+    start = datetime(2025, 1, 1)
+    documents = [
+        {
+            '_id': ObjectId(),
+            'user_id': '65f0c0ffee0000000000beef',
+            'question': f"Question n°{i} sur l'alimentation pendant la grossesse ?",
+            'response': "Réponse détaillée de l'assistant. " * 20,
+            'urgency': ('low', 'medium', 'high')[i % 3],
+            'date_consultation': start + timedelta(minutes=37 * i),
+            'status': 'completed'
+        }
+        for i in range(count)
+    ]
+    return b''.join(bson.encode(document) for document in documents)
+
+def legacy_body(raw):
+    """Ancienne chaîne : boucle de conversion puis encodeur standard"""
+    consultations = bson.decode_all(raw)
+    for consult in consultations:
+        consult['_id'] = str(consult['_id'])
+        if isinstance(consult.get('date_consultation'), datetime):
+            consult['date_consultation'] = consult['date_consultation'].isoformat()
+    return json.dumps({'consultations': consultations}, sort_keys=True).encode('utf-8')
+
+def serialization_body(raw):
+    """Nouvelle chaîne : documents bruts, conversion à l'encodage"""
+    return serialization.dumps_bytes({'consultations': bson.decode_all(raw)})
+
+def run(count=1000, repeat=5, number=20):
+    raw = build_batch(count)
+    assert json.loads(legacy_body(raw)) == json.loads(serialization_body(raw))
+
+    encoder = 'orjson' if serialization.orjson else 'json (stdlib)'
+    print(f"📊 {count} consultations, {len(raw) / 1024:.0f} Ko de BSON, encodeur : {encoder}")
+
+    results = {}
+    for name, body in (('conversion champ par champ', legacy_body),
+                       ('services.serialization', serialization_body)):
+        best = min(timeit.repeat(lambda: body(raw), repeat=repeat, number=number)) / number
+        results[name] = best
+        print(f"  {name:<28} {best * 1000:7.2f} ms/réponse  {count / best:>10,.0f} documents/s")
+
+    baseline, optimized = results.values()
+    print(f"  accélération : x{baseline / optimized:.1f}")
+    return results
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 1000)
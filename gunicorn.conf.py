@@ -0,0 +1,21 @@
+import gc
+import os
+
+# Configuration gunicorn : `gunicorn -c gunicorn.conf.py`
+wsgi_app = 'app:create_app(prefork=True)'
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+workers = int(os.getenv('WEB_CONCURRENCY', '2'))
+threads = int(os.getenv('GUNICORN_THREADS', '4'))
+
+# Charger l'application (modèle spaCy, intents) dans le maître avant le fork :
+# les workers partagent ces pages en copy-on-write
+preload_app = True
+
+def when_ready(server):
+    # Geler les objets chargés pour que le GC des workers ne les touche pas (copy-on-write)
+    gc.freeze()
+
+def post_fork(server, worker):
+    # Client MongoDB, Twilio et scheduler recréés dans chaque worker
+    from app import init_worker
+    init_worker()
@@ -1,20 +1,39 @@
 from datetime import datetime
 from bson import ObjectId
+from models.fields import LazyDate
 
 class Consultation:
+    __slots__ = (
+        '_id', 'user_id', 'question', 'response', 'urgency', 'status',
+        'symptoms', 'recommendations', '_date_consultation'
+    )
+    
+    _id: ObjectId
+    user_id: str
+    question: str
+    response: str
+    urgency: str
+    status: str
+    symptoms: list
+    recommendations: list
+    
+    # Date convertie seulement si elle est lue
+    date_consultation: datetime = LazyDate(default=datetime.utcnow)
+    
     def __init__(self, consultation_data=None):
         if consultation_data is None:
             consultation_data = {}
         
-        self._id = consultation_data.get('_id')
-        self.user_id = consultation_data.get('user_id')
-        self.question = consultation_data.get('question', '')
-        self.response = consultation_data.get('response', '')
-        self.urgency = consultation_data.get('urgency', 'low')
-        self.date_consultation = consultation_data.get('date_consultation', datetime.utcnow())
-        self.status = consultation_data.get('status', 'completed')
-        self.symptoms = consultation_data.get('symptoms', [])
-        self.recommendations = consultation_data.get('recommendations', [])
+        get = consultation_data.get
+        self._id = get('_id')
+        self.user_id = get('user_id')
+        self.question = get('question', '')
+        self.response = get('response', '')
+        self.urgency = get('urgency', 'low')
+        self._date_consultation = get('date_consultation')
+        self.status = get('status', 'completed')
+        self.symptoms = get('symptoms', [])
+        self.recommendations = get('recommendations', [])
     
     def to_dict(self):
         """Convertit l'objet en dictionnaire pour MongoDB"""
@@ -0,0 +1,41 @@
+from datetime import datetime
+
+def parse_datetime(value):
+    """Convertit une chaîne ISO en datetime (les autres valeurs sont renvoyées telles quelles)"""
+    if isinstance(value, str):
+        if not value:
+            return None
+        return datetime.fromisoformat(value.replace('Z', '+00:00'))
+    return value
+
+class LazyDate:
+    """Champ date d'un modèle à __slots__, converti au premier accès
+
+    La valeur brute (datetime BSON, chaîne ISO ou None) est rangée dans le slot
+    `_<nom>` ; la conversion et la valeur par défaut ne sont calculées que si le
+    champ est lu, puis mémorisées dans le slot.
+    """
+    __slots__ = ('slot', 'default')
+
+    def __init__(self, default=None):
+        self.slot = None
+        self.default = default
+
+    def __set_name__(self, owner, name):
+        self.slot = '_' + name
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+
+        value = getattr(instance, self.slot)
+        if value is None and self.default is not None:
+            value = self.default()
+            setattr(instance, self.slot, value)
+        elif isinstance(value, str):
+            value = parse_datetime(value)
+            setattr(instance, self.slot, value)
+        return value
+
+    def __set__(self, instance, value):
+        setattr(instance, self.slot, value)
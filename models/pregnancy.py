@@ -1,80 +1,68 @@
 from datetime import datetime, timedelta
 from bson import ObjectId
+from models.fields import LazyDate
+from services.pregnancy_progress import week_for_date, trimester_for_week, week_content
 
 class Pregnancy:
+    __slots__ = (
+        '_id', 'user_id', 'week_current', 'trimester', 'medical_history',
+        'vaccines_received', 'appointments',
+        '_start_date', '_due_date', '_created_at', '_updated_at', '_next_week_at'
+    )
+    
+    _id: ObjectId
+    user_id: str
+    week_current: int
+    trimester: int
+    medical_history: dict
+    vaccines_received: list
+    appointments: list
+    
+    # Dates converties seulement si elles sont lues
+    start_date: datetime = LazyDate()
+    due_date: datetime = LazyDate()
+    created_at: datetime = LazyDate(default=datetime.utcnow)
+    updated_at: datetime = LazyDate(default=datetime.utcnow)
+    next_week_at: datetime = LazyDate()
+    
     def __init__(self, pregnancy_data=None):
         if pregnancy_data is None:
             pregnancy_data = {}
         
-        self._id = pregnancy_data.get('_id')
-        self.user_id = pregnancy_data.get('user_id')
-        self.start_date = pregnancy_data.get('start_date')
-        self.due_date = pregnancy_data.get('due_date')
-        self.week_current = pregnancy_data.get('week_current', 0)
-        self.trimester = pregnancy_data.get('trimester', 1)
-        self.medical_history = pregnancy_data.get('medical_history', {})
-        self.vaccines_received = pregnancy_data.get('vaccines_received', [])
-        self.appointments = pregnancy_data.get('appointments', [])
-        self.created_at = pregnancy_data.get('created_at', datetime.utcnow())
-        self.updated_at = pregnancy_data.get('updated_at', datetime.utcnow())
+        get = pregnancy_data.get
+        self._id = get('_id')
+        self.user_id = get('user_id')
+        self._start_date = get('start_date')
+        self._due_date = get('due_date')
+        # current_week et trimester sont matérialisés par le job quotidien
+        self.week_current = get('current_week', get('week_current', 0))
+        self.trimester = get('trimester', 1)
+        self.medical_history = get('medical_history', {})
+        self.vaccines_received = get('vaccines_received', [])
+        self.appointments = get('appointments', [])
+        self._created_at = get('created_at')
+        self._updated_at = get('updated_at')
+        self._next_week_at = get('next_week_at')
     
     def calculate_week(self):
         """Calcule la semaine de grossesse actuelle"""
+        # Avancement matérialisé encore valide : simple lecture
+        next_week_at = self.next_week_at
+        if next_week_at and datetime.utcnow() < next_week_at:
+            return self.week_current
+        
         if not self.start_date:
             return 0
         
-        # Gérer les différents formats de date
-        if isinstance(self.start_date, str):
-            start_date = datetime.fromisoformat(self.start_date.replace('Z', '+00:00'))
-        else:
-            start_date = self.start_date
-            
-        today = datetime.utcnow()
-        
-        # Calculer la différence en semaines
-        delta = today - start_date
-        weeks = delta.days // 7
-        
-        # Mettre à jour le trimestre
-        self.week_current = weeks
-        if weeks < 14:
-            self.trimester = 1
-        elif weeks < 28:
-            self.trimester = 2
-        else:
-            self.trimester = 3
-            
+        # Chaîne ISO ou datetime : conversion faite par LazyDate
+        self.week_current = week_for_date(self.start_date)
+        self.trimester = trimester_for_week(self.week_current)
         return self.week_current
     
     def get_baby_development(self):
         """Retourne le développement du bébé selon la semaine"""
         current_week = self.calculate_week()
-        
-        developments = {
-            4: "Cœur qui bat, formation du système nerveux",
-            8: "Tous les organes présents, premiers mouvements",
-            12: "Visage formé, échographie de datation",
-            16: "Mouvements actifs, sexe identifiable",
-            20: "Mouvements ressentis, échographie morphologique", 
-            24: "Bébé entend, poumons en développement",
-            28: "Ouverture des yeux, sensibilité à la lumière",
-            32: "Prise de poids rapide, dernière échographie",
-            36: "Bébé se positionne, organes matures",
-            40: "Terme, bébé prêt à naître"
-        }
-        
-        # Trouver la description la plus proche
-        closest_week = 0
-        for week in sorted(developments.keys()):
-            if current_week >= week:
-                closest_week = week
-            else:
-                break
-                
-        if closest_week in developments:
-            return f"Semaine {current_week} : {developments[closest_week]}"
-        else:
-            return f"Semaine {current_week} : Début de grossesse - implantation"
+        return f"Semaine {current_week} : {week_content(current_week)['development']}"
     
     def to_dict(self):
         """Convertit l'objet en dictionnaire pour MongoDB"""
@@ -82,7 +70,7 @@ class Pregnancy:
             'user_id': self.user_id,
             'start_date': self.start_date,
             'due_date': self.due_date,
-            'week_current': self.calculate_week(),
+            'current_week': self.calculate_week(),
             'trimester': self.trimester,
             'medical_history': self.medical_history,
             'vaccines_received': self.vaccines_received,
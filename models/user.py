@@ -2,29 +2,59 @@ from datetime import datetime
 from bson import ObjectId
 import hashlib
 import secrets
-from flask_login import UserMixin
+from models.fields import LazyDate
 
-class User(UserMixin):
+class User:
+    """Utilisateur connecté (interface Flask-Login), construit à chaque requête par load_user"""
+    __slots__ = (
+        '_id', 'id', 'nom', 'prenom', 'email', 'phone', 'password_hash', 'password_salt',
+        'statut', 'allergies', 'traitements', 'children', 'role', '_is_active',
+        'data_versions', 'unread_notifications', '_date_creation', '_date_modification'
+    )
+    
+    _id: ObjectId
+    id: str
+    nom: str
+    prenom: str
+    email: str
+    phone: str
+    password_hash: str
+    password_salt: str
+    statut: str
+    allergies: str
+    traitements: str
+    children: list
+    role: str
+    data_versions: dict
+    unread_notifications: int
+    
+    # Dates converties seulement si elles sont lues
+    date_creation: datetime = LazyDate(default=datetime.utcnow)
+    date_modification: datetime = LazyDate(default=datetime.utcnow)
+    
     def __init__(self, user_data=None):
         if user_data is None:
             user_data = {}
         
-        self._id = user_data.get('_id')
+        get = user_data.get
+        self._id = get('_id')
         self.id = str(self._id) if self._id else None
-        self.nom = user_data.get('nom', '')
-        self.prenom = user_data.get('prenom', '')
-        self.email = user_data.get('email', '')
-        self.phone = user_data.get('phone', '')
-        self.password_hash = user_data.get('password_hash', '')
-        self.password_salt = user_data.get('password_salt', '')
-        self.statut = user_data.get('statut', 'enceinte')
-        self.allergies = user_data.get('allergies', '')
-        self.traitements = user_data.get('traitements', '')
-        self.children = user_data.get('children', [])
-        self.date_creation = user_data.get('date_creation', datetime.utcnow())
-        self.date_modification = user_data.get('date_modification', datetime.utcnow())
-        self.role = user_data.get('role', 'user')
-        self.is_active = user_data.get('is_active', True)
+        self.nom = get('nom', '')
+        self.prenom = get('prenom', '')
+        self.email = get('email', '')
+        self.phone = get('phone', '')
+        self.password_hash = get('password_hash', '')
+        self.password_salt = get('password_salt', '')
+        self.statut = get('statut', 'enceinte')
+        self.allergies = get('allergies', '')
+        self.traitements = get('traitements', '')
+        self.children = get('children', [])
+        self.role = get('role', 'user')
+        self._is_active = get('is_active', True)
+        self.data_versions = get('data_versions', {})
+        self.unread_notifications = get('unread_notifications', 0)
+        self._date_creation = get('date_creation')
+        self._date_modification = get('date_modification')
     
     def set_password(self, password):
         """Hash le mot de passe avec un salt (méthode SHA256 pour compatibilité)"""
@@ -53,7 +83,7 @@ class User(UserMixin):
             'traitements': self.traitements,
             'children': self.children,
             'role': self.role,
-            'is_active': self.is_active,
+            'is_active': self._is_active,
             'date_creation': self.date_creation,
             'date_modification': datetime.utcnow()
         }
@@ -68,22 +98,39 @@ class User(UserMixin):
         """Crée un objet User depuis un dictionnaire MongoDB"""
         return cls(data)
     
+    # Interface Flask-Login (propriétés, comme UserMixin)
+    
     def get_id(self):
         """Retourne l'ID de l'utilisateur pour Flask-Login"""
         return self.id
     
+    @property
     def is_authenticated(self):
-        """Vérifie si l'utilisateur est authentifié"""
+        """Un utilisateur chargé depuis la base est authentifié"""
         return True
     
+    @property
     def is_active(self):
         """Vérifie si le compte est actif"""
-        return self.is_active
+        return self._is_active
     
+    @is_active.setter
+    def is_active(self, value):
+        self._is_active = value
+    
+    @property
     def is_anonymous(self):
-        """Vérifie si l'utilisateur est anonyme"""
+        """Un utilisateur chargé depuis la base n'est pas anonyme"""
         return False
     
+    def __eq__(self, other):
+        if isinstance(other, User):
+            return self.get_id() == other.get_id()
+        return NotImplemented
+    
+    def __hash__(self):
+        return hash(self.id)
+    
     def get_full_name(self):
         """Retourne le nom complet de l'utilisateur"""
-        return f"{self.prenom} {self.nom}".strip()
\ No newline at end of file
+        return f"{self.prenom} {self.nom}".strip()
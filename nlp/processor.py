@@ -1,16 +1,22 @@
 import json
+import logging
 import re
 import os
 import random
 import spacy
+import numpy as np
 from datetime import datetime
 import time
+from services.metrics import NLP_STAGE_SECONDS
+
+logger = logging.getLogger(__name__)
 
 class HealthProcessor:
     def __init__(self):
         self._load_model()
         self._load_intents_cache()
         self._build_keyword_index()
+        self._build_pattern_cache()
         
         self.emergency_keywords = [
             'urgence', 'urgent', 'grave', 'danger', 'mort', 'crise', 
@@ -35,9 +41,9 @@ class HealthProcessor:
         """Charge le modèle spaCy si disponible"""
         try:
             self.nlp = spacy.load("fr_core_news_sm")
-            print("✅ Modèle spaCy chargé avec succès")
+            logger.info("Modèle spaCy chargé avec succès")
         except OSError:
-            print("⚠️ Modèle spaCy non trouvé. Utilisation mode basique.")
+            logger.warning("Modèle spaCy non trouvé. Utilisation mode basique.")
             self.nlp = None
     
     def _load_intents_cache(self):
@@ -56,19 +62,19 @@ class HealthProcessor:
                     with open(path, 'r', encoding='utf-8') as f:
                         data = json.load(f)
                     intents_data = data["intents"] if "intents" in data else data
-                    print(f"✅ Intents chargés depuis: {path}")
+                    logger.info("Intents chargés depuis: %s", path)
                     break
             
             if not intents_data:
-                print("❌ Aucun fichier intents.json trouvé")
+                logger.error("Aucun fichier intents.json trouvé")
                 self.intents_data = []
                 return
                 
             self.intents_data = intents_data
-            print(f"✅ {len(self.intents_data)} intents chargés en cache")
+            logger.info("%s intents chargés en cache", len(self.intents_data))
             
         except Exception as e:
-            print(f"❌ Erreur chargement intents: {e}")
+            logger.error("Erreur chargement intents: %s", e)
             self.intents_data = []
     
     def _build_keyword_index(self):
@@ -90,6 +96,37 @@ class HealthProcessor:
                     if i not in self.keyword_index[word]:
                         self.keyword_index[word].append(i)
     
+    def _build_pattern_cache(self):
+        """Précalcule les patterns prétraités et la matrice de vecteurs de chaque intent
+
+        Chargé une seule fois (avant le fork des workers) : les processus
+        partagent ces pages en lecture seule.
+        """
+        self.pattern_cache = []
+        for intent in self.intents_data:
+            processed = [self.fast_preprocess(pattern) for pattern in intent.get("patterns", [])]
+            
+            vectors = None
+            if self.nlp and processed:
+                rows = []
+                for doc in self.nlp.pipe(processed):
+                    # Vecteurs normalisés : la similarité devient un produit scalaire
+                    if doc.has_vector and doc.vector_norm:
+                        rows.append(doc.vector / doc.vector_norm)
+                    else:
+                        rows.append(None)
+                
+                dim = next((len(row) for row in rows if row is not None), 0)
+                vectors = np.array([
+                    row if row is not None else np.zeros(dim, dtype=np.float32)
+                    for row in rows
+                ], dtype=np.float32).reshape(len(rows), dim)
+            
+            self.pattern_cache.append({
+                'words': [set(pattern.split()) for pattern in processed],
+                'vectors': vectors
+            })
+    
     def fast_preprocess(self, text):
         """Prétraitement ultra-rapide"""
         if not text:
@@ -118,6 +155,7 @@ class HealthProcessor:
         
         return " ".join(words)
     
+    @NLP_STAGE_SECONDS.time(stage='detect_urgency')
     def detect_urgency(self, text):
         """Détection d'urgence améliorée"""
         text_lower = text.lower()
@@ -152,6 +190,7 @@ class HealthProcessor:
         
         return 'low'
     
+    @NLP_STAGE_SECONDS.time(stage='find_best_intent')
     def find_best_intent(self, text):
         """Recherche d'intent optimisée avec spaCy si disponible"""
         if not text or not self.intents_data:
@@ -161,9 +200,12 @@ class HealthProcessor:
         words = set(processed_text.split())
         
         # Si spaCy est disponible, utiliser pour l'analyse sémantique
+        text_vector = None
         if self.nlp and len(words) > 0:
             doc = self.nlp(processed_text)
             word_set = set([token.text for token in doc])
+            if doc.has_vector and doc.vector_norm:
+                text_vector = doc.vector / doc.vector_norm
         else:
             word_set = words
         
@@ -186,23 +228,25 @@ class HealthProcessor:
                 continue
                 
             intent = self.intents_data[idx]
+            patterns = self.pattern_cache[idx]
             score = 0
             
+            # Similarité sémantique de tous les patterns en un produit matrice-vecteur
+            semantic_scores = None
+            vectors = patterns['vectors']
+            if vectors is not None and vectors.shape[1]:
+                if text_vector is not None:
+                    semantic_scores = vectors @ text_vector
+                elif not processed_text:
+                    # Texte vide : le pattern est comparé à lui-même
+                    semantic_scores = (np.linalg.norm(vectors, axis=1) > 0).astype(np.float32)
+            
             # Score par patterns avec spaCy si disponible
-            for pattern in intent.get("patterns", []):
-                pattern_processed = self.fast_preprocess(pattern)
-                
-                if self.nlp:
-                    # Similarité sémantique
-                    pattern_doc = self.nlp(pattern_processed)
-                    text_doc = self.nlp(processed_text) if len(processed_text) > 0 else pattern_doc
-                    
-                    if pattern_doc.has_vector and text_doc.has_vector:
-                        semantic_score = pattern_doc.similarity(text_doc)
-                        score = max(score, semantic_score * 0.7)
+            for i, pattern_words in enumerate(patterns['words']):
+                if semantic_scores is not None:
+                    score = max(score, float(semantic_scores[i]) * 0.7)
                 
                 # Score lexical
-                pattern_words = set(pattern_processed.split())
                 common = len(word_set & pattern_words)
                 total = len(word_set | pattern_words)
                 
@@ -260,6 +304,7 @@ class HealthProcessor:
         # Intent inconnu
         return self._default_response(processing_time, user_id)
     
+    @NLP_STAGE_SECONDS.time(stage='_get_personalized_response')
     def _get_personalized_response(self, intent, user_id=None, original_question=""):
         """Personnalise la réponse selon le contexte"""
         import random
@@ -0,0 +1,311 @@
+import base64
+import gzip
+import hashlib
+import io
+import json
+import mimetypes
+import os
+import re
+import shutil
+import urllib.request
+from flask import request, send_from_directory, url_for
+
+try:
+    import brotli
+except ImportError:  # Compression brotli optionnelle
+    brotli = None
+
+try:
+    from PIL import Image
+except ImportError:  # Variantes raster optionnelles
+    Image = None
+
+try:
+    import rjsmin
+    import rcssmin
+except ImportError:  # Minification JS/CSS avancée optionnelle
+    rjsmin = rcssmin = None
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'static')
+DIST_DIR = 'dist'
+MANIFEST_FILE = os.path.join(STATIC_DIR, DIST_DIR, 'manifest.json')
+
+# Fichiers fingerprintés : cache navigateur d'un an, jamais revalidés
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+COMPRESSIBLE_EXTENSIONS = {'.css', '.js', '.svg', '.json', '.ttf', '.html', '.txt'}
+ENCODED_SUFFIXES = {'br': '.br', 'gzip': '.gz'}
+
+# Bundles tiers auto-hébergés (téléchargés au build, CDN en secours)
+VENDOR_ASSETS = {
+    'vendor/bootstrap/css/bootstrap.min.css': 'https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/css/bootstrap.min.css',
+    'vendor/bootstrap/js/bootstrap.bundle.min.js': 'https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/js/bootstrap.bundle.min.js',
+    'vendor/fontawesome/css/all.min.css': 'https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.0.0/css/all.min.css',
+}
+for _font in ('fa-brands-400', 'fa-regular-400', 'fa-solid-900', 'fa-v4compatibility'):
+    for _ext in ('woff2', 'ttf'):
+        VENDOR_ASSETS[f'vendor/fontawesome/webfonts/{_font}.{_ext}'] = \
+            f'https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.0.0/webfonts/{_font}.{_ext}'
+
+# Images déclinées en variantes raster responsives : largeurs en pixels
+RESPONSIVE_IMAGES = {
+    'images/hero-pregnancy.svg': (320, 640, 960),
+}
+# Largeur maximale de l'image raster embarquée dans les SVG optimisés
+SVG_EMBEDDED_MAX_WIDTH = 960
+RASTER_QUALITY = 72
+
+# ============ BUILD ============
+
+def _fingerprint(content):
+    return hashlib.sha256(content).hexdigest()[:12]
+
+def _hashed_name(logical_name, content):
+    root, ext = os.path.splitext(logical_name)
+    return f"{DIST_DIR}/{root}.{_fingerprint(content)}{ext}"
+
+def _write_output(hashed_name, content):
+    """Écrit un fichier fingerprinté et ses versions précompressées"""
+    path = os.path.join(STATIC_DIR, hashed_name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(content)
+
+    if os.path.splitext(hashed_name)[1] in COMPRESSIBLE_EXTENSIONS:
+        with open(path + ENCODED_SUFFIXES['gzip'], 'wb') as f:
+            f.write(gzip.compress(content, compresslevel=9, mtime=0))
+        if brotli:
+            with open(path + ENCODED_SUFFIXES['br'], 'wb') as f:
+                f.write(brotli.compress(content, quality=11))
+
+def minify_css(text):
+    """Minification CSS (rcssmin si disponible, sinon suppression sûre des blancs)"""
+    text = re.sub(r'/\*# sourceMappingURL=.*?\*/', '', text)
+    if rcssmin:
+        return rcssmin.cssmin(text)
+    text = re.sub(r'/\*.*?\*/', '', text, flags=re.S)
+    text = re.sub(r'\s+', ' ', text)
+    text = re.sub(r'\s*([{};,>])\s*', r'\1', text)
+    return text.replace(';}', '}').strip()
+
+def minify_js(text):
+    """Minification JS (rjsmin si disponible, sinon fichier inchangé)"""
+    text = re.sub(r'^//# sourceMappingURL=.*$', '', text, flags=re.M)
+    return rjsmin.jsmin(text) if rjsmin else text
+
+def _encode_raster(image, fmt):
+    buffer = io.BytesIO()
+    if fmt == 'JPEG':
+        image.convert('RGB').save(buffer, 'JPEG', quality=RASTER_QUALITY, optimize=True, progressive=True)
+    else:
+        image.save(buffer, fmt, quality=RASTER_QUALITY, method=6)
+    return buffer.getvalue()
+
+_EMBEDDED_IMAGE = re.compile(r'xlink:href="data:image/(png|jpeg);base64,([^"]+)"')
+
+def _embedded_raster(svg_text):
+    """Image raster embarquée dans un SVG (export Figma), recadrée comme à l'affichage"""
+    match = _EMBEDDED_IMAGE.search(svg_text)
+    if not match or not Image:
+        return None
+
+    image = Image.open(io.BytesIO(base64.b64decode(match.group(2))))
+
+    # <use transform="matrix(a 0 0 d e f)"> : zone visible de l'image dans la boîte du SVG
+    transform = re.search(r'matrix\(([-\d.e]+) 0 0 ([-\d.e]+) ([-\d.e]+) ([-\d.e]+)\)', svg_text)
+    if transform:
+        a, d, e, f = (float(value) for value in transform.groups())
+        left, top = -e / a, -f / d
+        box = (max(0, round(left)), max(0, round(top)),
+               min(image.width, round(left + 1 / a)), min(image.height, round(top + 1 / d)))
+        image = image.crop(box)
+
+    return image
+
+def optimize_svg(svg_text):
+    """Allège un SVG : blancs entre balises et image embarquée réencodée"""
+    svg_text = re.sub(r'<!--.*?-->', '', svg_text, flags=re.S)
+    svg_text = re.sub(r'>\s+<', '><', svg_text).strip()
+
+    match = _EMBEDDED_IMAGE.search(svg_text)
+    if match and Image:
+        image = Image.open(io.BytesIO(base64.b64decode(match.group(2))))
+        if image.width > SVG_EMBEDDED_MAX_WIDTH:
+            # La transformation est relative à la taille déclarée : on garde width/height
+            ratio = SVG_EMBEDDED_MAX_WIDTH / image.width
+            image = image.resize((SVG_EMBEDDED_MAX_WIDTH, round(image.height * ratio)), Image.LANCZOS)
+        encoded = base64.b64encode(_encode_raster(image, 'JPEG')).decode('ascii')
+        svg_text = svg_text.replace(match.group(0), f'xlink:href="data:image/jpeg;base64,{encoded}"')
+
+    return svg_text
+
+def _responsive_variants(logical_name, svg_text):
+    """Variantes JPEG/WebP aux largeurs déclarées dans RESPONSIVE_IMAGES"""
+    image = _embedded_raster(svg_text)
+    if image is None:
+        return {}
+
+    root = os.path.splitext(logical_name)[0]
+    variants = {}
+    for width in RESPONSIVE_IMAGES[logical_name]:
+        resized = image.resize((width, round(image.height * width / image.width)), Image.LANCZOS)
+        variants[f'{root}-{width}w.jpg'] = _encode_raster(resized, 'JPEG')
+        variants[f'{root}-{width}w.webp'] = _encode_raster(resized, 'WEBP')
+    return variants
+
+def _rewrite_css_urls(logical_name, text, manifest):
+    """Remplace les url() relatives par les chemins fingerprintés"""
+    css_dir = os.path.dirname(logical_name)
+
+    def replace(match):
+        url = match.group(2)
+        if url.startswith(('data:', 'http:', 'https:', '//', '#')):
+            return match.group(0)
+
+        path, _, suffix = url.partition('?')
+        target = os.path.normpath(os.path.join(css_dir, path)).replace(os.sep, '/')
+        if target not in manifest:
+            return match.group(0)
+
+        hashed_dir = os.path.dirname(_hashed_name(logical_name, b''))
+        relative = os.path.relpath(manifest[target], hashed_dir).replace(os.sep, '/')
+        return f"url({match.group(1)}{relative}{match.group(1)})"
+
+    return re.sub(r'url\(\s*([\'"]?)([^\'")]+)\1\s*\)', replace, text)
+
+def fetch_vendor_assets(force=False):
+    """Télécharge les bundles tiers dans static/vendor"""
+    for logical_name, source_url in VENDOR_ASSETS.items():
+        path = os.path.join(STATIC_DIR, logical_name)
+        if os.path.exists(path) and not force:
+            continue
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with urllib.request.urlopen(source_url, timeout=30) as response, open(path, 'wb') as f:
+            shutil.copyfileobj(response, f)
+        print(f"📦 {logical_name} téléchargé")
+
+def build_assets(fetch_vendor=True):
+    """Minifie, fingerprinte et précompresse static/ dans static/dist"""
+    if fetch_vendor:
+        try:
+            fetch_vendor_assets()
+        except Exception as e:
+            print(f"⚠️ Bundles tiers non téléchargés (CDN conservé): {e}")
+
+    shutil.rmtree(os.path.join(STATIC_DIR, DIST_DIR), ignore_errors=True)
+
+    sources = []
+    for root, dirs, files in os.walk(STATIC_DIR):
+        dirs[:] = [d for d in dirs if os.path.join(root, d) != os.path.join(STATIC_DIR, DIST_DIR)]
+        for name in files:
+            path = os.path.join(root, name)
+            sources.append(os.path.relpath(path, STATIC_DIR).replace(os.sep, '/'))
+
+    # Les CSS en dernier : leurs url() pointent vers les polices et images déjà hashées
+    sources.sort(key=lambda name: (name.endswith('.css'), name))
+
+    manifest = {}
+    for logical_name in sources:
+        with open(os.path.join(STATIC_DIR, logical_name), 'rb') as f:
+            content = f.read()
+
+        ext = os.path.splitext(logical_name)[1]
+        if ext == '.css':
+            text = _rewrite_css_urls(logical_name, content.decode('utf-8'), manifest)
+            content = minify_css(text).encode('utf-8')
+        elif ext == '.js' and not logical_name.endswith('.min.js'):
+            content = minify_js(content.decode('utf-8')).encode('utf-8')
+        elif ext == '.svg':
+            svg_text = content.decode('utf-8')
+            if logical_name in RESPONSIVE_IMAGES:
+                for variant_name, variant in _responsive_variants(logical_name, svg_text).items():
+                    manifest[variant_name] = _hashed_name(variant_name, variant)
+                    _write_output(manifest[variant_name], variant)
+            content = optimize_svg(svg_text).encode('utf-8')
+
+        manifest[logical_name] = _hashed_name(logical_name, content)
+        _write_output(manifest[logical_name], content)
+
+    with open(MANIFEST_FILE, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+
+    print(f"✅ {len(manifest)} assets générés dans static/{DIST_DIR}")
+    return manifest
+
+# ============ SERVICE DES ASSETS ============
+
+def load_manifest():
+    """Manifeste nom logique -> nom fingerprinté (vide si le build n'a pas été lancé)"""
+    try:
+        with open(MANIFEST_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _accepted_encoding(filename):
+    """Meilleur encodage précompressé disponible accepté par le client"""
+    for encoding, suffix in ENCODED_SUFFIXES.items():
+        if encoding in request.accept_encodings and \
+                os.path.exists(os.path.join(STATIC_DIR, filename + suffix)):
+            return encoding
+    return None
+
+def init_assets(app):
+    """Branche le manifeste sur url_for('static') et sert les fichiers précompressés"""
+    manifest = load_manifest()
+    send_static_file = app.view_functions['static']
+
+    @app.url_defaults
+    def hashed_static_url(endpoint, values):
+        if endpoint == 'static' and values.get('filename') in manifest:
+            values['filename'] = manifest[values['filename']]
+
+    def static_view(filename):
+        if not filename.startswith(DIST_DIR + '/'):
+            return send_static_file(filename=filename)
+
+        encoding = _accepted_encoding(filename)
+        if encoding:
+            response = send_from_directory(
+                app.static_folder,
+                filename + ENCODED_SUFFIXES[encoding],
+                mimetype=mimetypes.guess_type(filename)[0],
+                max_age=IMMUTABLE_MAX_AGE
+            )
+            response.headers['Content-Encoding'] = encoding
+        else:
+            response = send_from_directory(app.static_folder, filename, max_age=IMMUTABLE_MAX_AGE)
+
+        response.cache_control.public = True
+        response.cache_control.immutable = True
+        response.vary.add('Accept-Encoding')
+        return response
+
+    app.view_functions['static'] = static_view
+
+    def asset_url(filename, fallback=None):
+        """URL d'un asset local s'il existe, sinon l'URL de secours (CDN)"""
+        if filename in manifest or os.path.exists(os.path.join(STATIC_DIR, filename)) or not fallback:
+            return url_for('static', filename=filename)
+        return fallback
+
+    def responsive_srcset(filename, fmt):
+        """Attribut srcset des variantes responsives d'une image ('' si non générées)"""
+        root = os.path.splitext(filename)[0]
+        return ', '.join(
+            f"{url_for('static', filename=f'{root}-{width}w.{fmt}')} {width}w"
+            for width in RESPONSIVE_IMAGES.get(filename, ())
+            if f'{root}-{width}w.{fmt}' in manifest
+        )
+
+    app.jinja_env.globals['asset_url'] = asset_url
+    app.jinja_env.globals['responsive_srcset'] = responsive_srcset
+
+    @app.cli.command('build-assets')
+    def build_assets_command():
+        """Minifie, fingerprinte et précompresse les assets statiques"""
+        build_assets()
+
+if __name__ == '__main__':
+    build_assets()
@@ -1,59 +1,258 @@
-from pymongo import MongoClient
+from pymongo import MongoClient, ReturnDocument, UpdateOne, monitoring
+from pymongo.errors import BulkWriteError, DuplicateKeyError, OperationFailure
 from datetime import datetime, timedelta  # Ajout de timedelta
+import logging
 import os
+import threading
+import time
 from bson import ObjectId
 import json
+from services.pagination import encode_cursor, keyset_filter, keyset_sort
+from services.pregnancy_progress import progress_fields
+from services.metrics import DB_OPERATION_SECONDS, instrument_methods
+from services.logs import sampled
+from services.query_profiler import query_profiler, track_methods
+
+logger = logging.getLogger(__name__)
+
+# Champs des listes d'historique : la réponse complète est chargée à la demande
+CONSULTATION_SUMMARY_FIELDS = {'question': 1, 'urgency': 1, 'date_consultation': 1, 'status': 1}
+
+# Utilisateurs ayant au moins un enfant (index partiel sur children.0)
+USERS_WITH_CHILDREN = {'children.0': {'$exists': True}}
+
+def overdue_vaccines_filter(now):
+    """Doses en retard à relancer : hors fenêtre de rappel, non relancées depuis une semaine
+
+    Partagé par get_overdue_vaccines et le conseiller d'index (services.index_advisor).
+    """
+    from services.vaccine_schedule import (
+        REMINDER_DAYS_AFTER, OVERDUE_REMINDER_INTERVAL_DAYS, OVERDUE_REMINDER_MAX_DAYS
+    )
+
+    cutoff = now - timedelta(days=REMINDER_DAYS_AFTER + 1)
+    return {
+        'status': 'pending',
+        'due_date': {
+            '$gt': cutoff - timedelta(days=OVERDUE_REMINDER_MAX_DAYS),
+            '$lte': cutoff
+        },
+        '$or': [
+            {'reminded_at': {'$exists': False}},
+            {'reminded_at': {'$lte': now - timedelta(days=OVERDUE_REMINDER_INTERVAL_DAYS)}}
+        ]
+    }
+
+# Durée de vie des clés d'idempotence des notifications (index TTL de notification_keys)
+NOTIFICATION_KEY_TTL_SECONDS = 2 * 24 * 3600
+
+def _env_int(name, default=None):
+    """Lit un entier depuis l'environnement (None si absent)"""
+    value = os.getenv(name)
+    return int(value) if value not in (None, '') else default
+
+class PoolStatsListener(monitoring.ConnectionPoolListener):
+    """Collecte les statistiques du pool de connexions MongoDB"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.open_connections = 0
+        self.checked_out = 0
+        self.checkouts = 0
+        self.checkout_failures = 0
+        self.wait_time_total_ms = 0.0
+        self.wait_time_max_ms = 0.0
+    
+    def _record_wait(self):
+        started = getattr(self._local, 'started', None)
+        self._local.started = None
+        return (time.perf_counter() - started) * 1000 if started else 0.0
+    
+    def pool_created(self, event):
+        pass
+    
+    def pool_ready(self, event):
+        pass
+    
+    def pool_cleared(self, event):
+        pass
+    
+    def pool_closed(self, event):
+        pass
+    
+    def connection_created(self, event):
+        with self._lock:
+            self.open_connections += 1
+    
+    def connection_ready(self, event):
+        pass
+    
+    def connection_closed(self, event):
+        with self._lock:
+            self.open_connections -= 1
+    
+    def connection_check_out_started(self, event):
+        self._local.started = time.perf_counter()
+    
+    def connection_check_out_failed(self, event):
+        wait_ms = self._record_wait()
+        with self._lock:
+            self.checkout_failures += 1
+            self.wait_time_total_ms += wait_ms
+    
+    def connection_checked_out(self, event):
+        wait_ms = self._record_wait()
+        with self._lock:
+            self.checked_out += 1
+            self.checkouts += 1
+            self.wait_time_total_ms += wait_ms
+            self.wait_time_max_ms = max(self.wait_time_max_ms, wait_ms)
+    
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.checked_out -= 1
+    
+    def snapshot(self):
+        """Copie cohérente des compteurs"""
+        with self._lock:
+            return {
+                'open_connections': self.open_connections,
+                'checked_out': self.checked_out,
+                'checkouts': self.checkouts,
+                'checkout_failures': self.checkout_failures,
+                'wait_time_avg_ms': round(self.wait_time_total_ms / self.checkouts, 3) if self.checkouts else 0.0,
+                'wait_time_max_ms': round(self.wait_time_max_ms, 3)
+            }
 
 class MongoDBManager:
     def __init__(self):
         self.uri = os.getenv('MONGODB_URI')
         self.client = None
-        self.db = None
-        self.connect()
+        self._db = None
+        self._connect_lock = threading.Lock()
+        self.pool_listener = PoolStatsListener()
+        
+        # Dimensionnement du pool (par processus worker)
+        self.pool_options = {
+            'maxPoolSize': _env_int('MONGODB_MAX_POOL_SIZE', 100),
+            'minPoolSize': _env_int('MONGODB_MIN_POOL_SIZE', 0),
+            'maxIdleTimeMS': _env_int('MONGODB_MAX_IDLE_TIME_MS'),
+            'waitQueueTimeoutMS': _env_int('MONGODB_WAIT_QUEUE_TIMEOUT_MS')
+        }
+        self.profiler_enabled = os.getenv('MONGODB_PROFILER', 'true').lower() == 'true'
+        self.connect_retries = _env_int('MONGODB_CONNECT_RETRIES', 3)
+        self.retry_delay = float(os.getenv('MONGODB_RETRY_DELAY', '1'))
+        # Transactions (replica set ou mongos) : détecté à la première utilisation
+        self.transactions_supported = None
+    
+    @property
+    def db(self):
+        """Base de données, connectée paresseusement au premier accès"""
+        if self._db is None:
+            self.connect()
+        return self._db
     
     def connect(self):
-        """Établit la connexion à MongoDB"""
+        """Établit la connexion à MongoDB (avec nouvelles tentatives)"""
+        with self._connect_lock:
+            if self._db is not None:
+                return
+            
+            options = {key: value for key, value in self.pool_options.items() if value is not None}
+            listeners = [self.pool_listener]
+            if self.profiler_enabled:
+                listeners.append(query_profiler)
+            last_error = None
+            
+            for attempt in range(1, self.connect_retries + 1):
+                try:
+                    client = MongoClient(
+                        self.uri,
+                        serverSelectionTimeoutMS=5000,
+                        event_listeners=listeners,
+                        **options
+                    )
+                    # Test de connexion
+                    client.admin.command('ping')
+                    self.client = client
+                    self._db = client.get_database()
+                    query_profiler.client = client
+                    logger.info("Connecté à MongoDB avec succès")
+                    return
+                except Exception as e:
+                    last_error = e
+                    logger.error("Erreur de connexion MongoDB (tentative %s/%s): %s", attempt, self.connect_retries, e)
+                    if attempt < self.connect_retries:
+                        time.sleep(self.retry_delay * 2 ** (attempt - 1))
+            
+            logger.warning("Vérifiez que MongoDB est démarré: mongod")
+            raise last_error
+    
+    def reset(self):
+        """Abandonne le client hérité du processus parent (à appeler après un fork)"""
+        # Un MongoClient n'est pas fork-safe : le processus enfant en recrée un au premier accès
+        self.client = None
+        self._db = None
+        self._connect_lock = threading.Lock()
+        self.pool_listener = PoolStatsListener()
+        self.transactions_supported = None
+        query_profiler.client = None
+        query_profiler.reset()
+    
+    def sibling(self, database_name):
+        """Gestionnaire partageant le client de celui-ci, sur une autre base (outils d'analyse)"""
+        manager = MongoDBManager()
+        manager.client = self.db.client
+        manager._db = manager.client[database_name]
+        return manager
+    
+    def _run_transaction(self, write, undo):
+        """Exécute write(session) dans une transaction
+        
+        Un mongod autonome n'accepte pas les transactions : write(None) est alors
+        exécuté sans session et undo() défait ce qui a été écrit en cas d'échec.
+        """
+        if self.transactions_supported is not False:
+            try:
+                with self.db.client.start_session() as session:
+                    session.with_transaction(write)
+                self.transactions_supported = True
+                return
+            except (NotImplementedError, OperationFailure) as e:
+                # 20 (IllegalOperation) : ni replica set, ni mongos
+                if isinstance(e, OperationFailure) and e.code != 20:
+                    raise
+                self.transactions_supported = False
+                logger.warning("Transactions MongoDB indisponibles, écritures séquentielles: %s", e)
+        
         try:
-            self.client = MongoClient(self.uri, serverSelectionTimeoutMS=5000)
-            # Test de connexion
-            self.client.admin.command('ping')
-            self.db = self.client.get_database()
-            print("✅ Connecté à MongoDB avec succès")
-            self.init_db()
-        except Exception as e:
-            print(f"❌ Erreur de connexion MongoDB: {e}")
-            print("💡 Vérifiez que MongoDB est démarré: mongod")
-            raise e
+            write(None)
+        except Exception:
+            undo()
+            raise
     
-    def init_db(self):
-        """Initialise les collections et indexes"""
+    def ping(self):
+        """Vérifie que la base répond (sonde de disponibilité)"""
         try:
-            # Collection utilisateurs
-            users_col = self.db['users']
-            users_col.create_index('email', unique=True, sparse=True)
-            users_col.create_index('phone', unique=True, sparse=True)
-            users_col.create_index([('email', 'text'), ('prenom', 'text'), ('nom', 'text')])
-            
-            # Collection consultations
-            consultations_col = self.db['consultations']
-            consultations_col.create_index('user_id')
-            consultations_col.create_index([('user_id', 1), ('date_consultation', -1)])
-            consultations_col.create_index('urgency')
-            
-            # Collection grossesses
-            pregnancies_col = self.db['pregnancies']
-            pregnancies_col.create_index('user_id', unique=True)
-            pregnancies_col.create_index('due_date')
-            
-            # Collection notifications
-            notifications_col = self.db['notifications']
-            notifications_col.create_index('user_id')
-            notifications_col.create_index([('user_id', 1), ('created_at', -1)])
-            notifications_col.create_index([('user_id', 1), ('read', 1)])
-            
-            print("✅ Base de données MongoDB initialisée")
+            self.db.command('ping')
+            return True
         except Exception as e:
-            print(f"⚠️ Erreur initialisation MongoDB: {e}")
+            logger.error("MongoDB indisponible: %s", e)
+            return False
+    
+    def pool_stats(self):
+        """Statistiques du pool de connexions de ce processus"""
+        stats = self.pool_listener.snapshot()
+        stats['max_pool_size'] = self.pool_options['maxPoolSize']
+        stats['min_pool_size'] = self.pool_options['minPoolSize']
+        stats['connected'] = self._db is not None
+        return stats
+    
+    def init_db(self):
+        """Initialise les collections et indexes (migrations versionnées)"""
+        from services.migrations import run_migrations
+        return run_migrations(self)
     
     # ============ MÉTHODES UTILISATEURS ============
     
@@ -63,22 +262,10 @@ class MongoDBManager:
             users_col = self.db['users']
             user = users_col.find_one({'email': email.lower().strip()})
             
-            if user:
-                user['_id'] = str(user['_id'])
-                # Conversion des dates pour JSON
-                for key in ['date_creation', 'date_modification', 'date_naissance']:
-                    if key in user and isinstance(user[key], datetime):
-                        user[key] = user[key].isoformat()
-                
-                # Conversion des dates des enfants
-                if 'children' in user:
-                    for child in user['children']:
-                        if 'birth_date' in child and isinstance(child['birth_date'], datetime):
-                            child['birth_date'] = child['birth_date'].isoformat()
-            
+            # ObjectId et dates sont convertis à l'encodage JSON (services.serialization)
             return user
         except Exception as e:
-            print(f"❌ Erreur recherche utilisateur par email: {e}")
+            logger.error("Erreur recherche utilisateur par email: %s", e)
             return None
     
     def get_user_by_id(self, user_id):
@@ -87,77 +274,124 @@ class MongoDBManager:
             users_col = self.db['users']
             user = users_col.find_one({'_id': ObjectId(user_id)})
             
-            if user:
-                user['_id'] = str(user['_id'])
-                # Conversion des dates pour JSON
-                for key in ['date_creation', 'date_modification', 'date_naissance']:
-                    if key in user and isinstance(user[key], datetime):
-                        user[key] = user[key].isoformat()
-                
-                # Conversion des dates des enfants
-                if 'children' in user:
-                    for child in user['children']:
-                        if 'birth_date' in child and isinstance(child['birth_date'], datetime):
-                            child['birth_date'] = child['birth_date'].isoformat()
-            
+            # ObjectId et dates sont convertis à l'encodage JSON (services.serialization)
             return user
         except Exception as e:
-            print(f"❌ Erreur recherche utilisateur: {e}")
+            logger.error("Erreur recherche utilisateur: %s", e)
             return None
     
+    def _prepare_user(self, user_data):
+        """Normalise un nouvel utilisateur (email, dates, valeurs par défaut)"""
+        if 'email' not in user_data:
+            raise ValueError("L'email est obligatoire")
+        
+        # Normaliser l'email
+        user_data['email'] = user_data['email'].lower().strip()
+        
+        # Préparation des données
+        user_data.setdefault('date_creation', datetime.utcnow())
+        user_data['date_modification'] = datetime.utcnow()
+        user_data.setdefault('role', 'user')
+        user_data.setdefault('is_active', True)
+        
+        # Conversion de la date de naissance si présente
+        if 'date_naissance' in user_data and isinstance(user_data['date_naissance'], str):
+            try:
+                user_data['date_naissance'] = datetime.fromisoformat(
+                    user_data['date_naissance'].replace('Z', '+00:00')
+                )
+            except:
+                pass  # Garder la string si conversion échoue
+        
+        # Conversion des enfants si présents
+        if 'children' in user_data:
+            self._assign_child_ids(user_data['children'])
+            for child in user_data['children']:
+                if 'birth_date' in child and isinstance(child['birth_date'], str):
+                    try:
+                        child['birth_date'] = datetime.fromisoformat(
+                            child['birth_date'].replace('Z', '+00:00')
+                        )
+                    except:
+                        pass
+        
+        return user_data
+    
+    def _duplicate_user_error(self, error):
+        """ValueError explicite pour une violation des index uniques de users"""
+        key_pattern = (error.details or {}).get('keyPattern') or {}
+        if 'phone' in key_pattern:
+            return ValueError("Un utilisateur avec ce numéro de téléphone existe déjà")
+        return ValueError("Un utilisateur avec cet email existe déjà")
+    
     def save_user(self, user_data):
         """Sauvegarde un nouvel utilisateur"""
         try:
             users_col = self.db['users']
             
-            # Validation des données requises
-            if 'email' not in user_data:
-                raise ValueError("L'email est obligatoire")
-            
-            # Vérifier si l'utilisateur existe déjà
-            existing_user = self.get_user_by_email(user_data['email'])
-            if existing_user:
-                raise ValueError("Un utilisateur avec cet email existe déjà")
+            # Validation et normalisation ; les doublons sont refusés par les index uniques
+            user_data = self._prepare_user(user_data)
             
-            # Normaliser l'email
-            user_data['email'] = user_data['email'].lower().strip()
+            result = users_col.insert_one(user_data)
+            user_id = str(result.inserted_id)
+            logger.info("Utilisateur sauvegardé: %s (%s)", user_data.get('prenom', 'Anonyme'), user_data['email'])
             
-            # Préparation des données
-            user_data.setdefault('date_creation', datetime.utcnow())
-            user_data['date_modification'] = datetime.utcnow()
-            user_data.setdefault('role', 'user')
-            user_data.setdefault('is_active', True)
+            if user_data.get('children'):
+                self.sync_vaccine_due(user_id, user_data['children'])
+            return user_id
+        except DuplicateKeyError as e:
+            raise self._duplicate_user_error(e)
+        except ValueError as e:
+            raise e  # Propager les erreurs de validation
+        except Exception as e:
+            logger.error("Erreur sauvegarde utilisateur: %s", e)
+            return None
+    
+    def register_user(self, user_data, pregnancy_data=None):
+        """Inscription : utilisateur, grossesse et échéances vaccinales écrits ensemble
+        
+        Une seule transaction (ou, sur un mongod autonome, des écritures séquentielles
+        annulées en cas d'échec) ; les doublons d'email ou de téléphone sont refusés
+        par les index uniques (ValueError), sans lecture préalable. Renvoie le
+        document utilisateur inséré, de quoi ouvrir la session sans le relire.
+        """
+        try:
+            from services.vaccine_tracker import build_vaccine_due_entries
             
-            # Conversion de la date de naissance si présente
-            if 'date_naissance' in user_data and isinstance(user_data['date_naissance'], str):
-                try:
-                    user_data['date_naissance'] = datetime.fromisoformat(
-                        user_data['date_naissance'].replace('Z', '+00:00')
-                    )
-                except:
-                    pass  # Garder la string si conversion échoue
+            user_doc = self._prepare_user(user_data)
+            user_doc['_id'] = ObjectId()
+            user_id = str(user_doc['_id'])
             
-            # Conversion des enfants si présents
-            if 'children' in user_data:
-                for child in user_data['children']:
-                    if 'birth_date' in child and isinstance(child['birth_date'], str):
-                        try:
-                            child['birth_date'] = datetime.fromisoformat(
-                                child['birth_date'].replace('Z', '+00:00')
-                            )
-                        except:
-                            pass
+            pregnancy_doc = None
+            if pregnancy_data:
+                pregnancy_doc = self._prepare_pregnancy(dict(pregnancy_data, user_id=user_id))
+            vaccine_due = build_vaccine_due_entries(user_id, user_doc.get('children'))
             
-            result = users_col.insert_one(user_data)
-            user_id = str(result.inserted_id)
-            print(f"👤 Utilisateur sauvegardé: {user_data.get('prenom', 'Anonyme')} ({user_data['email']})")
-            return user_id
+            def write(session=None):
+                try:
+                    self.db['users'].insert_one(user_doc, session=session)
+                except DuplicateKeyError as e:
+                    raise self._duplicate_user_error(e)
+                if pregnancy_doc:
+                    self.db['pregnancies'].insert_one(pregnancy_doc, session=session)
+                if vaccine_due:
+                    self.db['vaccine_due'].insert_many(vaccine_due, ordered=False, session=session)
+            
+            self._run_transaction(write, undo=lambda: self._delete_registration(user_id))
+            logger.info("Utilisateur inscrit: %s (%s)", user_doc.get('prenom', 'Anonyme'), user_doc['email'])
+            return user_doc
         except ValueError as e:
             raise e  # Propager les erreurs de validation
         except Exception as e:
-            print(f"❌ Erreur sauvegarde utilisateur: {e}")
+            logger.error("Erreur inscription utilisateur: %s", e)
             return None
     
+    def _delete_registration(self, user_id):
+        """Annule une inscription partiellement écrite (sans transaction)"""
+        self.db['vaccine_due'].delete_many({'user_id': user_id})
+        self.db['pregnancies'].delete_many({'user_id': user_id})
+        self.db['users'].delete_one({'_id': ObjectId(user_id)})
+    
     def update_user(self, user_id, update_data):
         """Met à jour un utilisateur"""
         try:
@@ -167,6 +401,7 @@ class MongoDBManager:
             update_data.pop('_id', None)
             update_data.pop('email', None)  # Ne pas permettre de changer l'email
             update_data.pop('date_creation', None)
+            update_data.pop('data_versions', None)  # Incrémenté par $inc uniquement
             
             # Mettre à jour la date de modification
             update_data['date_modification'] = datetime.utcnow()
@@ -180,17 +415,33 @@ class MongoDBManager:
                 except:
                     pass
             
+            # Conversion des dates de naissance des enfants si présents
+            if 'children' in update_data:
+                self._keep_vaccine_doses(user_id, update_data['children'])
+                self._assign_child_ids(update_data['children'])
+                for child in update_data['children']:
+                    if 'birth_date' in child and isinstance(child['birth_date'], str):
+                        try:
+                            child['birth_date'] = datetime.fromisoformat(
+                                child['birth_date'].replace('Z', '+00:00')
+                            )
+                        except:
+                            pass
+            
+            scopes = ['profile', 'children'] if 'children' in update_data else ['profile']
             result = users_col.update_one(
                 {'_id': ObjectId(user_id)},
-                {'$set': update_data}
+                {'$set': update_data, '$inc': self._version_increments(*scopes)}
             )
             
             success = result.modified_count > 0
             if success:
-                print(f"✅ Utilisateur {user_id} mis à jour")
+                logger.info("Utilisateur %s mis à jour", user_id, extra=sampled())
+                if 'children' in update_data:
+                    self.sync_vaccine_due(user_id, update_data['children'])
             return success
         except Exception as e:
-            print(f"❌ Erreur mise à jour utilisateur: {e}")
+            logger.error("Erreur mise à jour utilisateur: %s", e)
             return False
     
     def delete_user(self, user_id):
@@ -213,45 +464,49 @@ class MongoDBManager:
             # Supprimer les notifications associées
             notifications_col.delete_many({'user_id': user_id})
             
+            # Supprimer les échéances vaccinales associées
+            self.db['vaccine_due'].delete_many({'user_id': user_id})
+            
             success = user_result.deleted_count > 0
             if success:
-                print(f"🗑️ Utilisateur {user_id} supprimé")
+                logger.info("Utilisateur %s supprimé", user_id)
             return success
         except Exception as e:
-            print(f"❌ Erreur suppression utilisateur: {e}")
+            logger.error("Erreur suppression utilisateur: %s", e)
             return False
     
     def verify_user_credentials(self, email, password):
         """Vérifie les identifiants de connexion (support Bcrypt et SHA256)"""
         try:
-            from flask_bcrypt import Bcrypt
             from models.user import User
+            from services.passwords import password_hasher
             
-            bcrypt = Bcrypt()
             user_data = self.get_user_by_email(email)
             
             if not user_data:
                 return None
             
-            user = User(user_data)
-            password_hash = user.password_hash
-            
-            # Vérifier avec Bcrypt d'abord (si le hash commence par $2b$)
-            if password_hash and password_hash.startswith('$2b$'):
-                if bcrypt.check_password_hash(password_hash, password):
-                    return user_data
-            # Sinon vérifier avec l'ancienne méthode SHA256
-            elif user.check_password(password):
-                # Mettre à jour le hash vers Bcrypt pour la prochaine connexion
-                new_hash = bcrypt.generate_password_hash(password).decode('utf-8')
-                self.update_user(user.id, {'password_hash': new_hash})
+            # bcrypt dans le pool borné ; un ancien hash SHA256 est converti en différé
+            if password_hasher.verify_user(User(user_data), password):
                 return user_data
             
             return None
         except Exception as e:
-            print(f"❌ Erreur vérification credentials: {e}")
+            logger.error("Erreur vérification credentials: %s", e)
             return None
     
+    def upgrade_password_hash(self, user_id, old_hash, new_hash):
+        """Remplace un hash de mot de passe s'il n'a pas changé entre-temps (conversion différée)"""
+        try:
+            result = self.db['users'].update_one(
+                {'_id': ObjectId(user_id), 'password_hash': old_hash},
+                {'$set': {'password_hash': new_hash}, '$unset': {'password_salt': ''}}
+            )
+            return result.modified_count > 0
+        except Exception as e:
+            logger.error("Erreur conversion hash mot de passe: %s", e)
+            return False
+    
     def search_users(self, query, limit=10):
         """Recherche des utilisateurs par nom, prénom ou email"""
         try:
@@ -263,13 +518,9 @@ class MongoDBManager:
                 {'score': {'$meta': 'textScore'}}
             ).sort([('score', {'$meta': 'textScore'})]).limit(limit))
             
-            # Formatage des résultats
-            for user in results:
-                user['_id'] = str(user['_id'])
-                
             return results
         except Exception as e:
-            print(f"❌ Erreur recherche utilisateurs: {e}")
+            logger.error("Erreur recherche utilisateurs: %s", e)
             return []
     
     # ============ MÉTHODES CONSULTATIONS ============
@@ -289,10 +540,11 @@ class MongoDBManager:
             }
             
             result = consultations_col.insert_one(consultation_data)
-            print(f"💾 Consultation sauvegardée: {question[:50]}...")
+            self.bump_data_version(user_id, 'consultations')
+            logger.info("Consultation sauvegardée: %s...", question[:50], extra=sampled())
             return str(result.inserted_id)
         except Exception as e:
-            print(f"❌ Erreur sauvegarde consultation: {e}")
+            logger.error("Erreur sauvegarde consultation: %s", e)
             return None
     
     def get_user_consultations(self, user_id, limit=10):
@@ -300,20 +552,51 @@ class MongoDBManager:
         try:
             consultations_col = self.db['consultations']
             
-            consultations = list(consultations_col.find(
+            return list(consultations_col.find(
                 {'user_id': user_id}
-            ).sort('date_consultation', -1).limit(limit))
+            ).sort(keyset_sort('date_consultation')).limit(limit))
+        except Exception as e:
+            logger.error("Erreur récupération consultations: %s", e)
+            return []
+    
+    def get_consultations_page(self, user_id, limit=20, cursor=None, include_response=False):
+        """Page d'historique parcourue par curseur sur (date_consultation, _id)
+        
+        Retourne (consultations, next_cursor) ; next_cursor vaut None sur la dernière page.
+        Sans include_response, le texte long de la réponse n'est pas lu.
+        """
+        consultations_col = self.db['consultations']
+        
+        # Un curseur invalide lève ValueError (erreur client)
+        query = {'user_id': user_id}
+        query.update(keyset_filter('date_consultation', cursor))
+        projection = None if include_response else CONSULTATION_SUMMARY_FIELDS
+        
+        try:
+            consultations = list(consultations_col.find(query, projection)
+                                 .sort(keyset_sort('date_consultation'))
+                                 .limit(limit + 1))
             
-            # Conversion des ObjectId en string pour JSON
-            for consult in consultations:
-                consult['_id'] = str(consult['_id'])
-                if isinstance(consult.get('date_consultation'), datetime):
-                    consult['date_consultation'] = consult['date_consultation'].isoformat()
+            next_cursor = None
+            if len(consultations) > limit:
+                consultations = consultations[:limit]
+                last = consultations[-1]
+                next_cursor = encode_cursor(last['date_consultation'], last['_id'])
             
-            return consultations
+            return consultations, next_cursor
         except Exception as e:
-            print(f"❌ Erreur récupération consultations: {e}")
-            return []
+            logger.error("Erreur pagination consultations: %s", e)
+            return [], None
+    
+    def get_consultation(self, user_id, consultation_id):
+        """Récupère une consultation complète (avec la réponse) de l'utilisateur"""
+        try:
+            return self.db['consultations'].find_one(
+                {'_id': ObjectId(consultation_id), 'user_id': user_id}
+            )
+        except Exception as e:
+            logger.error("Erreur récupération consultation: %s", e)
+            return None
     
     def get_urgent_consultations(self, hours=24):
         """Récupère les consultations urgentes des dernières heures"""
@@ -322,74 +605,137 @@ class MongoDBManager:
             
             time_threshold = datetime.utcnow() - timedelta(hours=hours)  # Correction: utiliser timedelta
             
-            consultations = list(consultations_col.find({
+            return list(consultations_col.find({
                 'urgency': {'$in': ['high', 'medium']},
                 'date_consultation': {'$gte': time_threshold}
             }).sort('date_consultation', -1).limit(50))
-            
-            # Formatage des résultats
-            for consult in consultations:
-                consult['_id'] = str(consult['_id'])
-                if isinstance(consult.get('date_consultation'), datetime):
-                    consult['date_consultation'] = consult['date_consultation'].isoformat()
-            
-            return consultations
         except Exception as e:
-            print(f"❌ Erreur récupération consultations urgentes: {e}")
+            logger.error("Erreur récupération consultations urgentes: %s", e)
             return []
     
     # ============ MÉTHODES GROSSESSE ============
     
+    def _prepare_pregnancy(self, pregnancy_data):
+        """Convertit les dates et matérialise l'avancement d'une grossesse"""
+        # Conversion des dates
+        if 'start_date' in pregnancy_data and isinstance(pregnancy_data['start_date'], str):
+            pregnancy_data['start_date'] = datetime.fromisoformat(pregnancy_data['start_date'].replace('Z', '+00:00'))
+        
+        if 'due_date' in pregnancy_data and isinstance(pregnancy_data['due_date'], str):
+            pregnancy_data['due_date'] = datetime.fromisoformat(pregnancy_data['due_date'].replace('Z', '+00:00'))
+        
+        pregnancy_data['created_at'] = datetime.utcnow()
+        pregnancy_data['updated_at'] = datetime.utcnow()
+        
+        # Avancement matérialisé (semaine, trimestre, prochaine étape)
+        if isinstance(pregnancy_data.get('start_date'), datetime):
+            pregnancy_data.update(progress_fields(pregnancy_data['start_date']))
+            # Début réel de la semaine courante, et non l'heure de l'enregistrement :
+            # une inscription ou une modification sans changement de semaine ne doit pas
+            # déclencher le SMS hebdomadaire (send_weekly_pregnancy_updates)
+            pregnancy_data['week_changed_at'] = pregnancy_data['start_date'] + timedelta(
+                weeks=max(pregnancy_data['current_week'], 0)
+            )
+        
+        return pregnancy_data
+    
     def save_pregnancy(self, pregnancy_data):
-        """Sauvegarde les données de grossesse"""
+        """Sauvegarde les données de grossesse
+        
+        Un seul upsert atomique sur user_id, sous forme de pipeline pour comparer
+        avec le document enregistré : created_at n'est écrit qu'à la création, et
+        week_changed_at n'est remplacé que si la nouvelle start_date change la
+        semaine courante. Deux enregistrements concurrents ne créent pas de
+        doublon, l'index unique sur user_id fait rejouer l'upsert perdant en mise à jour.
+        """
         try:
             pregnancies_col = self.db['pregnancies']
             
-            # Conversion des dates
-            if 'start_date' in pregnancy_data and isinstance(pregnancy_data['start_date'], str):
-                pregnancy_data['start_date'] = datetime.fromisoformat(pregnancy_data['start_date'].replace('Z', '+00:00'))
+            pregnancy_data = self._prepare_pregnancy(pregnancy_data)
+            pregnancy_data.pop('_id', None)
+            created_at = pregnancy_data.pop('created_at')
+            week_changed_at = pregnancy_data.pop('week_changed_at', None)
+            
+            # $literal : une valeur saisie commençant par '$' n'est pas lue comme un champ
+            fields = {key: {'$literal': value} for key, value in pregnancy_data.items()}
+            fields['created_at'] = {'$ifNull': ['$created_at', {'$literal': created_at}]}
+            if week_changed_at is not None:
+                fields['week_changed_at'] = {'$cond': [
+                    {'$eq': ['$current_week', pregnancy_data['current_week']]},
+                    '$week_changed_at',
+                    {'$literal': week_changed_at}
+                ]}
+            
+            pregnancy = pregnancies_col.find_one_and_update(
+                {'user_id': pregnancy_data['user_id']},
+                [{'$set': fields}],
+                projection={'_id': 1},
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+            pregnancy_id = str(pregnancy['_id'])
+            logger.info("Grossesse sauvegardée: %s", pregnancy_id, extra=sampled())
             
-            if 'due_date' in pregnancy_data and isinstance(pregnancy_data['due_date'], str):
-                pregnancy_data['due_date'] = datetime.fromisoformat(pregnancy_data['due_date'].replace('Z', '+00:00'))
+            self.bump_data_version(pregnancy_data['user_id'], 'pregnancy')
+            return pregnancy_id
+        except Exception as e:
+            logger.error("Erreur sauvegarde grossesse: %s", e)
+            return None
+    
+    def refresh_pregnancy_progress(self, now=None):
+        """Avance la semaine des grossesses dont la semaine a changé (job quotidien)
+        
+        Seules les grossesses dont next_week_at est dépassé sont relues (index
+        next_week_at) ; les mises à jour partent en un seul bulk_write.
+        """
+        try:
+            pregnancies_col = self.db['pregnancies']
+            now = now or datetime.utcnow()
             
-            pregnancy_data['created_at'] = datetime.utcnow()
-            pregnancy_data['updated_at'] = datetime.utcnow()
+            due = pregnancies_col.find(
+                {'next_week_at': {'$lte': now}},
+                {'start_date': 1, 'user_id': 1}
+            )
             
-            # Vérifier si une grossesse existe déjà pour cet utilisateur
-            existing = pregnancies_col.find_one({'user_id': pregnancy_data['user_id']})
-            if existing:
-                result = pregnancies_col.update_one(
-                    {'_id': existing['_id']},
-                    {'$set': pregnancy_data}
+            updates = []
+            user_ids = []
+            for pregnancy in due:
+                fields = progress_fields(pregnancy['start_date'], now)
+                fields['week_changed_at'] = now
+                updates.append(UpdateOne({'_id': pregnancy['_id']}, {'$set': fields}))
+                user_ids.append(pregnancy['user_id'])
+            
+            if updates:
+                pregnancies_col.bulk_write(updates, ordered=False)
+                self.db['users'].update_many(
+                    {'_id': {'$in': [ObjectId(user_id) for user_id in user_ids]}},
+                    {'$inc': self._version_increments('pregnancy')}
                 )
-                pregnancy_id = str(existing['_id'])
-                print(f"🤰 Grossesse mise à jour: {pregnancy_id}")
-            else:
-                result = pregnancies_col.insert_one(pregnancy_data)
-                pregnancy_id = str(result.inserted_id)
-                print(f"🤰 Nouvelle grossesse sauvegardée: {pregnancy_id}")
             
-            return pregnancy_id
+            logger.info("Avancement mis à jour pour %s grossesse(s)", len(updates))
+            return len(updates)
         except Exception as e:
-            print(f"❌ Erreur sauvegarde grossesse: {e}")
-            return None
+            logger.error("Erreur mise à jour avancement grossesses: %s", e)
+            return 0
+    
+    def get_pregnancies_changed_week(self, since):
+        """Grossesses dont la semaine a changé depuis `since` (index week_changed_at)"""
+        try:
+            return list(self.db['pregnancies'].find(
+                {'week_changed_at': {'$gte': since}, 'current_week': {'$gt': 0}},
+                {'user_id': 1, 'current_week': 1, 'trimester': 1, 'next_milestone_week': 1, 'next_milestone': 1}
+            ))
+        except Exception as e:
+            logger.error("Erreur récupération grossesses: %s", e)
+            return []
     
     def get_user_pregnancy(self, user_id):
         """Récupère la grossesse en cours d'un utilisateur"""
         try:
             pregnancies_col = self.db['pregnancies']
-            pregnancy = pregnancies_col.find_one({'user_id': user_id})
-            
-            if pregnancy:
-                pregnancy['_id'] = str(pregnancy['_id'])
-                # Conversion des dates pour JSON
-                for key in ['start_date', 'due_date', 'created_at', 'updated_at']:
-                    if key in pregnancy and isinstance(pregnancy[key], datetime):
-                        pregnancy[key] = pregnancy[key].isoformat()
-            
-            return pregnancy
+            return pregnancies_col.find_one({'user_id': user_id})
         except Exception as e:
-            print(f"❌ Erreur récupération grossesse: {e}")
+            logger.error("Erreur récupération grossesse: %s", e)
             return None
     
     def delete_pregnancy(self, user_id):
@@ -397,15 +743,28 @@ class MongoDBManager:
         try:
             pregnancies_col = self.db['pregnancies']
             result = pregnancies_col.delete_one({'user_id': user_id})
+            if result.deleted_count > 0:
+                self.bump_data_version(user_id, 'pregnancy')
             return result.deleted_count > 0
         except Exception as e:
-            print(f"❌ Erreur suppression grossesse: {e}")
+            logger.error("Erreur suppression grossesse: %s", e)
             return False
     
     # ============ MÉTHODES ENFANTS ============
+    #
+    # Chaque enfant porte un child_id stable : les mises à jour ciblent l'élément
+    # par arrayFilters plutôt que par sa position, qui change dès qu'un enfant est
+    # retiré ou qu'une autre requête réécrit la liste.
+    
+    def _assign_child_ids(self, children):
+        """Attribue un child_id aux enfants qui n'en ont pas encore"""
+        for child in children or []:
+            if child is not None and not child.get('child_id'):
+                child['child_id'] = str(ObjectId())
+        return children
     
     def save_child_info(self, user_id, child_data):
-        """Ajoute un enfant au profil utilisateur"""
+        """Ajoute un enfant au profil utilisateur, renvoie son child_id"""
         try:
             users_col = self.db['users']
             
@@ -414,58 +773,271 @@ class MongoDBManager:
                 child_data['birth_date'] = datetime.fromisoformat(child_data['birth_date'].replace('Z', '+00:00'))
             
             child_data['created_at'] = datetime.utcnow()
+            self._assign_child_ids([child_data])
             
             result = users_col.update_one(
                 {'_id': ObjectId(user_id)},
-                {'$push': {'children': child_data}}
+                {'$push': {'children': child_data}, '$inc': self._version_increments('children')}
             )
             
-            return result.modified_count > 0
+            if result.modified_count == 0:
+                return None
+            self.sync_child_vaccine_due(user_id, child_data, replace=False)
+            return child_data['child_id']
         except Exception as e:
-            print(f"❌ Erreur sauvegarde enfant: {e}")
-            return False
+            logger.error("Erreur sauvegarde enfant: %s", e)
+            return None
     
-    def update_child_info(self, user_id, child_index, child_data):
-        """Met à jour les informations d'un enfant"""
+    def update_child_info(self, user_id, child_id, child_data):
+        """Met à jour les informations d'un enfant (une seule écriture ciblée par child_id)"""
         try:
             users_col = self.db['users']
             
-            # Construction du chemin pour la mise à jour
-            update_path = f'children.{child_index}'
-            update_query = {f'{update_path}.{key}': value for key, value in child_data.items()}
+            child_data = {key: value for key, value in child_data.items() if key != 'child_id'}
+            if 'birth_date' in child_data and isinstance(child_data['birth_date'], str):
+                child_data['birth_date'] = datetime.fromisoformat(child_data['birth_date'].replace('Z', '+00:00'))
+            
+            # L'enfant modifié est renvoyé par la même opération pour recalculer ses échéances
+            user = users_col.find_one_and_update(
+                {'_id': ObjectId(user_id), 'children.child_id': child_id},
+                {'$set': {f'children.$[child].{key}': value for key, value in child_data.items()},
+                 '$inc': self._version_increments('children')},
+                array_filters=[{'child.child_id': child_id}],
+                projection={'children': {'$elemMatch': {'child_id': child_id}}},
+                return_document=ReturnDocument.AFTER
+            )
+            
+            if not user:
+                return False
+            if 'birth_date' in child_data or 'name' in child_data:
+                self.sync_child_vaccine_due(user_id, user['children'][0])
+            return True
+        except Exception as e:
+            logger.error("Erreur mise à jour enfant: %s", e)
+            return False
+    
+    def delete_child(self, user_id, child_id):
+        """Supprime un enfant du profil utilisateur (un seul $pull par child_id)"""
+        try:
+            users_col = self.db['users']
             
             result = users_col.update_one(
-                {'_id': ObjectId(user_id)},
-                {'$set': update_query}
+                {'_id': ObjectId(user_id), 'children.child_id': child_id},
+                {'$pull': {'children': {'child_id': child_id}}, '$inc': self._version_increments('children')}
             )
             
-            return result.modified_count > 0
+            if result.modified_count == 0:
+                return False
+            self.db['vaccine_due'].delete_many({'user_id': user_id, 'child_id': child_id})
+            return True
         except Exception as e:
-            print(f"❌ Erreur mise à jour enfant: {e}")
+            logger.error("Erreur suppression enfant: %s", e)
             return False
     
-    def delete_child(self, user_id, child_index):
-        """Supprime un enfant du profil utilisateur"""
+    # ============ MÉTHODES ÉCHÉANCES VACCINALES ============
+    
+    def sync_vaccine_due(self, user_id, children=None):
+        """Recalcule les échéances vaccinales matérialisées des enfants d'un utilisateur"""
+        try:
+            from services.vaccine_tracker import build_vaccine_due_entries
+            
+            vaccine_due_col = self.db['vaccine_due']
+            
+            if children is None:
+                user = self.db['users'].find_one({'_id': ObjectId(user_id)}, {'children': 1})
+                children = user.get('children', []) if user else []
+            
+            vaccine_due_col.delete_many({'user_id': user_id})
+            entries = build_vaccine_due_entries(user_id, children)
+            if entries:
+                vaccine_due_col.insert_many(entries, ordered=False)
+            
+            return len(entries)
+        except Exception as e:
+            logger.error("Erreur synchronisation échéances vaccinales: %s", e)
+            return 0
+    
+    def sync_child_vaccine_due(self, user_id, child, replace=True):
+        """Recalcule les échéances vaccinales d'un seul enfant (par child_id)"""
+        try:
+            from services.vaccine_tracker import build_vaccine_due_entries
+            
+            vaccine_due_col = self.db['vaccine_due']
+            
+            if replace:
+                vaccine_due_col.delete_many({'user_id': user_id, 'child_id': child['child_id']})
+            entries = build_vaccine_due_entries(user_id, [child])
+            if entries:
+                vaccine_due_col.insert_many(entries, ordered=False)
+            
+            return len(entries)
+        except Exception as e:
+            logger.error("Erreur synchronisation échéances vaccinales: %s", e)
+            return 0
+    
+    def rebuild_vaccine_due(self):
+        """Reconstruit les échéances vaccinales de tous les utilisateurs avec enfants"""
+        try:
+            users = self.db['users'].find(
+                USERS_WITH_CHILDREN,
+                {'children': 1}
+            )
+            
+            total = 0
+            for user in users:
+                total += self.sync_vaccine_due(str(user['_id']), user.get('children', []))
+            
+            logger.info("%s échéances vaccinales reconstruites", total)
+            return total
+        except Exception as e:
+            logger.error("Erreur reconstruction échéances vaccinales: %s", e)
+            return 0
+    
+    def _keep_vaccine_doses(self, user_id, children):
+        """Reporte doses et child_id quand la liste des enfants est remplacée
+        
+        Un enfant sans child_id est rapproché par son nom de l'enfant déjà enregistré.
+        """
+        user = self.db['users'].find_one({'_id': ObjectId(user_id)}, {'children': 1})
+        previous = [child for child in (user or {}).get('children', []) if child]
+        by_id = {child['child_id']: child for child in previous if child.get('child_id')}
+        by_name = {child.get('name'): child for child in previous}
+        
+        for child in children:
+            known = by_id.get(child['child_id']) if child.get('child_id') else by_name.get(child.get('name'))
+            if not known:
+                continue
+            if known.get('child_id'):
+                child.setdefault('child_id', known['child_id'])
+            if 'vaccines_done' not in child and known.get('vaccines_done'):
+                child['vaccines_done'] = known['vaccines_done']
+    
+    def record_vaccine_dose(self, user_id, child_id, milestone, administered_at=None):
+        """Enregistre une dose administrée pour un enfant"""
         try:
             users_col = self.db['users']
+            vaccine_due_col = self.db['vaccine_due']
+            
+            administered_at = administered_at or datetime.utcnow()
             
             result = users_col.update_one(
-                {'_id': ObjectId(user_id)},
-                {'$unset': {f'children.{child_index}': ''}}
+                {'_id': ObjectId(user_id), 'children.child_id': child_id},
+                {'$set': {f'children.$[child].vaccines_done.{milestone}': administered_at},
+                 '$inc': self._version_increments('children')},
+                array_filters=[{'child.child_id': child_id}]
             )
             
-            # Ensuite, supprimer les valeurs null
-            if result.modified_count > 0:
-                users_col.update_one(
-                    {'_id': ObjectId(user_id)},
-                    {'$pull': {'children': None}}
-                )
+            if result.matched_count == 0:
+                return False
             
-            return result.modified_count > 0
+            vaccine_due_col.update_one(
+                {'user_id': user_id, 'child_id': child_id, 'milestone': milestone},
+                {'$set': {'status': 'completed', 'administered_at': administered_at}}
+            )
+            
+            logger.info("Dose enregistrée: %s (enfant %s)", milestone, child_id, extra=sampled())
+            return True
         except Exception as e:
-            print(f"❌ Erreur suppression enfant: {e}")
+            logger.error("Erreur enregistrement dose: %s", e)
             return False
     
+    def get_overdue_vaccines(self, now=None):
+        """Doses en retard non relancées récemment (parcours de l'index status/due_date)"""
+        try:
+            vaccine_due_col = self.db['vaccine_due']
+            
+            now = now or datetime.utcnow()
+            return list(vaccine_due_col.find(overdue_vaccines_filter(now)).sort('due_date', 1))
+        except Exception as e:
+            logger.error("Erreur récupération vaccins en retard: %s", e)
+            return []
+    
+    def mark_vaccine_reminded(self, entry_ids, reminded_at=None):
+        """Horodate la dernière relance des échéances données"""
+        try:
+            if not entry_ids:
+                return 0
+            
+            result = self.db['vaccine_due'].update_many(
+                {'_id': {'$in': list(entry_ids)}},
+                {'$set': {'reminded_at': reminded_at or datetime.utcnow()}}
+            )
+            return result.modified_count
+        except Exception as e:
+            logger.error("Erreur horodatage relances vaccins: %s", e)
+            return 0
+    
+    def get_vaccine_due(self, user_id=None, start=None, end=None, status=None):
+        """Récupère les échéances vaccinales dans l'intervalle ]start, end]"""
+        try:
+            vaccine_due_col = self.db['vaccine_due']
+            
+            query = {}
+            if user_id:
+                query['user_id'] = user_id
+            if status:
+                query['status'] = status
+            
+            due_range = {}
+            if start:
+                due_range['$gt'] = start
+            if end:
+                due_range['$lte'] = end
+            if due_range:
+                query['due_date'] = due_range
+            
+            return list(vaccine_due_col.find(query, {'_id': 0}).sort('due_date', 1))
+        except Exception as e:
+            logger.error("Erreur récupération échéances vaccinales: %s", e)
+            return []
+    
+    def get_children_birth_dates(self):
+        """Récupère les dates de naissance de tous les enfants (une ligne par enfant)"""
+        try:
+            users_col = self.db['users']
+            
+            pipeline = [
+                {'$match': dict(USERS_WITH_CHILDREN, **{'children.birth_date': {'$exists': True}})},
+                {'$unwind': '$children'},
+                {'$project': {'_id': 0, 'birth_date': '$children.birth_date'}}
+            ]
+            
+            return [doc.get('birth_date') for doc in users_col.aggregate(pipeline)]
+        except Exception as e:
+            logger.error("Erreur récupération dates de naissance: %s", e)
+            return []
+    
+    def get_user_phones(self, user_ids):
+        """Retourne un dictionnaire user_id -> téléphone en une seule requête"""
+        try:
+            users_col = self.db['users']
+            
+            object_ids = [ObjectId(user_id) for user_id in user_ids]
+            if not object_ids:
+                return {}
+            
+            users = users_col.find({'_id': {'$in': object_ids}}, {'phone': 1})
+            return {str(user['_id']): user.get('phone') for user in users}
+        except Exception as e:
+            logger.error("Erreur récupération téléphones: %s", e)
+            return {}
+    
+    # ============ VERSIONS DES DONNÉES ============
+    
+    def _version_increments(self, *scopes):
+        """Opérateur $inc des compteurs users.data_versions (ETag des routes JSON)"""
+        return {f'data_versions.{scope}': 1 for scope in scopes}
+    
+    def bump_data_version(self, user_id, *scopes):
+        """Signale une modification des données d'un utilisateur hors du document users"""
+        try:
+            self.db['users'].update_one(
+                {'_id': ObjectId(user_id)},
+                {'$inc': self._version_increments(*scopes)}
+            )
+        except Exception as e:
+            logger.error("Erreur version des données: %s", e)
+    
     # ============ MÉTHODES STATISTIQUES ============
     
     def get_user_stats(self, user_id):
@@ -493,7 +1065,7 @@ class MongoDBManager:
             
             return stats
         except Exception as e:
-            print(f"❌ Erreur récupération statistiques: {e}")
+            logger.error("Erreur récupération statistiques: %s", e)
             return None
     
     def get_system_stats(self):
@@ -513,45 +1085,56 @@ class MongoDBManager:
                 'active_pregnancies': pregnancies_col.count_documents({
                     'due_date': {'$gte': datetime.utcnow()}
                 }),
-                'users_with_children': users_col.count_documents({
-                    'children': {'$exists': True, '$ne': []}
-                })
+                'users_with_children': users_col.count_documents(USERS_WITH_CHILDREN)
             }
             
             return stats
         except Exception as e:
-            print(f"❌ Erreur récupération statistiques système: {e}")
+            logger.error("Erreur récupération statistiques système: %s", e)
             return None
 
     # ============ MÉTHODES NOTIFICATIONS (CORRIGÉES) ============
+    #
+    # Le nombre de notifications non lues est dénormalisé dans
+    # users.unread_notifications : chaque passage non lu -> lu (ou nouvelle
+    # notification non lue) l'ajuste par $inc, dans la même écriture que la version
+    # du cache. Le badge se lit donc sur l'utilisateur déjà chargé, sans comptage.
     
-    def get_user_notifications(self, user_id, unread_only=False, limit=50):
-        """Récupère les notifications d'un utilisateur"""
+    def get_user_notifications(self, user_id, unread_only=False, limit=20, cursor=None):
+        """Page de notifications parcourue par curseur sur (created_at, _id)
+        
+        Retourne (notifications, next_cursor) ; next_cursor vaut None sur la dernière page.
+        """
+        notifications_col = self.db['notifications']
+        
+        # Un curseur invalide lève ValueError (erreur client)
+        query = {'user_id': user_id}
+        if unread_only:
+            query['read'] = False
+        query.update(keyset_filter('created_at', cursor))
+        
         try:
-            notifications_col = self.db['notifications']
+            notifications = list(notifications_col.find(query)
+                                 .sort(keyset_sort('created_at'))
+                                 .limit(limit + 1))
             
-            query = {'user_id': user_id}
-            if unread_only:
-                query['read'] = False
-            
-            notifications = notifications_col.find(query)\
-                .sort('created_at', -1)\
-                .limit(limit)
-            
-            # Convertir les résultats
-            result = []
-            for notification in notifications:
-                notification['_id'] = str(notification['_id'])
-                if isinstance(notification.get('created_at'), datetime):
-                    notification['created_at'] = notification['created_at'].isoformat()
-                if isinstance(notification.get('read_at'), datetime):
-                    notification['read_at'] = notification['read_at'].isoformat()
-                result.append(notification)
+            next_cursor = None
+            if len(notifications) > limit:
+                notifications = notifications[:limit]
+                last = notifications[-1]
+                next_cursor = encode_cursor(last['created_at'], last['_id'])
             
-            return result
+            return notifications, next_cursor
         except Exception as e:
-            print(f"❌ Erreur récupération notifications: {e}")
-            return []
+            logger.error("Erreur récupération notifications: %s", e)
+            return [], None
+    
+    def _adjust_unread_notifications(self, user_id, delta):
+        """Ajuste le compteur de non lues et la version 'notifications' en une écriture"""
+        increments = self._version_increments('notifications')
+        if delta:
+            increments['unread_notifications'] = delta
+        self.db['users'].update_one({'_id': ObjectId(user_id)}, {'$inc': increments})
     
     def get_new_notifications(self, user_id, since_timestamp):
         """Récupère les nouvelles notifications depuis un timestamp"""
@@ -575,25 +1158,15 @@ class MongoDBManager:
                         )
                         query['created_at'] = {'$gt': since_datetime}
                     except ValueError:
-                        print(f"⚠️ Format de timestamp invalide: {since_timestamp}")
+                        logger.warning("Format de timestamp invalide: %s", since_timestamp)
                         # Si conversion échoue, récupérer les 24 dernières heures
                         query['created_at'] = {'$gt': datetime.utcnow() - timedelta(hours=24)}
         
-            notifications = notifications_col.find(query)\
-                .sort('created_at', -1)\
-                .limit(10)
-            
-            # Convertir les résultats
-            result = []
-            for notification in notifications:
-                notification['_id'] = str(notification['_id'])
-                if isinstance(notification.get('created_at'), datetime):
-                    notification['created_at'] = notification['created_at'].isoformat()
-                result.append(notification)
-            
-            return result
+            return list(notifications_col.find(query)
+                        .sort('created_at', -1)
+                        .limit(10))
         except Exception as e:
-            print(f"❌ Erreur récupération nouvelles notifications: {e}")
+            logger.error("Erreur récupération nouvelles notifications: %s", e)
             return []
     
     def save_notification(self, notification_data):
@@ -601,16 +1174,21 @@ class MongoDBManager:
         try:
             notifications_col = self.db['notifications']
             
-            # S'assurer que created_at est présent
+            # S'assurer que created_at et read sont présents
             if 'created_at' not in notification_data:
                 notification_data['created_at'] = datetime.utcnow()
+            notification_data.setdefault('read', False)
             
             result = notifications_col.insert_one(notification_data)
             notification_id = str(result.inserted_id)
-            print(f"📱 Notification sauvegardée: {notification_id}")
+            if notification_data.get('user_id'):
+                self._adjust_unread_notifications(
+                    notification_data['user_id'], 0 if notification_data['read'] else 1
+                )
+            logger.info("Notification sauvegardée: %s", notification_id, extra=sampled())
             return notification_id
         except Exception as e:
-            print(f"❌ Erreur sauvegarde notification: {e}")
+            logger.error("Erreur sauvegarde notification: %s", e)
             return None
     
     def mark_notification_as_read(self, notification_id, user_id):
@@ -618,17 +1196,19 @@ class MongoDBManager:
         try:
             notifications_col = self.db['notifications']
             
+            # Filtre sur read: False : une notification n'est décomptée qu'une fois
             result = notifications_col.update_one(
-                {'_id': ObjectId(notification_id), 'user_id': user_id},
+                {'_id': ObjectId(notification_id), 'user_id': user_id, 'read': False},
                 {'$set': {'read': True, 'read_at': datetime.utcnow()}}
             )
             
             success = result.modified_count > 0
             if success:
-                print(f"✅ Notification {notification_id} marquée comme lue")
+                self._adjust_unread_notifications(user_id, -1)
+                logger.info("Notification %s marquée comme lue", notification_id, extra=sampled())
             return success
         except Exception as e:
-            print(f"❌ Erreur marquage notification: {e}")
+            logger.error("Erreur marquage notification: %s", e)
             return False
     
     def mark_all_notifications_as_read(self, user_id):
@@ -643,12 +1223,37 @@ class MongoDBManager:
             
             success = result.modified_count > 0
             if success:
-                print(f"✅ Toutes les notifications marquées comme lues pour l'utilisateur {user_id}")
+                self._adjust_unread_notifications(user_id, -result.modified_count)
+                logger.info("Toutes les notifications marquées comme lues pour l'utilisateur %s", user_id, extra=sampled())
             return success
         except Exception as e:
-            print(f"❌ Erreur marquage toutes notifications: {e}")
+            logger.error("Erreur marquage toutes notifications: %s", e)
             return False
     
+    def recount_unread_notifications(self):
+        """Recalcule users.unread_notifications depuis la collection notifications"""
+        try:
+            users_col = self.db['users']
+            
+            counts = self.db['notifications'].aggregate([
+                {'$match': {'read': False}},
+                {'$group': {'_id': '$user_id', 'unread': {'$sum': 1}}}
+            ])
+            
+            users_col.update_many({}, {'$set': {'unread_notifications': 0}})
+            updates = [
+                UpdateOne({'_id': ObjectId(count['_id'])}, {'$set': {'unread_notifications': count['unread']}})
+                for count in counts if ObjectId.is_valid(count['_id'])
+            ]
+            for start in range(0, len(updates), 1000):
+                users_col.bulk_write(updates[start:start + 1000], ordered=False)
+            
+            logger.info("Compteurs de notifications non lues recalculés pour %s utilisateurs", len(updates))
+            return len(updates)
+        except Exception as e:
+            logger.error("Erreur recalcul notifications non lues: %s", e)
+            return 0
+    
     def update_notification_settings(self, user_id, notification_type, enabled):
         """Met à jour les paramètres de notifications"""
         try:
@@ -656,17 +1261,45 @@ class MongoDBManager:
             
             result = users_col.update_one(
                 {'_id': ObjectId(user_id)},
-                {'$set': {f'notification_settings.{notification_type}': enabled}}
+                {'$set': {f'notification_settings.{notification_type}': enabled},
+                 '$inc': self._version_increments('profile')}
             )
             
             success = result.modified_count > 0
             if success:
-                print(f"✅ Paramètres notifications mis à jour: {notification_type} = {enabled}")
+                logger.info("Paramètres notifications mis à jour: %s = %s", notification_type, enabled, extra=sampled())
             return success
         except Exception as e:
-            print(f"❌ Erreur mise à jour paramètres: {e}")
+            logger.error("Erreur mise à jour paramètres: %s", e)
             return False
     
+    # ============ DÉDUPLICATION DES NOTIFICATIONS ============
+    
+    def claim_notification_keys(self, keys, now=None):
+        """Réserve des clés d'idempotence ; retourne celles qui n'avaient pas encore été prises
+        
+        Une clé (utilisateur, type, sujet, jour) est le _id d'un document de
+        notification_keys : l'insertion échoue en doublon si un autre job l'a déjà
+        envoyée. Les documents expirent via l'index TTL sur created_at.
+        """
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return set()
+        
+        now = now or datetime.utcnow()
+        try:
+            self.db['notification_keys'].insert_many(
+                [{'_id': key, 'created_at': now} for key in keys],
+                ordered=False
+            )
+            return set(keys)
+        except BulkWriteError as e:
+            rejected = {error['op']['_id'] for error in e.details.get('writeErrors', [])}
+            return set(keys) - rejected
+        except Exception as e:
+            logger.error("Erreur réservation clés de notification: %s", e)
+            return set()
+    
     def get_active_pregnancies(self):
         """Récupère toutes les grossesses actives"""
         try:
@@ -688,7 +1321,7 @@ class MongoDBManager:
             
             return result
         except Exception as e:
-            print(f"❌ Erreur récupération grossesses actives: {e}")
+            logger.error("Erreur récupération grossesses actives: %s", e)
             return []
     
     def get_users_with_children(self):
@@ -696,9 +1329,7 @@ class MongoDBManager:
         try:
             users_col = self.db['users']
             
-            users = users_col.find({
-                'children': {'$exists': True, '$ne': []}
-            })
+            users = users_col.find(USERS_WITH_CHILDREN)
             
             # Convertir les résultats
             result = []
@@ -708,59 +1339,43 @@ class MongoDBManager:
             
             return result
         except Exception as e:
-            print(f"❌ Erreur récupération utilisateurs avec enfants: {e}")
+            logger.error("Erreur récupération utilisateurs avec enfants: %s", e)
             return []
     
     def get_notification_stats(self, user_id):
-        """Retourne les statistiques des notifications"""
+        """Retourne les statistiques des notifications (un seul $group par type)"""
         try:
             notifications_col = self.db['notifications']
             
-            total = notifications_col.count_documents({'user_id': user_id})
-            unread = notifications_col.count_documents({'user_id': user_id, 'read': False})
-            
-            # Notifications des dernières 24 heures
-            last_24h = notifications_col.count_documents({
-                'user_id': user_id,
-                'created_at': {'$gte': datetime.utcnow() - timedelta(hours=24)}
-            })
-            
-            # Statistiques par type
-            by_type = {}
-            notification_types = notifications_col.distinct('type', {'user_id': user_id})
-            
-            for n_type in notification_types:
-                total_type = notifications_col.count_documents({
-                    'user_id': user_id,
-                    'type': n_type
-                })
-                unread_type = notifications_col.count_documents({
-                    'user_id': user_id,
-                    'type': n_type,
-                    'read': False
-                })
-                by_type[n_type] = {'total': total_type, 'unread': unread_type}
-            
-            stats = {
-                'total': total,
-                'unread': unread,
-                'last_24h': last_24h,
-                'by_type': by_type
-            }
+            since = datetime.utcnow() - timedelta(hours=24)
+            groups = notifications_col.aggregate([
+                {'$match': {'user_id': user_id}},
+                {'$group': {
+                    '_id': '$type',
+                    'total': {'$sum': 1},
+                    'unread': {'$sum': {'$cond': [{'$eq': ['$read', False]}, 1, 0]}},
+                    'last_24h': {'$sum': {'$cond': [{'$gte': ['$created_at', since]}, 1, 0]}}
+                }}
+            ])
+            
+            stats = {'total': 0, 'unread': 0, 'last_24h': 0, 'by_type': {}}
+            for group in groups:
+                for key in ('total', 'unread', 'last_24h'):
+                    stats[key] += group[key]
+                stats['by_type'][group['_id'] or 'info'] = {'total': group['total'], 'unread': group['unread']}
             
             return stats
         except Exception as e:
-            print(f"❌ Erreur récupération statistiques notifications: {e}")
+            logger.error("Erreur récupération statistiques notifications: %s", e)
             return None
 
-# Instance globale de la base de données
-try:
-    db_manager = MongoDBManager()
-    print("🚀 MongoDBManager initialisé avec succès")
-except Exception as e:
-    print(f"💥 Échec critique de MongoDB: {e}")
-    print("❌ L'application ne peut pas démarrer sans base de données")
-    exit(1)
+# Durée de chaque méthode publique exposée sur /metrics (db_operation_duration_seconds)
+instrument_methods(MongoDBManager, DB_OPERATION_SECONDS, exclude=('reset', 'pool_stats'))
+# Commandes MongoDB rattachées à la méthode appelante dans le profileur de requêtes
+track_methods(MongoDBManager, exclude=('reset', 'pool_stats'))
+
+# Instance globale de la base de données (connexion établie au premier accès)
+db_manager = MongoDBManager()
 
 # Fonctions d'interface pour Flask
 def init_db():
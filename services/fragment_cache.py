@@ -0,0 +1,110 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from flask_login import current_user
+from jinja2 import nodes
+from jinja2.ext import Extension
+
+# ============ CACHE DE FRAGMENTS ============
+#
+# Les blocs coûteux des templates sont rendus une fois par version des données :
+#
+#   {% cache 'dashboard-consultations', current_user.id, data_version('consultations') %}
+#       ...
+#   {% endcache %}
+#
+# La clé combine le nom du fragment et les valeurs qui le font changer ; une
+# écriture en base incrémente users.data_versions et rend la clé précédente
+# inatteignable, les anciennes entrées sortent du cache LRU.
+
+FRAGMENT_CACHE_SIZE = int(os.getenv('FRAGMENT_CACHE_SIZE', 2000))
+FRAGMENT_CACHE_TTL = int(os.getenv('FRAGMENT_CACHE_TTL', 3600))
+
+class FragmentCache:
+    """Cache LRU en mémoire (par processus) des fragments HTML rendus"""
+
+    def __init__(self, max_entries=FRAGMENT_CACHE_SIZE, ttl=FRAGMENT_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value):
+        with self.lock:
+            self.entries[key] = (time.monotonic() + self.ttl, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self):
+        with self.lock:
+            return {
+                'entries': len(self.entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses
+            }
+
+fragment_cache = FragmentCache()
+
+def fragment_key(name, parts):
+    """Clé de cache d'un fragment"""
+    digest = hashlib.sha1(repr(parts).encode('utf-8')).hexdigest()
+    return f"{name}:{digest}"
+
+class FragmentCacheExtension(Extension):
+    """Balise Jinja {% cache nom, valeurs... %} ... {% endcache %}"""
+    tags = {'cache'}
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+
+        args = [parser.parse_expression()]
+        while parser.stream.skip_if('comma'):
+            args.append(parser.parse_expression())
+
+        body = parser.parse_statements(['name:endcache'], drop_needle=True)
+        return nodes.CallBlock(
+            self.call_method('_render_fragment', [args[0], nodes.List(args[1:])]),
+            [], [], body
+        ).set_lineno(lineno)
+
+    def _render_fragment(self, name, parts, caller):
+        key = fragment_key(name, parts)
+        rendered = fragment_cache.get(key)
+        if rendered is None:
+            rendered = caller()
+            fragment_cache.set(key, rendered)
+        return rendered
+
+def data_version(*scopes, daily=False):
+    """Versions des données de l'utilisateur connecté, pour les clés de fragments"""
+    versions = getattr(current_user, 'data_versions', None) or {}
+    key = tuple(versions.get(scope, 0) for scope in scopes)
+    if daily:
+        key += (datetime.utcnow().date().isoformat(),)
+    return key
+
+def init_fragment_cache(app):
+    """Active la balise {% cache %} dans les templates de l'application"""
+    app.jinja_env.add_extension(FragmentCacheExtension)
+    app.jinja_env.globals['data_version'] = data_version
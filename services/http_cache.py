@@ -0,0 +1,116 @@
+import gzip
+import hashlib
+from datetime import datetime
+from functools import wraps
+from flask import current_app, make_response, request
+from flask_login import current_user
+
+try:
+    import brotli
+except ImportError:  # Compression brotli optionnelle
+    brotli = None
+
+# Réponses dynamiques compressées à la volée (les assets de static/dist sont précompressés)
+COMPRESSIBLE_MIMETYPES = {
+    'application/json', 'text/html', 'text/plain', 'text/css',
+    'application/javascript', 'text/javascript', 'image/svg+xml'
+}
+# En dessous, l'en-tête de compression coûte plus qu'il ne rapporte
+MIN_COMPRESS_SIZE = 500
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+# ============ ETAG ============
+
+def data_etag(*parts):
+    """ETag fort calculé à partir des versions des données, sans sérialiser la réponse"""
+    return hashlib.sha1(repr(parts).encode('utf-8')).hexdigest()[:20]
+
+def _matching_etag(etag):
+    """Variante de l'ETag (compressée ou non) déjà détenue par le client, sinon None"""
+    for candidate in (etag, f'{etag}-br', f'{etag}-gzip'):
+        if request.if_none_match.contains(candidate):
+            return candidate
+    return None
+
+def conditional(*scopes, daily=False):
+    """Décorateur de GET conditionnel pour les routes JSON de l'utilisateur connecté
+
+    L'ETag dépend de l'URL, de l'utilisateur et des versions des données lues
+    (`scopes`). Avec daily=True, il change aussi chaque jour (semaine de grossesse,
+    jours restants avant un vaccin). Si le client a déjà cette version, la route
+    n'est pas exécutée et la réponse est un 304 sans corps.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            versions = getattr(current_user, 'data_versions', None) or {}
+            etag = data_etag(
+                request.full_path,
+                current_user.get_id(),
+                tuple(versions.get(scope, 0) for scope in scopes),
+                datetime.utcnow().date().isoformat() if daily else None
+            )
+
+            cached_etag = _matching_etag(etag)
+            if cached_etag:
+                response = current_app.response_class(status=304)
+                etag = cached_etag
+            else:
+                response = make_response(f(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+
+            response.set_etag(etag)
+            response.cache_control.private = True
+            response.cache_control.no_cache = True
+            return response
+        return decorated_function
+    return decorator
+
+# ============ COMPRESSION ============
+
+def _negotiate_encoding():
+    """Meilleur encodage accepté par le client"""
+    if brotli and 'br' in request.accept_encodings:
+        return 'br'
+    if 'gzip' in request.accept_encodings:
+        return 'gzip'
+    return None
+
+def compress_response(response):
+    """Compresse une réponse dynamique si le client l'accepte"""
+    if (response.status_code < 200 or response.status_code in (204, 304)
+            or response.direct_passthrough
+            or response.is_streamed
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+        return response
+
+    response.vary.add('Accept-Encoding')
+    encoding = _negotiate_encoding()
+    if not encoding:
+        return response
+
+    data = response.get_data()
+    if len(data) < MIN_COMPRESS_SIZE:
+        return response
+
+    if encoding == 'br':
+        data = brotli.compress(data, quality=BROTLI_QUALITY)
+    else:
+        data = gzip.compress(data, compresslevel=GZIP_LEVEL)
+
+    response.set_data(data)
+    response.headers['Content-Encoding'] = encoding
+
+    # ETag fort : une représentation compressée a son propre ETag
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(f'{etag}-{encoding}')
+
+    return response
+
+def init_http_cache(app):
+    """Branche la compression des réponses dynamiques"""
+    app.after_request(compress_response)
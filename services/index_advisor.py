@@ -0,0 +1,213 @@
+import sys
+from datetime import datetime, timedelta
+from bson import ObjectId
+from services.database import CONSULTATION_SUMMARY_FIELDS, USERS_WITH_CHILDREN, overdue_vaccines_filter
+from services.vaccine_tracker import reminder_window
+
+# ============ CONSEILLER D'INDEX ============
+#
+# Rejoue chaque forme de requête de MongoDBManager avec explain(executionStats)
+# sur une base de travail peuplée par services.seed (schéma à jour), puis
+# signale les parcours de collection, le ratio documents examinés / renvoyés et
+# l'index composé suggéré (égalité, tri, puis plage).
+# Lancement : `flask --app app index-advisor` ou `python -m services.index_advisor`.
+
+# Au-delà de ce ratio documents examinés / renvoyés, un index est suggéré
+EXAMINED_RATIO_THRESHOLD = 10
+
+RANGE_OPERATORS = frozenset({'$gt', '$gte', '$lt', '$lte', '$ne', '$exists', '$nin'})
+
+def _shape(method, collection, query, sort=None, projection=None, operation='find', pipeline=None):
+    return {
+        'method': method,
+        'collection': collection,
+        'operation': operation,
+        'query': query,
+        'sort': sort,
+        'projection': projection,
+        'pipeline': pipeline
+    }
+
+def query_shapes(sample):
+    """Formes de requêtes de MongoDBManager, instanciées avec des valeurs représentatives"""
+    user_id = sample['user_id']
+    now = sample['now']
+    day_ago = now - timedelta(hours=24)
+    # Fenêtre de rappel ]start, end] de VaccineTracker et du job quotidien
+    reminder_start, reminder_end = reminder_window(now)
+
+    return [
+        _shape('get_user_by_email', 'users', {'email': sample['email']}),
+        _shape('get_user_by_id', 'users', {'_id': ObjectId(user_id)}),
+        _shape('get_users_with_children', 'users', USERS_WITH_CHILDREN),
+        _shape('get_children_birth_dates', 'users', None, operation='aggregate', pipeline=[
+            {'$match': dict(USERS_WITH_CHILDREN, **{'children.birth_date': {'$exists': True}})},
+            {'$unwind': '$children'},
+            {'$project': {'_id': 0, 'birth_date': '$children.birth_date'}}
+        ]),
+        _shape('get_system_stats', 'users', {'is_active': True}, operation='count'),
+        _shape('get_user_consultations', 'consultations', {'user_id': user_id},
+               sort=[('date_consultation', -1)]),
+        _shape('get_consultations_page', 'consultations',
+               {'user_id': user_id, '$or': [
+                   {'date_consultation': {'$lt': now}},
+                   {'date_consultation': now, '_id': {'$lt': ObjectId()}}
+               ]},
+               sort=[('date_consultation', -1), ('_id', -1)], projection=CONSULTATION_SUMMARY_FIELDS),
+        _shape('get_urgent_consultations', 'consultations',
+               {'urgency': {'$in': ['high', 'medium']}, 'date_consultation': {'$gte': day_ago}},
+               sort=[('date_consultation', -1)]),
+        _shape('get_user_stats', 'consultations',
+               {'user_id': user_id, 'urgency': {'$in': ['high', 'medium']}}, operation='count'),
+        _shape('get_user_pregnancy', 'pregnancies', {'user_id': user_id}),
+        _shape('get_active_pregnancies', 'pregnancies',
+               {'start_date': {'$gte': now - timedelta(weeks=40)}, 'user_id': {'$exists': True}}),
+        _shape('refresh_pregnancy_progress', 'pregnancies', {'next_week_at': {'$lte': now}},
+               projection={'start_date': 1, 'user_id': 1}),
+        _shape('get_pregnancies_changed_week', 'pregnancies',
+               {'week_changed_at': {'$gte': day_ago}, 'current_week': {'$gt': 0}}),
+        _shape('get_system_stats', 'pregnancies', {'due_date': {'$gte': now}}, operation='count'),
+        _shape('get_user_notifications', 'notifications', {'user_id': user_id},
+               sort=[('created_at', -1), ('_id', -1)]),
+        _shape('get_user_notifications', 'notifications', {'user_id': user_id, 'read': False},
+               sort=[('created_at', -1), ('_id', -1)]),
+        _shape('get_new_notifications', 'notifications',
+               {'user_id': user_id, 'read': False, 'created_at': {'$gt': day_ago}},
+               sort=[('created_at', -1)]),
+        _shape('get_notification_stats', 'notifications', None, operation='aggregate', pipeline=[
+            {'$match': {'user_id': user_id}},
+            {'$group': {'_id': '$type', 'total': {'$sum': 1}}}
+        ]),
+        _shape('get_vaccine_due', 'vaccine_due',
+               {'status': 'pending', 'due_date': {'$gt': reminder_start, '$lte': now}},
+               sort=[('due_date', 1)], projection={'_id': 0}),
+        _shape('get_vaccine_due', 'vaccine_due',
+               {'user_id': user_id, 'status': 'pending', 'due_date': {'$gt': reminder_start, '$lte': reminder_end}},
+               sort=[('due_date', 1)], projection={'_id': 0}),
+        _shape('get_overdue_vaccines', 'vaccine_due', overdue_vaccines_filter(now),
+               sort=[('due_date', 1)]),
+    ]
+
+def suggest_index(shape):
+    """Index composé suggéré selon la règle égalité, tri, plage"""
+    query = shape['query'] or {}
+    if shape['pipeline']:
+        query = next((stage['$match'] for stage in shape['pipeline'] if '$match' in stage), {})
+
+    equality, ranges = [], []
+    for field, condition in query.items():
+        if field.startswith('$'):
+            continue
+        if isinstance(condition, dict) and set(condition) & RANGE_OPERATORS:
+            ranges.append(field)
+        else:
+            equality.append(field)
+
+    keys = [(field, 1) for field in equality]
+    for field, direction in shape['sort'] or []:
+        if field not in equality:
+            keys.append((field, direction))
+    for field in ranges:
+        if field not in dict(keys):
+            keys.append((field, 1))
+    return keys
+
+def _plan_stages(plan):
+    """Étapes et index d'un plan d'exécution (parcours récursif)"""
+    stages, indexes = [], []
+    pending = [plan]
+    while pending:
+        node = pending.pop()
+        if not isinstance(node, dict):
+            continue
+        if 'stage' in node:
+            stages.append(node['stage'])
+        if node.get('indexName'):
+            indexes.append(node['indexName'])
+        for key in ('inputStage', 'queryPlan', 'winningPlan'):
+            if key in node:
+                pending.append(node[key])
+        pending.extend(node.get('inputStages', []))
+    return stages, indexes
+
+def explain_shape(db, shape):
+    """explain(executionStats) d'une forme de requête"""
+    collection = shape['collection']
+    if shape['operation'] == 'aggregate':
+        command = {'aggregate': collection, 'pipeline': shape['pipeline'], 'cursor': {}}
+    elif shape['operation'] == 'count':
+        command = {'count': collection, 'query': shape['query']}
+    else:
+        command = {'find': collection, 'filter': shape['query']}
+        if shape['sort']:
+            command['sort'] = dict(shape['sort'])
+        if shape['projection']:
+            command['projection'] = shape['projection']
+
+    explained = db.command('explain', command, verbosity='executionStats')
+
+    # Un aggregate place le plan de la requête initiale dans stages[0].$cursor
+    if 'stages' in explained:
+        explained = explained['stages'][0].get('$cursor', explained)
+    stats = explained.get('executionStats', {})
+    stages, indexes = _plan_stages(explained.get('queryPlanner', {}).get('winningPlan', {}))
+
+    returned = stats.get('nReturned', 0)
+    examined = stats.get('totalDocsExamined', 0)
+    return {
+        'method': shape['method'],
+        'collection': collection,
+        'stages': stages,
+        'indexes': indexes,
+        'collection_scan': 'COLLSCAN' in stages,
+        'in_memory_sort': 'SORT' in stages,
+        'returned': returned,
+        'docs_examined': examined,
+        'keys_examined': stats.get('totalKeysExamined', 0),
+        'examined_ratio': round(examined / max(returned, 1), 1)
+    }
+
+def run_advisor(manager, users=500, keep=False):
+    """Peuple une base de travail, applique les migrations et explique chaque forme"""
+    from services.migrations import run_migrations
+    from services.seed import seed_database, seed_email
+
+    scratch = manager.sibling(f"{manager.db.name}_index_advisor")
+    scratch.client.drop_database(scratch.db.name)
+    try:
+        run_migrations(scratch)
+        now = datetime.utcnow().replace(microsecond=0)
+        seed_database(scratch, users, now=now)
+        sample_user = scratch.db['users'].find_one(USERS_WITH_CHILDREN) or \
+            scratch.db['users'].find_one({'email': seed_email(0)})
+        sample = {'user_id': str(sample_user['_id']), 'email': sample_user['email'], 'now': now}
+
+        report = []
+        for shape in query_shapes(sample):
+            result = explain_shape(scratch.db, shape)
+            needs_index = result['collection_scan'] or result['examined_ratio'] > EXAMINED_RATIO_THRESHOLD
+            result['suggested_index'] = suggest_index(shape) if needs_index else None
+            report.append(result)
+        return report
+    finally:
+        if not keep:
+            scratch.client.drop_database(scratch.db.name)
+
+def print_report(report):
+    print(f"{'méthode':<30} {'collection':<14} {'plan':<28} {'renvoyés':>8} {'examinés':>8} {'ratio':>6}")
+    for row in report:
+        plan = '+'.join(dict.fromkeys(row['stages']))
+        flag = '⚠️ ' if row['suggested_index'] else '  '
+        print(f"{flag}{row['method']:<28} {row['collection']:<14} {plan[:28]:<28} "
+              f"{row['returned']:>8} {row['docs_examined']:>8} {row['examined_ratio']:>6}")
+        if row['suggested_index']:
+            keys = ', '.join(f"{field}: {direction}" for field, direction in row['suggested_index'])
+            print(f"    💡 index suggéré sur {row['collection']} : {{{keys}}}")
+
+if __name__ == '__main__':
+    from dotenv import load_dotenv
+    load_dotenv()
+
+    from services.database import db_manager
+
+    print_report(run_advisor(db_manager, int(sys.argv[1]) if len(sys.argv) > 1 else 500))
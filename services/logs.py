@@ -0,0 +1,172 @@
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import re
+import sys
+import uuid
+from datetime import datetime, timezone
+from flask import g, has_request_context, request
+from services.serialization import dumps_bytes
+
+# ============ JOURNAUX STRUCTURÉS ============
+#
+# Les appels logger.info()/error() ne font que déposer l'enregistrement dans une
+# file en mémoire ; un thread d'écoute par processus le formate en JSON (une
+# ligne par événement) et l'écrit sur stdout. Les événements de succès à fort
+# volume sont marqués `sampled` et seul un échantillon (LOG_SAMPLE_RATE) est
+# conservé. Niveaux : LOG_LEVEL (défaut INFO) et, par logger,
+# LOG_LEVELS="services.database=WARNING,werkzeug=WARNING".
+
+LOG_QUEUE_SIZE = int(os.getenv('LOG_QUEUE_SIZE', 10000))
+LOG_SAMPLE_RATE = float(os.getenv('LOG_SAMPLE_RATE', 0.1))
+
+REQUEST_ID_HEADER = 'X-Request-ID'
+_REQUEST_ID_PATTERN = re.compile(r'^[A-Za-z0-9._-]{1,64}$')
+
+# Attributs standard d'un LogRecord : tout le reste vient de `extra` et est exporté
+_RECORD_ATTRIBUTES = frozenset(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {
+    'message', 'asctime', 'request_id', 'sampled'
+}
+
+def sampled(**fields):
+    """`extra` d'un événement de succès à fort volume (échantillonné)"""
+    fields['sampled'] = True
+    return fields
+
+class RequestContextFilter(logging.Filter):
+    """Ajoute l'identifiant de la requête en cours (thread appelant)"""
+
+    def filter(self, record):
+        record.request_id = g.get('request_id') if has_request_context() else None
+        return True
+
+class SamplingFilter(logging.Filter):
+    """Ne garde qu'une fraction des événements `sampled` de niveau INFO ou inférieur"""
+
+    def __init__(self, rate=LOG_SAMPLE_RATE):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        if getattr(record, 'sampled', False) and record.levelno <= logging.INFO:
+            return random.random() < self.rate
+        return True
+
+class JSONFormatter(logging.Formatter):
+    """Une ligne JSON par événement"""
+
+    def format(self, record):
+        entry = {
+            'timestamp': datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'pid': record.process,
+            'thread': record.threadName
+        }
+        if getattr(record, 'request_id', None):
+            entry['request_id'] = record.request_id
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_text:
+            entry['exception'] = record.exc_text
+        return dumps_bytes(entry).decode('utf-8')
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler qui abandonne l'événement si la file est pleine au lieu de bloquer"""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # Message et trace d'exception figés dans le thread appelant (args non partagés)
+        record.message = record.getMessage()
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.msg = record.message
+        record.args = None
+        record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+_handler = None
+_listener = None
+_listener_pid = None
+
+def _parse_levels(value):
+    levels = {}
+    for item in (value or '').split(','):
+        name, _, level = item.partition('=')
+        if name.strip() and level.strip():
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+def start_log_listener():
+    """Démarre le thread d'écoute de ce processus (à rappeler après un fork)"""
+    global _listener, _listener_pid
+    if _handler is None or _listener_pid == os.getpid():
+        return
+
+    # La file et le thread hérités du parent sont inutilisables dans l'enfant
+    _handler.queue = queue.Queue(LOG_QUEUE_SIZE)
+    output = logging.StreamHandler(sys.stdout)
+    output.setFormatter(JSONFormatter())
+    _listener = logging.handlers.QueueListener(_handler.queue, output, respect_handler_level=False)
+    _listener.start()
+    _listener_pid = os.getpid()
+
+def stop_log_listener():
+    """Vide la file et arrête le thread d'écoute"""
+    global _listener, _listener_pid
+    if _listener is not None and _listener_pid == os.getpid():
+        _listener.stop()
+    _listener = None
+    _listener_pid = None
+
+def setup_logging():
+    """Configure le logger racine : file non bloquante, niveaux, échantillonnage"""
+    global _handler
+    if _handler is not None:
+        return
+
+    _handler = NonBlockingQueueHandler(queue.Queue(LOG_QUEUE_SIZE))
+    _handler.addFilter(RequestContextFilter())
+    _handler.addFilter(SamplingFilter())
+
+    root = logging.getLogger()
+    root.handlers = [_handler]
+    root.setLevel(os.getenv('LOG_LEVEL', 'INFO').upper())
+    for name, level in _parse_levels(os.getenv('LOG_LEVELS')).items():
+        logging.getLogger(name).setLevel(level)
+
+    start_log_listener()
+    atexit.register(stop_log_listener)
+
+def log_queue_stats():
+    """Profondeur de la file et événements abandonnés (file pleine)"""
+    if _handler is None:
+        return {'depth': 0, 'dropped': 0}
+    return {'depth': _handler.queue.qsize(), 'dropped': _handler.dropped}
+
+def init_logging(app):
+    """Identifiant de requête (repris de X-Request-ID ou généré) renvoyé dans la réponse"""
+    @app.before_request
+    def assign_request_id():
+        incoming = request.headers.get(REQUEST_ID_HEADER, '')
+        g.request_id = incoming if _REQUEST_ID_PATTERN.match(incoming) else uuid.uuid4().hex
+
+    @app.after_request
+    def expose_request_id(response):
+        if 'request_id' in g:
+            response.headers[REQUEST_ID_HEADER] = g.request_id
+        return response
@@ -0,0 +1,245 @@
+import bisect
+import hmac
+import os
+import threading
+import time
+from functools import wraps
+from flask import Response, g, request
+
+# ============ MÉTRIQUES (FORMAT TEXTE PROMETHEUS) ============
+#
+# Compteurs, histogrammes et jauges en mémoire, exposés sur /metrics au format
+# texte de Prometheus. Comme /metrics/db-pool, les valeurs sont celles du
+# processus qui répond : chaque worker gunicorn a son propre registre.
+#
+# Les deux routes révèlent latences, tailles de pool et volumes d'envoi : elles
+# sont réservées au scraper Prometheus (en-tête `Authorization: Bearer
+# <METRICS_TOKEN>`) et aux administrateurs connectés.
+
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _format_labels(names, values, extra=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Counter:
+    """Compteur croissant, une série par combinaison d'étiquettes"""
+    kind = 'counter'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.lock = threading.Lock()
+        self.values = {}
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(name, '') for name in self.labelnames)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def samples(self):
+        with self.lock:
+            values = dict(self.values)
+        for key, value in sorted(values.items()):
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+
+class Histogram:
+    """Histogramme de durées (secondes), seaux cumulés à l'export"""
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self.lock = threading.Lock()
+        self.series = {}
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(name, '') for name in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            series = self.series.get(key)
+            if series is None:
+                # [compte par seau (+Inf en dernier), somme]
+                series = self.series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def time(self, **labels):
+        """Décorateur mesurant la durée d'exécution d'une fonction"""
+        def decorator(f):
+            @wraps(f)
+            def decorated_function(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return f(*args, **kwargs)
+                finally:
+                    self.observe(time.perf_counter() - start, **labels)
+            return decorated_function
+        return decorator
+
+    def samples(self):
+        with self.lock:
+            series = {key: (list(counts), total) for key, (counts, total) in self.series.items()}
+        for key, (counts, total) in sorted(series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, f'le="{_format_value(float(bound))}"')
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _format_labels(self.labelnames, key)
+            yield f"{self.name}_sum{labels} {_format_value(total)}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+class Gauge:
+    """Jauge lue à l'export : callback renvoyant une valeur ou {(étiquettes...): valeur}"""
+    kind = 'gauge'
+
+    def __init__(self, name, documentation, callback, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.callback = callback
+        self.labelnames = tuple(labelnames)
+
+    def samples(self):
+        try:
+            values = self.callback()
+        except Exception:
+            return
+        if not isinstance(values, dict):
+            values = {(): values}
+        for key, value in sorted(values.items()):
+            if value is None:
+                continue
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+
+class Registry:
+    """Ensemble des métriques exposées par /metrics"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.metrics = {}
+
+    def register(self, metric):
+        with self.lock:
+            self.metrics.setdefault(metric.name, metric)
+            return self.metrics[metric.name]
+
+    def counter(self, name, documentation, labelnames=()):
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def gauge(self, name, documentation, callback, labelnames=()):
+        return self.register(Gauge(name, documentation, callback, labelnames))
+
+    def exposition(self):
+        """Toutes les métriques au format texte Prometheus"""
+        with self.lock:
+            metrics = list(self.metrics.values())
+
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return '\n'.join(lines) + '\n'
+
+registry = Registry()
+
+HTTP_REQUESTS = registry.counter(
+    'http_requests_total', "Requêtes HTTP traitées", ('method', 'endpoint', 'status'))
+HTTP_REQUEST_SECONDS = registry.histogram(
+    'http_request_duration_seconds', "Durée des requêtes HTTP par route", ('method', 'endpoint'))
+DB_OPERATION_SECONDS = registry.histogram(
+    'db_operation_duration_seconds', "Durée des méthodes de MongoDBManager", ('method',))
+NLP_STAGE_SECONDS = registry.histogram(
+    'nlp_stage_duration_seconds', "Durée des étapes du traitement des questions", ('stage',))
+NOTIFICATION_SEND_SECONDS = registry.histogram(
+    'notification_send_duration_seconds', "Durée d'envoi d'une notification par type", ('type',))
+NOTIFICATIONS_SENT = registry.counter(
+    'notifications_sent_total', "Messages envoyés par canal", ('channel', 'status'))
+LOGIN_SECONDS = registry.histogram(
+    'login_duration_seconds', "Durée des connexions par route", ('route',))
+PASSWORD_OPERATION_SECONDS = registry.histogram(
+    'password_operation_duration_seconds', "Durée des opérations bcrypt, attente du pool comprise", ('operation',))
+PASSWORD_POOL_REJECTED = registry.counter(
+    'password_pool_rejected_total', "Opérations refusées faute de place dans le pool de hachage", ('operation',))
+
+def instrument_methods(cls, histogram, label='method', exclude=()):
+    """Chronomètre toutes les méthodes publiques d'une classe (une série par méthode)"""
+    for name, attribute in list(vars(cls).items()):
+        if name.startswith('_') or name in exclude or not callable(attribute):
+            continue
+        setattr(cls, name, histogram.time(**{label: name})(attribute))
+    return cls
+
+def cache_hit_ratio(stats):
+    """Taux de succès d'un cache ({'hits', 'misses'}), None avant le premier accès"""
+    lookups = stats['hits'] + stats['misses']
+    return stats['hits'] / lookups if lookups else None
+
+def _scrape_token_valid():
+    scheme, _, token = request.headers.get('Authorization', '').partition(' ')
+    return bool(METRICS_TOKEN) and scheme.lower() == 'bearer' and \
+        hmac.compare_digest(token.strip().encode('utf-8'), METRICS_TOKEN.encode('utf-8'))
+
+def metrics_auth_required(f):
+    """Réserve une route de métriques au jeton METRICS_TOKEN ou aux administrateurs"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        from flask_login import current_user
+
+        if _scrape_token_valid() or getattr(current_user, 'role', None) == 'admin':
+            return f(*args, **kwargs)
+        return Response("Accès réservé au scraper de métriques et aux administrateurs\n",
+                        status=401, content_type=CONTENT_TYPE, headers={'WWW-Authenticate': 'Bearer'})
+    return decorated_function
+
+def init_metrics(app, gauges=None):
+    """Mesure chaque requête et expose /metrics
+
+    `gauges` : {nom: (description, callback)} des jauges propres à l'application
+    (taux de succès des caches, profondeur des files d'attente...).
+    """
+    for name, (documentation, callback) in (gauges or {}).items():
+        registry.gauge(name, documentation, callback)
+
+    @app.before_request
+    def start_request_timer():
+        g.request_started = time.perf_counter()
+
+    @app.after_request
+    def record_request_metrics(response):
+        started = g.pop('request_started', None)
+        if started is not None:
+            # Route (endpoint Flask) plutôt que le chemin : pas d'identifiants dans les étiquettes
+            endpoint = request.endpoint or 'not_found'
+            HTTP_REQUEST_SECONDS.observe(time.perf_counter() - started,
+                                         method=request.method, endpoint=endpoint)
+            HTTP_REQUESTS.inc(method=request.method, endpoint=endpoint,
+                              status=str(response.status_code))
+        return response
+
+    @app.route('/metrics')
+    @metrics_auth_required
+    def metrics():
+        """Métriques de ce worker au format texte Prometheus"""
+        return Response(registry.exposition(), content_type=CONTENT_TYPE)
@@ -0,0 +1,192 @@
+from datetime import datetime
+import sys
+
+# ============ MIGRATIONS VERSIONNÉES ============
+#
+# Chaque migration reçoit le MongoDBManager et n'est appliquée qu'une fois :
+# la version appliquée est enregistrée dans la collection schema_migrations.
+# Lancement : `flask --app app init-db` ou `python -m services.migrations`.
+
+def _initial_indexes(manager):
+    """Index des collections principales"""
+    db = manager.db
+
+    # Collection utilisateurs
+    users_col = db['users']
+    users_col.create_index('email', unique=True, sparse=True)
+    users_col.create_index('phone', unique=True, sparse=True)
+    users_col.create_index([('email', 'text'), ('prenom', 'text'), ('nom', 'text')])
+
+    # Collection consultations
+    consultations_col = db['consultations']
+    consultations_col.create_index('user_id')
+    consultations_col.create_index([('user_id', 1), ('date_consultation', -1)])
+    consultations_col.create_index('urgency')
+
+    # Collection grossesses
+    pregnancies_col = db['pregnancies']
+    pregnancies_col.create_index('user_id', unique=True)
+    pregnancies_col.create_index('due_date')
+
+    # Collection notifications
+    notifications_col = db['notifications']
+    notifications_col.create_index('user_id')
+    notifications_col.create_index([('user_id', 1), ('created_at', -1)])
+    notifications_col.create_index([('user_id', 1), ('read', 1)])
+
+def _vaccine_due(manager):
+    """Index des échéances vaccinales et matérialisation des enfants existants"""
+    vaccine_due_col = manager.db['vaccine_due']
+    vaccine_due_col.create_index('due_date')
+    vaccine_due_col.create_index([('user_id', 1), ('due_date', 1)])
+    vaccine_due_col.create_index([('status', 1), ('due_date', 1)])
+    vaccine_due_col.create_index([('user_id', 1), ('child_index', 1), ('milestone', 1)])
+
+    manager.rebuild_vaccine_due()
+
+def _consultations_keyset(manager):
+    """Index de la pagination par curseur de l'historique (user_id, date_consultation, _id)"""
+    consultations_col = manager.db['consultations']
+    consultations_col.create_index([('user_id', 1), ('date_consultation', -1), ('_id', -1)])
+
+    # L'ancien index (user_id, date_consultation) est un préfixe du nouveau
+    if 'user_id_1_date_consultation_-1' in consultations_col.index_information():
+        consultations_col.drop_index('user_id_1_date_consultation_-1')
+
+def _pregnancy_progress(manager):
+    """Avancement matérialisé des grossesses : index et calcul initial"""
+    from pymongo import UpdateOne
+    from services.pregnancy_progress import progress_fields
+
+    pregnancies_col = manager.db['pregnancies']
+    pregnancies_col.create_index('current_week')
+    pregnancies_col.create_index('next_week_at', sparse=True)
+    pregnancies_col.create_index('week_changed_at', sparse=True)
+
+    now = datetime.utcnow()
+    updates = [
+        UpdateOne({'_id': pregnancy['_id']}, {'$set': progress_fields(pregnancy['start_date'], now)})
+        for pregnancy in pregnancies_col.find({'start_date': {'$type': 'date'}}, {'start_date': 1})
+    ]
+    if updates:
+        pregnancies_col.bulk_write(updates, ordered=False)
+
+def _notification_keys(manager):
+    """Clés d'idempotence des notifications, purgées par index TTL"""
+    from services.database import NOTIFICATION_KEY_TTL_SECONDS
+
+    manager.db['notification_keys'].create_index(
+        'created_at', expireAfterSeconds=NOTIFICATION_KEY_TTL_SECONDS
+    )
+
+def _query_indexes(manager):
+    """Index composés recommandés par le conseiller d'index (services.index_advisor)"""
+    from services.database import USERS_WITH_CHILDREN
+
+    db = manager.db
+
+    # Notifications : non lues triées par date, comptages par type
+    notifications_col = db['notifications']
+    notifications_col.create_index([('user_id', 1), ('read', 1), ('created_at', -1)])
+    notifications_col.create_index([('user_id', 1), ('type', 1), ('read', 1)])
+
+    # Grossesses actives (start_date sur les 40 dernières semaines)
+    db['pregnancies'].create_index('start_date')
+
+    # Utilisateurs avec enfants : seuls les documents concernés entrent dans l'index
+    db['users'].create_index('children.0', partialFilterExpression=USERS_WITH_CHILDREN)
+
+    # Consultations urgentes récentes
+    consultations_col = db['consultations']
+    consultations_col.create_index([('urgency', 1), ('date_consultation', -1)])
+
+    # Index devenus préfixes d'un index composé
+    for collection, name in (('notifications', 'user_id_1'), ('notifications', 'user_id_1_read_1'),
+                             ('consultations', 'user_id_1'), ('consultations', 'urgency_1')):
+        if name in db[collection].index_information():
+            db[collection].drop_index(name)
+
+def _child_ids(manager):
+    """child_id des enfants existants et échéances vaccinales indexées par child_id"""
+    from bson import ObjectId
+    from pymongo import UpdateOne
+
+    users_col = manager.db['users']
+    updates = []
+    for user in users_col.find({'children': {'$elemMatch': {'child_id': {'$exists': False}}}}, {'children': 1}):
+        children = [child for child in user['children'] if child]
+        for child in children:
+            child.setdefault('child_id', str(ObjectId()))
+        updates.append(UpdateOne({'_id': user['_id']}, {'$set': {'children': children}}))
+        if len(updates) >= 1000:
+            users_col.bulk_write(updates, ordered=False)
+            updates = []
+    if updates:
+        users_col.bulk_write(updates, ordered=False)
+
+    vaccine_due_col = manager.db['vaccine_due']
+    vaccine_due_col.create_index([('user_id', 1), ('child_id', 1), ('milestone', 1)])
+    if 'user_id_1_child_index_1_milestone_1' in vaccine_due_col.index_information():
+        vaccine_due_col.drop_index('user_id_1_child_index_1_milestone_1')
+
+    manager.rebuild_vaccine_due()
+
+def _notification_inbox(manager):
+    """Pagination par curseur des notifications et compteur users.unread_notifications"""
+    notifications_col = manager.db['notifications']
+    notifications_col.create_index([('user_id', 1), ('created_at', -1), ('_id', -1)])
+    notifications_col.create_index([('user_id', 1), ('read', 1), ('created_at', -1), ('_id', -1)])
+
+    # Les anciens index sont des préfixes des nouveaux ; (user_id, type, read) servait
+    # aux comptages par type, remplacés par un $group sur user_id
+    for name in ('user_id_1_created_at_-1', 'user_id_1_read_1_created_at_-1', 'user_id_1_type_1_read_1'):
+        if name in notifications_col.index_information():
+            notifications_col.drop_index(name)
+
+    manager.recount_unread_notifications()
+
+MIGRATIONS = [
+    (1, "Index initiaux", _initial_indexes),
+    (2, "Échéances vaccinales", _vaccine_due),
+    (3, "Pagination de l'historique des consultations", _consultations_keyset),
+    (4, "Avancement des grossesses", _pregnancy_progress),
+    (5, "Déduplication des notifications", _notification_keys),
+    (6, "Index des requêtes de MongoDBManager", _query_indexes),
+    (7, "Identifiants stables des enfants", _child_ids),
+    (8, "Boîte de notifications et compteur de non lues", _notification_inbox),
+]
+
+def applied_versions(manager):
+    """Versions de migration déjà appliquées"""
+    return {doc['_id'] for doc in manager.db['schema_migrations'].find({}, {'_id': 1})}
+
+def run_migrations(manager, target=None):
+    """Applique dans l'ordre les migrations manquantes, jusqu'à target si fourni"""
+    migrations_col = manager.db['schema_migrations']
+    done = applied_versions(manager)
+
+    applied = []
+    for version, description, migrate in MIGRATIONS:
+        if version in done or (target is not None and version > target):
+            continue
+
+        print(f"🔧 Migration {version}: {description}")
+        migrate(manager)
+        migrations_col.insert_one({
+            '_id': version,
+            'description': description,
+            'applied_at': datetime.utcnow()
+        })
+        applied.append(version)
+
+    print(f"✅ Schéma à jour ({len(applied)} migration(s) appliquée(s))")
+    return applied
+
+if __name__ == '__main__':
+    from dotenv import load_dotenv
+    load_dotenv()
+
+    from services.database import db_manager
+
+    target = int(sys.argv[1]) if len(sys.argv) > 1 else None
+    run_migrations(db_manager, target)
@@ -1,36 +1,91 @@
+import logging
 import os
 from twilio.rest import Client
+from twilio.http.http_client import TwilioHttpClient
+from urllib.parse import urlsplit
 from datetime import datetime, timedelta
 from bson import ObjectId
 from services.database import db_manager
+from services.vaccine_tracker import VaccineTracker, reminder_window
+from services.pregnancy_progress import next_milestone, week_content
+from services.notification_templates import render_notification, estimate_campaign
+from services.metrics import NOTIFICATION_SEND_SECONDS, NOTIFICATIONS_SENT
+from services.logs import sampled
 import schedule
 import time
+import fcntl
 from threading import Thread
 
+logger = logging.getLogger(__name__)
+
+class RedirectedTwilioHttpClient(TwilioHttpClient):
+    """Client HTTP Twilio envoyant les appels d'API vers une autre base (simulateur local)"""
+    
+    def __init__(self, base_url):
+        super().__init__()
+        self.base_url = base_url.rstrip('/')
+    
+    def request(self, method, url, *args, **kwargs):
+        return super().request(method, self.base_url + urlsplit(url).path, *args, **kwargs)
+
 class EnhancedNotificationService:
     def __init__(self):
         self.twilio_account_sid = os.getenv('TWILIO_ACCOUNT_SID')
         self.twilio_auth_token = os.getenv('TWILIO_AUTH_TOKEN')
         self.twilio_phone_number = os.getenv('TWILIO_PHONE_NUMBER')
+        # Base de l'API Twilio à utiliser à la place de api.twilio.com (tests de charge)
+        self.twilio_api_url = os.getenv('TWILIO_API_URL')
+        self.client = None
+        self.scheduler_started = False
+        self._scheduler_lock_file = None
+    
+    def init_worker(self):
+        """Initialise le client Twilio dans le processus courant (après un fork)"""
         self.client = None
         
         if self.twilio_account_sid and self.twilio_auth_token:
             try:
-                self.client = Client(self.twilio_account_sid, self.twilio_auth_token)
-                print("✅ Service Twilio initialisé")
+                http_client = RedirectedTwilioHttpClient(self.twilio_api_url) if self.twilio_api_url else None
+                self.client = Client(self.twilio_account_sid, self.twilio_auth_token, http_client=http_client)
+                logger.info("Service Twilio initialisé%s",
+                            f" (API {self.twilio_api_url})" if self.twilio_api_url else "")
             except Exception as e:
-                print(f"❌ Erreur initialisation Twilio: {e}")
+                logger.error("Erreur initialisation Twilio: %s", e)
         else:
-            print("⚠️ Twilio non configuré - mode simulation activé")
+            logger.warning("Twilio non configuré - mode simulation activé")
+    
+    def acquire_scheduler_lock(self):
+        """Élit un seul processus pour le scheduler (verrou fichier non bloquant)"""
+        lock_path = os.getenv('SCHEDULER_LOCK_FILE', '/tmp/maman-bebe-scheduler.lock')
+        lock_file = open(lock_path, 'w')
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
         
-        # Démarrer le scheduler en arrière-plan
-        self.start_scheduler()
+        # Le verrou est relâché par le système à la mort du processus
+        self._scheduler_lock_file = lock_file
+        return True
     
     def start_scheduler(self):
         """Démarre le scheduler pour les notifications planifiées"""
+        if self.scheduler_started:
+            return
+        
+        if os.getenv('SCHEDULER_ENABLED', 'true').lower() != 'true':
+            logger.info("Scheduler de notifications désactivé")
+            return
+        
+        if not self.acquire_scheduler_lock():
+            logger.info("Scheduler déjà actif dans un autre processus (pid %s)", os.getpid())
+            return
+        
         def run_scheduler():
+            schedule.every().day.at("00:05").do(db_manager.refresh_pregnancy_progress)
             schedule.every().day.at("09:00").do(self.check_daily_notifications)
-            schedule.every().monday.at("10:00").do(self.send_weekly_pregnancy_updates)
+            # Chaque grossesse reçoit sa mise à jour le jour où elle change de semaine
+            schedule.every().day.at("10:00").do(self.send_weekly_pregnancy_updates)
             schedule.every().day.at("08:00").do(self.send_vaccine_reminders)
             
             while True:
@@ -39,12 +94,20 @@ class EnhancedNotificationService:
         
         thread = Thread(target=run_scheduler, daemon=True)
         thread.start()
-        print("✅ Scheduler de notifications démarré")
+        self.scheduler_started = True
+        logger.info("Scheduler de notifications démarré (pid %s)", os.getpid())
+    
+    def scheduler_backlog(self):
+        """Nombre de tâches planifiées échues pas encore exécutées (0 hors processus du scheduler)"""
+        if not self.scheduler_started:
+            return 0
+        return sum(1 for job in schedule.jobs if job.should_run)
     
     def send_sms(self, to_phone, message):
         """Envoie un SMS via Twilio"""
         if not self.client:
-            print(f"📱 SMS simulé vers {to_phone}: {message}")
+            logger.info("SMS simulé vers %s: %s", to_phone, message, extra=sampled())
+            NOTIFICATIONS_SENT.inc(channel='sms', status='simulated')
             return True
         
         try:
@@ -53,43 +116,47 @@ class EnhancedNotificationService:
                 from_=self.twilio_phone_number,
                 to=to_phone
             )
-            print(f"✅ SMS envoyé: {message.sid}")
+            logger.info("SMS envoyé: %s", message.sid, extra=sampled())
             
             # Enregistrer dans la base de données
             self.log_notification(to_phone, 'sms', 'sent', message.body)
+            NOTIFICATIONS_SENT.inc(channel='sms', status='sent')
             return True
         except Exception as e:
-            print(f"❌ Erreur envoi SMS: {e}")
+            logger.error("Erreur envoi SMS: %s", e)
             self.log_notification(to_phone, 'sms', 'failed', str(e))
+            NOTIFICATIONS_SENT.inc(channel='sms', status='failed')
             return False
     
     def send_push_notification(self, user_id, title, message, notification_type='info'):
         """Envoie une notification push (à implémenter avec FCM/APN)"""
         # Pour l'instant, nous simulons avec un log
-        print(f"📱 Push notification pour {user_id}: {title} - {message}")
+        logger.info("Push notification pour %s: %s - %s", user_id, title, message, extra=sampled())
         self.log_notification(user_id, 'push', 'sent', f"{title}: {message}")
+        NOTIFICATIONS_SENT.inc(channel='push', status='sent')
         return True
     
-    def send_vaccine_reminder(self, user_id, child_name, vaccines, due_date):
-        """Envoie un rappel de vaccin"""
-        user = db_manager.get_user_by_id(user_id)
-        if not user or 'phone' not in user:
+    @NOTIFICATION_SEND_SECONDS.time(type='vaccine')
+    def send_vaccine_reminder(self, user_id, child_name, vaccines, due_date, phone=None):
+        """Envoie un rappel de vaccin (phone : numéro déjà lu par l'appelant)"""
+        if phone is None:
+            phone = (db_manager.get_user_by_id(user_id) or {}).get('phone')
+        if not phone:
             return False
         
-        message = f"💉 Rappel vaccin pour {child_name}\n"
-        message += f"Vaccins: {', '.join(vaccines)}\n"
-        message += f"Date recommandée: {due_date.strftime('%d/%m/%Y')}\n"
-        message += "📞 Prenez RDV avec votre pédiatre\n"
-        message += "-- Maman & Bébé --"
+        # Valeurs propres au destinataire : pas de pré-rendu (le cache des gabarits
+        # liés est réservé aux valeurs communes à une campagne)
+        values = {'child_name': child_name, 'vaccines': ', '.join(vaccines), 'due_date': due_date}
+        message = render_notification('vaccine', **values)
         
         # Envoyer SMS
-        sms_sent = self.send_sms(user['phone'], message)
+        sms_sent = self.send_sms(phone, message)
         
         # Envoyer notification push
         push_sent = self.send_push_notification(
             user_id, 
-            "💉 Rappel vaccin", 
-            f"{child_name} : {', '.join(vaccines)}",
+            render_notification('vaccine', 'push_title'),
+            render_notification('vaccine', 'push_body', **values),
             'vaccine'
         )
         
@@ -112,25 +179,22 @@ class EnhancedNotificationService:
         
         return sms_sent or push_sent
     
+    @NOTIFICATION_SEND_SECONDS.time(type='emergency')
     def send_emergency_alert(self, user_id, symptoms):
         """Envoie une alerte d'urgence"""
         user = db_manager.get_user_by_id(user_id)
         if not user or 'phone' not in user:
             return False
         
-        message = f"🚨 ALERTE SANTÉ 🚨\n"
-        message += f"Symptômes signalés: {symptoms}\n"
-        message += f"📞 Contactez IMMÉDIATEMENT le 15 (SAMU)\n"
-        message += "⚠️ Ne prenez aucun risque\n"
-        message += "-- Maman & Bébé --"
+        message = render_notification('emergency', symptoms=symptoms)
         
         sms_sent = self.send_sms(user['phone'], message)
         
         # Notification push urgente
         push_sent = self.send_push_notification(
             user_id,
-            "🚨 Alerte Urgente",
-            f"Symptômes: {symptoms[:50]}...",
+            render_notification('emergency', 'push_title'),
+            render_notification('emergency', 'push_body', symptoms_preview=symptoms[:50]),
             'emergency'
         )
         
@@ -148,18 +212,21 @@ class EnhancedNotificationService:
         
         return sms_sent or push_sent
     
+    @NOTIFICATION_SEND_SECONDS.time(type='pregnancy')
     def send_weekly_pregnancy_update(self, user_id, week, trimester, development_info):
         """Envoie une mise à jour hebdomadaire de grossesse"""
         user = db_manager.get_user_by_id(user_id)
         if not user:
             return False
         
-        message = f"🤰 Semaine {week} de grossesse\n"
-        message += f"🎉 {trimester}ème trimestre\n"
-        message += f"👶 {development_info}\n"
-        message += f"📅 Prochaine étape dans {self.get_next_milestone(week)}\n"
-        message += "❤️ Prenez soin de vous\n"
-        message += "-- Maman & Bébé --"
+        # Texte identique pour toutes les grossesses de la même semaine : rendu une fois
+        shared = {
+            'week': week,
+            'trimester': trimester,
+            'development': development_info,
+            'next_milestone': self.get_next_milestone(week)
+        }
+        message = render_notification('pregnancy', shared=shared)
         
         sms_sent = False
         if 'phone' in user:
@@ -167,24 +234,22 @@ class EnhancedNotificationService:
         
         push_sent = self.send_push_notification(
             user_id,
-            f"🤰 Semaine {week}",
-            f"Vous êtes dans votre {trimester}ème trimestre",
+            render_notification('pregnancy', 'push_title', shared=shared),
+            render_notification('pregnancy', 'push_body', shared=shared),
             'pregnancy'
         )
         
         return sms_sent or push_sent
     
+    @NOTIFICATION_SEND_SECONDS.time(type='milestone')
     def send_milestone_reminder(self, user_id, milestone_week, milestone_text):
         """Envoie un rappel d'étape importante"""
         user = db_manager.get_user_by_id(user_id)
         if not user:
             return False
         
-        message = f"🎯 ÉTAPE IMPORTANTE\n"
-        message += f"Semaine {milestone_week}: {milestone_text}\n"
-        message += "📅 Préparez votre rendez-vous\n"
-        message += "📋 Préparez vos questions\n"
-        message += "-- Maman & Bébé --"
+        shared = {'milestone_week': milestone_week, 'milestone_text': milestone_text}
+        message = render_notification('milestone', shared=shared)
         
         sms_sent = False
         if 'phone' in user:
@@ -192,25 +257,22 @@ class EnhancedNotificationService:
         
         push_sent = self.send_push_notification(
             user_id,
-            f"🎯 Semaine {milestone_week}",
-            milestone_text,
+            render_notification('milestone', 'push_title', shared=shared),
+            render_notification('milestone', 'push_body', shared=shared),
             'milestone'
         )
         
         return sms_sent or push_sent
     
+    @NOTIFICATION_SEND_SECONDS.time(type='appointment')
     def send_appointment_reminder(self, user_id, appointment_type, date, doctor):
         """Envoie un rappel de rendez-vous"""
         user = db_manager.get_user_by_id(user_id)
         if not user:
             return False
         
-        message = f"📅 RAPPEL RENDEZ-VOUS\n"
-        message += f"Type: {appointment_type}\n"
-        message += f"Date: {date.strftime('%d/%m/%Y à %H:%M')}\n"
-        message += f"Avec: {doctor}\n"
-        message += "📌 N'oubliez pas votre carte vitale\n"
-        message += "-- Maman & Bébé --"
+        values = {'appointment_type': appointment_type, 'date': date, 'doctor': doctor}
+        message = render_notification('appointment', **values)
         
         sms_sent = False
         if 'phone' in user:
@@ -218,8 +280,8 @@ class EnhancedNotificationService:
         
         push_sent = self.send_push_notification(
             user_id,
-            "📅 Rappel RDV",
-            f"{appointment_type} - {date.strftime('%d/%m à %H:%M')}",
+            render_notification('appointment', 'push_title'),
+            render_notification('appointment', 'push_body', **values),
             'appointment'
         )
         
@@ -227,7 +289,7 @@ class EnhancedNotificationService:
     
     def check_daily_notifications(self):
         """Vérifie et envoie les notifications quotidiennes"""
-        print("🔔 Vérification des notifications quotidiennes")
+        logger.info("Vérification des notifications quotidiennes")
         
         # Vérifier les vaccins en retard
         self.check_overdue_vaccines()
@@ -238,112 +300,202 @@ class EnhancedNotificationService:
         # Envoyer les rappels du jour
         self.send_today_reminders()
     
-    def send_weekly_pregnancy_updates(self):
-        """Envoie les mises à jour hebdomadaires de grossesse"""
-        print("🤰 Envoi des mises à jour hebdomadaires")
-        
-        # Récupérer toutes les grossesses actives
-        pregnancies = db_manager.get_active_pregnancies()
+    def send_weekly_pregnancy_updates(self, since=None):
+        """Envoie la mise à jour hebdomadaire aux grossesses qui ont changé de semaine"""
+        logger.info("Envoi des mises à jour hebdomadaires")
+        
+        # Semaine avancée par refresh_pregnancy_progress depuis minuit
+        if since is None:
+            since = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+        pregnancies = [
+            pregnancy for pregnancy in db_manager.get_pregnancies_changed_week(since)
+            if pregnancy.get('current_week', 0) > 0
+        ]
+        
+        # Une relance du job le même jour n'envoie pas deux fois la même semaine
+        now = datetime.utcnow()
+        keys = {
+            self.notification_key(pregnancy['user_id'], 'pregnancy', pregnancy['current_week'], now): pregnancy
+            for pregnancy in pregnancies
+        }
+        claimed = db_manager.claim_notification_keys(keys, now)
+        pregnancies = [pregnancy for key, pregnancy in keys.items() if key in claimed]
         
+        # Une campagne par semaine : contenu et message calculés une fois, puis coût estimé
+        campaigns = {}
         for pregnancy in pregnancies:
-            user_id = pregnancy['user_id']
-            week = pregnancy.get('current_week', 0)
-            trimester = pregnancy.get('trimester', 1)
-            
-            if week > 0:
-                development_info = self.get_week_development(week)
+            key = (pregnancy.get('current_week', 0), pregnancy.get('trimester', 1))
+            campaigns.setdefault(key, []).append(pregnancy['user_id'])
+        
+        messages = []
+        for (week, trimester), user_ids in campaigns.items():
+            message = render_notification('pregnancy', shared={
+                'week': week,
+                'trimester': trimester,
+                'development': self.get_week_development(week),
+                'next_milestone': self.get_next_milestone(week)
+            })
+            messages.append((message, len(user_ids)))
+        
+        estimate = estimate_campaign(messages)
+        logger.info("Campagne hebdomadaire : %s SMS, %s segments (%s en UCS-2)",
+                    estimate['messages'], estimate['segments'], estimate['ucs2_messages'],
+                    extra=estimate)
+        
+        for (week, trimester), user_ids in campaigns.items():
+            development_info = self.get_week_development(week)
+            for user_id in user_ids:
                 self.send_weekly_pregnancy_update(user_id, week, trimester, development_info)
+        
+        return estimate
     
     def send_vaccine_reminders(self):
-        """Envoie les rappels de vaccins"""
-        print("💉 Envoi des rappels de vaccins")
+        """Envoie les rappels de vaccins (échéances du jour et doses en retard)"""
+        logger.info("Envoi des rappels de vaccins")
         
-        # Récupérer tous les utilisateurs avec enfants
-        users = db_manager.get_users_with_children()
+        # Une seule requête par plage sur vaccine_due : échéances atteintes dans la fenêtre
+        now = datetime.utcnow()
+        start, _ = reminder_window(now)
+        due = db_manager.get_vaccine_due(start=start, end=now, status='pending')
         
-        for user in users:
-            user_id = str(user['_id'])
-            children = user.get('children', [])
-            
-            for child in children:
-                if 'birth_date' in child:
-                    # Vérifier les vaccins à venir
-                    upcoming_vaccines = self.get_upcoming_vaccines(child['birth_date'])
-                    
-                    for vaccine in upcoming_vaccines:
-                        if vaccine['status'] == 'due':
-                            self.send_vaccine_reminder(
-                                user_id,
-                                child.get('name', 'Bébé'),
-                                vaccine['vaccines'],
-                                vaccine['due_date']
-                            )
+        # Les relances de retard partent dans le même message que les échéances du jour
+        overdue = db_manager.get_overdue_vaccines(now)
+        
+        return self.send_vaccine_digests(due + overdue, now, overdue_ids={entry['_id'] for entry in overdue})
     
     def check_overdue_vaccines(self):
         """Vérifie les vaccins en retard"""
-        users = db_manager.get_users_with_children()
+        # Parcours indexé (status, due_date) des seules doses non enregistrées
+        overdue = db_manager.get_overdue_vaccines()
         
-        for user in users:
-            user_id = str(user['_id'])
-            children = user.get('children', [])
-            
-            for child in children:
-                if 'birth_date' in child:
-                    overdue_vaccines = self.get_overdue_vaccines(child['birth_date'])
-                    
-                    for vaccine in overdue_vaccines:
-                        self.send_vaccine_reminder(
-                            user_id,
-                            child.get('name', 'Bébé'),
-                            vaccine['vaccines'],
-                            vaccine['due_date']
-                        )
+        self.send_vaccine_digests(overdue, overdue_ids={entry['_id'] for entry in overdue})
     
-    def get_next_milestone(self, current_week):
-        """Calcule la prochaine étape importante"""
-        milestones = {
-            12: "Échographie de datation",
-            22: "Échographie morphologique",
-            32: "Dernière échographie",
-            36: "Consultation pré-anesthésique",
-            40: "Terme prévu"
+    def notification_key(self, user_id, notification_type, subject, now=None):
+        """Clé d'idempotence (utilisateur, type, sujet, jour)"""
+        day = (now or datetime.utcnow()).strftime('%Y-%m-%d')
+        return f"{user_id}:{notification_type}:{subject}:{day}"
+    
+    def send_vaccine_digests(self, entries, now=None, overdue_ids=frozenset()):
+        """Envoie au plus un rappel vaccin par famille et par jour
+        
+        Chaque dose (enfant, étape) est réservée dans notification_keys : une dose
+        déjà rappelée aujourd'hui par un autre job est ignorée. Les doses restantes
+        d'un même utilisateur sont regroupées en un seul SMS. Seules les doses en
+        retard (overdue_ids) réservées et effectivement envoyées sont horodatées
+        comme relancées : un envoi ignoré ou en échec sera retenté le lendemain.
+        """
+        now = now or datetime.utcnow()
+        
+        keyed = {}
+        for entry in entries:
+            subject = f"{entry.get('child_id')}.{entry['milestone']}"
+            keyed.setdefault(self.notification_key(entry['user_id'], 'vaccine', subject, now), entry)
+        
+        claimed = db_manager.claim_notification_keys(keyed, now)
+        
+        by_user = {}
+        for key, entry in keyed.items():
+            if key in claimed:
+                by_user.setdefault(entry['user_id'], []).append(entry)
+        
+        # Téléphones de toutes les familles en une seule requête
+        phones = db_manager.get_user_phones(by_user.keys())
+        
+        sent = 0
+        reminded = []
+        for user_id, user_entries in by_user.items():
+            phone = phones.get(user_id)
+            if not phone:
+                continue
+            if len(user_entries) == 1:
+                entry = user_entries[0]
+                success = self.send_vaccine_reminder(
+                    user_id,
+                    entry.get('child_name', 'Bébé'),
+                    entry['vaccines'],
+                    entry['due_date'],
+                    phone
+                )
+            else:
+                success = self.send_vaccine_digest(user_id, user_entries, phone)
+            sent += bool(success)
+            if success:
+                reminded.extend(entry['_id'] for entry in user_entries if entry.get('_id') in overdue_ids)
+        
+        db_manager.mark_vaccine_reminded(reminded)
+        
+        logger.info("%s rappels de vaccins envoyés (%s déjà envoyés aujourd'hui)", sent, len(keyed) - len(claimed))
+        return sent
+    
+    @NOTIFICATION_SEND_SECONDS.time(type='vaccine_digest')
+    def send_vaccine_digest(self, user_id, entries, phone=None):
+        """Envoie en un seul message plusieurs rappels de vaccins d'une famille"""
+        if phone is None:
+            phone = (db_manager.get_user_by_id(user_id) or {}).get('phone')
+        if not phone:
+            return False
+        
+        entries = sorted(entries, key=lambda entry: entry['due_date'])
+        reminders = [
+            {
+                'child_name': entry.get('child_name', 'Bébé'),
+                'vaccines': ', '.join(entry['vaccines']),
+                'due_date': entry['due_date']
+            }
+            for entry in entries
+        ]
+        children = ', '.join(dict.fromkeys(reminder['child_name'] for reminder in reminders))
+        
+        message = render_notification('vaccine_digest', reminders='\n'.join(
+            render_notification('vaccine_digest', 'line', **reminder) for reminder in reminders
+        ))
+        
+        sms_sent = self.send_sms(phone, message)
+        
+        push_sent = self.send_push_notification(
+            user_id,
+            render_notification('vaccine_digest', 'push_title', count=len(reminders)),
+            render_notification('vaccine_digest', 'push_body', children=children),
+            'vaccine'
+        )
+        
+        # Une seule notification en base pour l'ensemble des rappels
+        notification_data = {
+            'user_id': user_id,
+            'type': 'vaccine',
+            'title': 'Rappels vaccins',
+            'message': ' ; '.join(f"{r['child_name']} - {r['vaccines']}" for r in reminders),
+            'data': {
+                'reminders': [dict(reminder, status='pending') for reminder in reminders]
+            },
+            'read': False,
+            'created_at': datetime.utcnow()
         }
+        db_manager.save_notification(notification_data)
         
-        for week, milestone in milestones.items():
-            if week > current_week:
-                return f"{milestone} (semaine {week})"
+        return sms_sent or push_sent
+    
+    def get_next_milestone(self, current_week):
+        """Calcule la prochaine étape importante"""
+        week, milestone = next_milestone(current_week)
+        if week:
+            return f"{milestone} (semaine {week})"
         
         return "Fin de la grossesse"
     
     def get_week_development(self, week):
         """Retourne les infos de développement pour la semaine"""
-        developments = {
-            1: "Première semaine - Début du voyage !",
-            4: "Cœur qui commence à battre",
-            8: "Tous les organes sont présents",
-            12: "Bébé fait ses premiers mouvements",
-            16: "Peut sucer son pouce",
-            20: "Vous pouvez sentir les mouvements",
-            24: "Bébé est viable",
-            28: "Ouverture des yeux",
-            32: "Bébé prend sa position finale",
-            36: "Prêt à naître !",
-            40: "Terme - Prêt pour la rencontre !"
-        }
-        
-        # Trouver la description la plus proche
-        closest_week = min(developments.keys(), key=lambda x: abs(x - week))
-        return developments.get(closest_week, "Développement en cours")
+        return week_content(week)['summary']
     
     def get_upcoming_vaccines(self, birth_date):
-        """Retourne les vaccins à venir (simplifié)"""
-        # À remplacer par votre logique réelle de vaccine_tracker
-        return []
+        """Retourne les vaccins à venir ou échus dans la fenêtre de rappel"""
+        upcoming = VaccineTracker().get_upcoming_vaccines(birth_date)
+        return [dict(vaccine, due_date=vaccine['recommended_date']) for vaccine in upcoming]
     
-    def get_overdue_vaccines(self, birth_date):
-        """Retourne les vaccins en retard (simplifié)"""
-        # À remplacer par votre logique réelle de vaccine_tracker
-        return []
+    def get_overdue_vaccines(self, birth_date, vaccines_done=None):
+        """Retourne les vaccins en retard sans dose enregistrée"""
+        overdue = VaccineTracker().get_overdue_vaccines(birth_date, vaccines_done)
+        return [dict(vaccine, due_date=vaccine['recommended_date']) for vaccine in overdue]
     
     def log_notification(self, recipient, notification_type, status, content):
         """Enregistre une notification dans les logs"""
@@ -359,9 +511,9 @@ class EnhancedNotificationService:
             # À implémenter : sauvegarder dans la base de données
             pass
         except Exception as e:
-            print(f"❌ Erreur log notification: {e}")
+            logger.error("Erreur log notification: %s", e)
 
-# Instance globale
+# Instance globale (client Twilio et scheduler initialisés par processus via init_worker)
 notification_service = EnhancedNotificationService()
 
 # Fonctions d'interface
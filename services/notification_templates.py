@@ -0,0 +1,196 @@
+from functools import lru_cache
+from string import Formatter
+
+# ============ GABARITS DE NOTIFICATIONS ============
+#
+# Chaque type de notification a un gabarit SMS et un gabarit push compilés une
+# fois à l'import : le texte est découpé en morceaux littéraux et en champs
+# `{nom}` / `{nom:format}`. bind() pré-rend les parties communes à toute une
+# campagne (même semaine, même vaccin...) ; render() ne formate plus que les
+# champs propres au destinataire.
+
+class NotificationTemplate:
+    """Gabarit compilé : morceaux littéraux (str) et champs (nom, format)"""
+    __slots__ = ('parts', 'fields')
+
+    def __init__(self, source=None, parts=None):
+        if parts is None:
+            parts = []
+            for literal, field, spec, _ in Formatter().parse(source):
+                if literal:
+                    parts.append(literal)
+                if field is not None:
+                    parts.append((field, spec or ''))
+
+        # Fusion des littéraux adjacents : un gabarit entièrement lié devient une chaîne
+        merged = []
+        for part in parts:
+            if isinstance(part, str) and merged and isinstance(merged[-1], str):
+                merged[-1] += part
+            else:
+                merged.append(part)
+
+        self.parts = tuple(merged)
+        self.fields = frozenset(part[0] for part in self.parts if not isinstance(part, str))
+
+    def bind(self, **values):
+        """Nouveau gabarit où les champs fournis sont déjà rendus"""
+        return NotificationTemplate(parts=[
+            format(values[part[0]], part[1])
+            if not isinstance(part, str) and part[0] in values else part
+            for part in self.parts
+        ])
+
+    def render(self, **values):
+        """Rend le gabarit ; les champs manquants lèvent KeyError"""
+        if not self.fields:
+            return self.parts[0] if self.parts else ''
+        return ''.join(
+            part if isinstance(part, str) else format(values[part[0]], part[1])
+            for part in self.parts
+        )
+
+SIGNATURE = "-- Maman & Bébé --"
+
+# Gabarits par type : SMS, titre et corps de la notification push
+NOTIFICATION_TEMPLATES = {
+    'vaccine': {
+        'sms': ("💉 Rappel vaccin pour {child_name}\n"
+                "Vaccins: {vaccines}\n"
+                "Date recommandée: {due_date:%d/%m/%Y}\n"
+                "📞 Prenez RDV avec votre pédiatre\n"
+                + SIGNATURE),
+        'push_title': "💉 Rappel vaccin",
+        'push_body': "{child_name} : {vaccines}",
+    },
+    # Tous les rappels vaccins du jour d'une famille, regroupés en un seul message
+    'vaccine_digest': {
+        'sms': ("💉 Rappels vaccins du jour\n"
+                "{reminders}\n"
+                "📞 Prenez RDV avec votre pédiatre\n"
+                + SIGNATURE),
+        'line': "• {child_name} : {vaccines} ({due_date:%d/%m/%Y})",
+        'push_title': "💉 {count} rappels vaccins",
+        'push_body': "{children}",
+    },
+    'emergency': {
+        'sms': ("🚨 ALERTE SANTÉ 🚨\n"
+                "Symptômes signalés: {symptoms}\n"
+                "📞 Contactez IMMÉDIATEMENT le 15 (SAMU)\n"
+                "⚠️ Ne prenez aucun risque\n"
+                + SIGNATURE),
+        'push_title': "🚨 Alerte Urgente",
+        'push_body': "Symptômes: {symptoms_preview}...",
+    },
+    'pregnancy': {
+        'sms': ("🤰 Semaine {week} de grossesse\n"
+                "🎉 {trimester}ème trimestre\n"
+                "👶 {development}\n"
+                "📅 Prochaine étape dans {next_milestone}\n"
+                "❤️ Prenez soin de vous\n"
+                + SIGNATURE),
+        'push_title': "🤰 Semaine {week}",
+        'push_body': "Vous êtes dans votre {trimester}ème trimestre",
+    },
+    'milestone': {
+        'sms': ("🎯 ÉTAPE IMPORTANTE\n"
+                "Semaine {milestone_week}: {milestone_text}\n"
+                "📅 Préparez votre rendez-vous\n"
+                "📋 Préparez vos questions\n"
+                + SIGNATURE),
+        'push_title': "🎯 Semaine {milestone_week}",
+        'push_body': "{milestone_text}",
+    },
+    'appointment': {
+        'sms': ("📅 RAPPEL RENDEZ-VOUS\n"
+                "Type: {appointment_type}\n"
+                "Date: {date:%d/%m/%Y à %H:%M}\n"
+                "Avec: {doctor}\n"
+                "📌 N'oubliez pas votre carte vitale\n"
+                + SIGNATURE),
+        'push_title': "📅 Rappel RDV",
+        'push_body': "{appointment_type} - {date:%d/%m à %H:%M}",
+    },
+}
+
+COMPILED_TEMPLATES = {
+    notification_type: {name: NotificationTemplate(source) for name, source in templates.items()}
+    for notification_type, templates in NOTIFICATION_TEMPLATES.items()
+}
+
+def get_template(notification_type, name='sms'):
+    """Gabarit compilé d'un type de notification"""
+    return COMPILED_TEMPLATES[notification_type][name]
+
+@lru_cache(maxsize=512)
+def _bound(notification_type, name, shared):
+    return get_template(notification_type, name).bind(**dict(shared))
+
+def template_cache_stats():
+    """Succès et échecs du cache des gabarits liés"""
+    info = _bound.cache_info()
+    return {'hits': info.hits, 'misses': info.misses, 'entries': info.currsize}
+
+def render_notification(notification_type, name='sms', shared=None, **values):
+    """Rend un gabarit ; les valeurs `shared` (communes à une campagne) sont pré-rendues une fois
+
+    `shared` est un dict de valeurs hachables : le gabarit lié est mis en cache,
+    si bien que tous les destinataires d'une même semaine ou d'un même vaccin
+    réutilisent le texte déjà formaté.
+    """
+    if shared:
+        template = _bound(notification_type, name, tuple(sorted(shared.items())))
+    else:
+        template = get_template(notification_type, name)
+    return template.render(**values)
+
+# ============ SEGMENTS SMS ============
+#
+# Un SMS tient en 160 caractères GSM-7 (153 par segment s'il est découpé) ou,
+# dès qu'un caractère hors alphabet GSM apparaît (emoji, œ...), en 70 unités
+# UTF-16 en UCS-2 (67 par segment). Les caractères de l'extension GSM comptent
+# double. Chaque segment est facturé séparément.
+
+GSM7_BASIC = frozenset(
+    "@£$¥èéùìòÇ\nØø\rÅåΔ_ΦΓΛΩΠΨΣΘΞÆæßÉ !\"#¤%&'()*+,-./0123456789:;<=>?"
+    "¡ABCDEFGHIJKLMNOPQRSTUVWXYZÄÖÑÜ§¿abcdefghijklmnopqrstuvwxyzäöñüà"
+)
+GSM7_EXTENSION = frozenset("^{}\\[~]|€\f")
+
+GSM7_SINGLE, GSM7_MULTI = 160, 153
+UCS2_SINGLE, UCS2_MULTI = 70, 67
+
+def sms_encoding(text):
+    """'GSM-7' si tout le texte tient dans l'alphabet GSM, sinon 'UCS-2'"""
+    for char in text:
+        if char not in GSM7_BASIC and char not in GSM7_EXTENSION:
+            return 'UCS-2'
+    return 'GSM-7'
+
+def sms_segments(text):
+    """Encodage, longueur encodée et nombre de segments facturés d'un SMS"""
+    encoding = sms_encoding(text)
+    if encoding == 'GSM-7':
+        length = len(text) + sum(1 for char in text if char in GSM7_EXTENSION)
+        single, multi = GSM7_SINGLE, GSM7_MULTI
+    else:
+        # Les caractères hors plan de base (emojis) occupent deux unités UTF-16
+        length = len(text.encode('utf-16-le')) // 2
+        single, multi = UCS2_SINGLE, UCS2_MULTI
+
+    if length <= single:
+        segments = 1 if length else 0
+    else:
+        segments = -(-length // multi)
+    return {'encoding': encoding, 'length': length, 'segments': segments}
+
+def estimate_campaign(messages):
+    """Segments à facturer pour une campagne : itérable de (message, nombre de destinataires)"""
+    estimate = {'messages': 0, 'segments': 0, 'ucs2_messages': 0}
+    for message, recipients in messages:
+        info = sms_segments(message)
+        estimate['messages'] += recipients
+        estimate['segments'] += info['segments'] * recipients
+        if info['encoding'] == 'UCS-2':
+            estimate['ucs2_messages'] += recipients
+    return estimate
@@ -0,0 +1,48 @@
+import base64
+from datetime import datetime
+from bson import ObjectId
+from bson.errors import InvalidId
+
+# ============ PAGINATION PAR CURSEUR (KEYSET) ============
+#
+# Les listes sont triées par (champ date décroissant, _id décroissant). Le curseur
+# encode la clé du dernier document renvoyé ; la page suivante reprend strictement
+# après cette clé, sans skip : coût constant quelle que soit la profondeur.
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 50
+
+def page_size(limit, default=DEFAULT_PAGE_SIZE):
+    """Taille de page demandée, bornée à MAX_PAGE_SIZE"""
+    if not limit or limit < 1:
+        return default
+    return min(limit, MAX_PAGE_SIZE)
+
+def encode_cursor(date_value, object_id):
+    """Curseur opaque (base64 url) à partir de la clé (date, _id) d'un document"""
+    raw = f"{date_value.isoformat()}|{object_id}"
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor):
+    """Clé (date, ObjectId) d'un curseur ; ValueError si le curseur est invalide"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        date_part, _, id_part = base64.urlsafe_b64decode(padded).decode('utf-8').partition('|')
+        return datetime.fromisoformat(date_part), ObjectId(id_part)
+    except (ValueError, TypeError, InvalidId, UnicodeDecodeError):
+        raise ValueError("Curseur de pagination invalide")
+
+def keyset_filter(date_field, cursor):
+    """Filtre des documents situés après le curseur dans l'ordre (date desc, _id desc)"""
+    if not cursor:
+        return {}
+
+    date_value, object_id = decode_cursor(cursor)
+    return {'$or': [
+        {date_field: {'$lt': date_value}},
+        {date_field: date_value, '_id': {'$lt': object_id}}
+    ]}
+
+def keyset_sort(date_field):
+    """Tri correspondant à keyset_filter"""
+    return [(date_field, -1), ('_id', -1)]
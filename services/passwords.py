@@ -0,0 +1,167 @@
+import hmac
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+import bcrypt
+from services.metrics import PASSWORD_OPERATION_SECONDS, PASSWORD_POOL_REJECTED
+
+logger = logging.getLogger(__name__)
+
+# ============ MOTS DE PASSE ============
+#
+# bcrypt est volontairement coûteux (~250 ms de CPU en 12 tours) : exécuté sur le
+# thread de la requête, un pic de connexions occupe tous les cœurs et affame
+# /api/chat. Les hachages et vérifications partent donc dans un petit pool de
+# processus par worker (PASSWORD_POOL_SIZE) ; au plus PASSWORD_MAX_PENDING
+# opérations attendent ou s'exécutent, une requête qui ne trouve pas de place en
+# PASSWORD_QUEUE_TIMEOUT secondes reçoit PasswordPoolBusy (503). La conversion
+# des anciens hash SHA-256 vers bcrypt est différée à un thread de fond.
+
+PASSWORD_POOL_SIZE = int(os.getenv('PASSWORD_POOL_SIZE', max(1, (os.cpu_count() or 2) // 2)))
+PASSWORD_MAX_PENDING = int(os.getenv('PASSWORD_MAX_PENDING', PASSWORD_POOL_SIZE * 4))
+PASSWORD_QUEUE_TIMEOUT = float(os.getenv('PASSWORD_QUEUE_TIMEOUT', 2))
+BCRYPT_LOG_ROUNDS = int(os.getenv('BCRYPT_LOG_ROUNDS', 12))
+REHASH_QUEUE_SIZE = int(os.getenv('PASSWORD_REHASH_QUEUE_SIZE', 1000))
+
+# bcrypt ne lit que les 72 premiers octets (au-delà, bcrypt >= 5 lève ValueError)
+BCRYPT_MAX_BYTES = 72
+
+class PasswordPoolBusy(Exception):
+    """Aucune place dans le pool de hachage avant PASSWORD_QUEUE_TIMEOUT"""
+
+def _password_bytes(password):
+    return password.encode('utf-8')[:BCRYPT_MAX_BYTES]
+
+# Exécutées dans les processus du pool (fonctions de module : sérialisables)
+
+def _hash(password, rounds):
+    return bcrypt.hashpw(_password_bytes(password), bcrypt.gensalt(rounds=rounds, prefix=b'2b')).decode('utf-8')
+
+def _check(password_hash, password):
+    password_hash = password_hash.encode('utf-8')
+    return hmac.compare_digest(bcrypt.hashpw(_password_bytes(password), password_hash), password_hash)
+
+def is_bcrypt_hash(password_hash):
+    return bool(password_hash) and password_hash.startswith(('$2b$', '$2a$', '$2y$'))
+
+class PasswordHasher:
+    """Pool borné de hachage bcrypt et file des conversions de hash hérités"""
+
+    def __init__(self, pool_size=PASSWORD_POOL_SIZE, max_pending=PASSWORD_MAX_PENDING,
+                 queue_timeout=PASSWORD_QUEUE_TIMEOUT, rounds=BCRYPT_LOG_ROUNDS):
+        self.pool_size = pool_size
+        self.max_pending = max_pending
+        self.queue_timeout = queue_timeout
+        self.rounds = rounds
+        self._lock = threading.Lock()
+        self._pool = None
+        self._slots = None
+        self._rehash_queue = None
+        self._pid = None
+        self.pending = 0
+
+    def _ensure_started(self):
+        """Pool, sémaphore et thread de conversion propres au processus courant (après un fork)"""
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            # 'spawn' : pas de fork d'un worker multi-thread (verrous hérités). Sous
+            # `python app.py`, chaque processus du pool réimporte app.py : PASSWORD_POOL_SIZE=0
+            # (hachage sur le thread de la requête) convient mieux au développement
+            self._pool = ProcessPoolExecutor(
+                self.pool_size, mp_context=multiprocessing.get_context('spawn')
+            ) if self.pool_size > 0 else None
+            self._slots = threading.BoundedSemaphore(max(self.max_pending, 1))
+            self._rehash_queue = queue.Queue(REHASH_QUEUE_SIZE)
+            self.pending = 0
+            threading.Thread(target=self._rehash_worker, daemon=True).start()
+            self._pid = os.getpid()
+
+    def _run(self, operation, function, *args):
+        self._ensure_started()
+        started = time.perf_counter()
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            PASSWORD_POOL_REJECTED.inc(operation=operation)
+            raise PasswordPoolBusy(f"Pool de hachage saturé ({self.max_pending} opérations en cours)")
+        with self._lock:
+            self.pending += 1
+        try:
+            if self._pool is None:
+                return function(*args)
+            return self._pool.submit(function, *args).result()
+        finally:
+            with self._lock:
+                self.pending -= 1
+            self._slots.release()
+            PASSWORD_OPERATION_SECONDS.observe(time.perf_counter() - started, operation=operation)
+
+    def hash(self, password):
+        """Hash bcrypt d'un mot de passe (pool borné)"""
+        if not password:
+            raise ValueError("Le mot de passe ne peut pas être vide")
+        return self._run('hash', _hash, password, self.rounds)
+
+    def check(self, password_hash, password):
+        """Vérifie un mot de passe contre un hash bcrypt (pool borné)"""
+        if not is_bcrypt_hash(password_hash) or not password:
+            return False
+        return self._run('check', _check, password_hash, password)
+
+    def verify_user(self, user, password):
+        """Vérifie le mot de passe d'un User (bcrypt, ou ancien SHA-256 converti en différé)"""
+        if is_bcrypt_hash(user.password_hash):
+            return self.check(user.password_hash, password)
+        if user.password_hash and user.check_password(password):
+            self.schedule_rehash(user.id, user.password_hash, password)
+            return True
+        return False
+
+    # --- Conversion différée des hash SHA-256 ---
+
+    def schedule_rehash(self, user_id, old_hash, password):
+        """Met en file la conversion bcrypt d'un hash hérité (abandonnée si la file est pleine)"""
+        self._ensure_started()
+        try:
+            self._rehash_queue.put_nowait((user_id, old_hash, password))
+        except queue.Full:
+            logger.warning("File de conversion des mots de passe pleine, conversion reportée: %s", user_id)
+
+    def _rehash_worker(self):
+        from services.database import db_manager
+
+        rehash_queue = self._rehash_queue
+        while True:
+            user_id, old_hash, password = rehash_queue.get()
+            try:
+                new_hash = self._run('rehash', _hash, password, self.rounds)
+                db_manager.upgrade_password_hash(user_id, old_hash, new_hash)
+            except PasswordPoolBusy:
+                # Priorité aux connexions : la conversion sera refaite à la prochaine connexion
+                logger.warning("Conversion du mot de passe reportée (pool saturé): %s", user_id)
+            except Exception as e:
+                logger.error("Erreur conversion mot de passe: %s", e)
+            finally:
+                rehash_queue.task_done()
+
+    def stats(self):
+        """Opérations en cours ou en attente, et conversions en file"""
+        return {
+            'pending': self.pending if self._pid == os.getpid() else 0,
+            'rehash_backlog': self._rehash_queue.qsize() if self._pid == os.getpid() else 0
+        }
+
+# Instance globale (pool créé au premier usage dans chaque processus)
+password_hasher = PasswordHasher()
+
+# Fonctions d'interface
+def hash_password(password):
+    return password_hasher.hash(password)
+
+def check_password(password_hash, password):
+    return password_hasher.check(password_hash, password)
@@ -0,0 +1,92 @@
+from datetime import datetime, timedelta
+
+# ============ CONTENU PAR SEMAINE ============
+#
+# Table unique, indexée par semaine (0 à 42), du développement du bébé, du
+# trimestre et de la prochaine étape de suivi. Construite une fois à l'import ;
+# le suivi de grossesse, les notifications et les routes y lisent en O(1).
+
+MAX_PREGNANCY_WEEK = 42
+
+# Développement du bébé à partir de la semaine indiquée : (texte détaillé, résumé SMS)
+DEVELOPMENT_STAGES = (
+    (0, "Début de grossesse - implantation", "Première semaine - Début du voyage !"),
+    (4, "Cœur qui bat, formation du système nerveux", "Cœur qui commence à battre"),
+    (8, "Tous les organes présents, premiers mouvements", "Tous les organes sont présents"),
+    (12, "Visage formé, échographie de datation", "Bébé fait ses premiers mouvements"),
+    (16, "Mouvements actifs, sexe identifiable", "Peut sucer son pouce"),
+    (20, "Mouvements ressentis, échographie morphologique", "Vous pouvez sentir les mouvements"),
+    (24, "Bébé entend, poumons en développement", "Bébé est viable"),
+    (28, "Ouverture des yeux, sensibilité à la lumière", "Ouverture des yeux"),
+    (32, "Prise de poids rapide, dernière échographie", "Bébé prend sa position finale"),
+    (36, "Bébé se positionne, organes matures", "Prêt à naître !"),
+    (40, "Terme, bébé prêt à naître", "Terme - Prêt pour la rencontre !"),
+)
+
+# Étapes de suivi : (semaine, libellé)
+PREGNANCY_MILESTONES = (
+    (12, "Échographie de datation"),
+    (22, "Échographie morphologique"),
+    (32, "Dernière échographie"),
+    (36, "Consultation pré-anesthésique"),
+    (40, "Terme prévu"),
+)
+
+def _build_week_content():
+    table = []
+    for week in range(MAX_PREGNANCY_WEEK + 1):
+        _, development, summary = [stage for stage in DEVELOPMENT_STAGES if stage[0] <= week][-1]
+        milestone_week, milestone = next(
+            ((m_week, label) for m_week, label in PREGNANCY_MILESTONES if m_week > week),
+            (None, None)
+        )
+        table.append({
+            'week': week,
+            'trimester': 1 if week < 14 else 2 if week < 28 else 3,
+            'development': development,
+            'summary': summary,
+            'next_milestone_week': milestone_week,
+            'next_milestone': milestone
+        })
+    return tuple(table)
+
+WEEK_CONTENT = _build_week_content()
+
+def week_content(week):
+    """Contenu de la semaine (bornée à 0–42)"""
+    return WEEK_CONTENT[min(max(week, 0), MAX_PREGNANCY_WEEK)]
+
+def trimester_for_week(week):
+    """Trimestre correspondant à une semaine"""
+    return week_content(week)['trimester']
+
+def next_milestone(week):
+    """Prochaine étape (semaine, libellé) après la semaine donnée, sinon (None, None)"""
+    content = week_content(week)
+    return content['next_milestone_week'], content['next_milestone']
+
+# ============ AVANCEMENT DE GROSSESSE MATÉRIALISÉ ============
+#
+# current_week, trimester et la prochaine étape sont stockés sur les documents
+# pregnancies. next_week_at (date du prochain changement de semaine) permet au
+# job quotidien de ne relire que les grossesses dont la semaine change.
+
+def week_for_date(start_date, now=None):
+    """Semaine de grossesse (semaines entières écoulées depuis start_date)"""
+    now = now or datetime.utcnow()
+    return (now - start_date).days // 7
+
+def progress_fields(start_date, now=None):
+    """Champs d'avancement à stocker sur un document pregnancies"""
+    now = now or datetime.utcnow()
+    week = week_for_date(start_date, now)
+    content = week_content(week)
+
+    return {
+        'current_week': week,
+        'trimester': content['trimester'],
+        'next_milestone_week': content['next_milestone_week'],
+        'next_milestone': content['next_milestone'],
+        'next_week_at': start_date + timedelta(weeks=week + 1) if week < MAX_PREGNANCY_WEEK else None,
+        'progress_updated_at': now
+    }
@@ -0,0 +1,292 @@
+import contextvars
+import logging
+import os
+import threading
+import time
+from functools import wraps
+from pymongo import monitoring
+
+logger = logging.getLogger(__name__)
+
+# ============ PROFILEUR DE REQUÊTES MONGODB ============
+#
+# Un CommandListener pymongo chronomètre chaque commande et la range sous sa
+# « forme » : commande, collection et structure du filtre / tri / pipeline, sans
+# aucune valeur. Les statistiques sont agrégées par (forme, méthode de
+# MongoDBManager) sur une fenêtre glissante de deux périodes. Au-delà de
+# SLOW_QUERY_EXPLAIN_MS (si défini), le plan d'exécution de la forme est
+# journalisé, au plus une fois par heure et hors du thread de la requête.
+
+SLOW_QUERY_MS = float(os.getenv('SLOW_QUERY_MS', 100))
+SLOW_QUERY_EXPLAIN_MS = float(os.getenv('SLOW_QUERY_EXPLAIN_MS', 0)) or None
+PROFILER_WINDOW_SECONDS = int(os.getenv('QUERY_PROFILER_WINDOW', 900))
+PROFILER_MAX_SHAPES = int(os.getenv('QUERY_PROFILER_MAX_SHAPES', 500))
+EXPLAIN_INTERVAL_SECONDS = 3600
+
+# Commandes internes du pilote ou du serveur, non profilées
+IGNORED_COMMANDS = frozenset({
+    'explain', 'ping', 'hello', 'ismaster', 'isMaster', 'buildInfo', 'saslStart',
+    'saslContinue', 'endSessions', 'killCursors', 'getMore'
+})
+EXPLAINABLE_COMMANDS = frozenset({'find', 'aggregate', 'count', 'distinct', 'update', 'delete', 'findAndModify'})
+
+# Champs de session et de transport retirés avant un explain
+_TRANSPORT_FIELDS = ('lsid', '$db', '$clusterTime', 'txnNumber', '$readPreference', 'autocommit')
+
+_current_method = contextvars.ContextVar('mongodb_method', default=None)
+
+def track_methods(cls, exclude=()):
+    """Rattache les commandes émises par les méthodes publiques d'une classe à leur nom"""
+    for name, attribute in list(vars(cls).items()):
+        if name.startswith('_') or name in exclude or not callable(attribute):
+            continue
+
+        def wrapper(f, name=name):
+            @wraps(f)
+            def decorated_function(*args, **kwargs):
+                token = _current_method.set(name)
+                try:
+                    return f(*args, **kwargs)
+                finally:
+                    _current_method.reset(token)
+            return decorated_function
+
+        setattr(cls, name, wrapper(attribute))
+    return cls
+
+def value_shape(value):
+    """Structure d'une valeur de filtre : opérateurs et clés conservés, valeurs masquées"""
+    if isinstance(value, dict):
+        return {key: value_shape(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        # $and / $or : liste de sous-filtres ; $in : liste de valeurs
+        shapes = [value_shape(item) for item in value if isinstance(item, dict)]
+        return shapes if shapes else '[?]'
+    return '?'
+
+def _describe(shape):
+    if isinstance(shape, dict):
+        return '{' + ', '.join(f"{key}: {_describe(item)}" for key, item in shape.items()) + '}'
+    if isinstance(shape, list):
+        return '[' + ', '.join(_describe(item) for item in shape) + ']'
+    return str(shape)
+
+def command_shape(command_name, command):
+    """(collection, forme textuelle) d'une commande MongoDB"""
+    collection = command.get(command_name)
+    if not isinstance(collection, str):
+        collection = None
+    parts = [command_name, collection or '-']
+
+    if command_name == 'find':
+        parts.append(_describe(value_shape(command.get('filter', {}))))
+        if command.get('sort'):
+            parts.append('sort ' + _describe(dict(command['sort'])))
+        if command.get('projection'):
+            parts.append('projection ' + ','.join(command['projection']))
+        if command.get('limit'):
+            parts.append('limit ?')
+    elif command_name == 'aggregate':
+        stages = []
+        for stage in command.get('pipeline', []):
+            operator = next(iter(stage), '?')
+            if operator in ('$match', '$sort', '$group'):
+                stages.append(f"{operator} {_describe(value_shape(stage[operator]))}")
+            else:
+                stages.append(operator)
+        parts.append(' | '.join(stages))
+    elif command_name in ('update', 'delete'):
+        statements = command.get('updates' if command_name == 'update' else 'deletes', [])
+        filters = {_describe(value_shape(statement.get('q', {}))) for statement in statements}
+        parts.append(' ; '.join(sorted(filters)))
+        if command_name == 'update':
+            operators = {key for statement in statements
+                         for key in (statement.get('u') or {}) if str(key).startswith('$')}
+            if operators:
+                parts.append('set ' + ','.join(sorted(operators)))
+    elif command_name in ('count', 'distinct'):
+        parts.append(_describe(value_shape(command.get('query', {}))))
+    elif command_name == 'findAndModify':
+        parts.append(_describe(value_shape(command.get('query', {}))))
+
+    return collection, ' '.join(parts)
+
+def documents_returned(command_name, reply):
+    """Nombre de documents renvoyés ou modifiés d'après la réponse du serveur"""
+    cursor = reply.get('cursor')
+    if isinstance(cursor, dict):
+        return len(cursor.get('firstBatch') or cursor.get('nextBatch') or [])
+    if command_name in ('update', 'findAndModify'):
+        return reply.get('nModified', reply.get('n', 0))
+    if 'n' in reply:
+        return reply['n']
+    if command_name == 'distinct':
+        return len(reply.get('values', []))
+    return 0
+
+class _ShapeStats:
+    __slots__ = ('shape', 'collection', 'method', 'count', 'slow_count', 'failures',
+                 'total_ms', 'max_ms', 'documents', 'last_seen')
+
+    def __init__(self, shape, collection, method):
+        self.shape = shape
+        self.collection = collection
+        self.method = method
+        self.count = 0
+        self.slow_count = 0
+        self.failures = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.documents = 0
+        self.last_seen = 0.0
+
+    def merge(self, other):
+        self.count += other.count
+        self.slow_count += other.slow_count
+        self.failures += other.failures
+        self.total_ms += other.total_ms
+        self.max_ms = max(self.max_ms, other.max_ms)
+        self.documents += other.documents
+        self.last_seen = max(self.last_seen, other.last_seen)
+
+class QueryProfiler(monitoring.CommandListener):
+    """Profileur des commandes MongoDB de ce processus"""
+
+    def __init__(self, slow_ms=SLOW_QUERY_MS, explain_ms=SLOW_QUERY_EXPLAIN_MS,
+                 window_seconds=PROFILER_WINDOW_SECONDS, max_shapes=PROFILER_MAX_SHAPES):
+        self.slow_ms = slow_ms
+        self.explain_ms = explain_ms
+        self.window_seconds = window_seconds
+        self.max_shapes = max_shapes
+        self.client = None
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._current = {}
+        self._previous = {}
+        self._window_started = time.monotonic()
+        self._explained = {}
+
+    # --- Événements pymongo (thread de la requête : aucun accès réseau ici) ---
+
+    def started(self, event):
+        if event.command_name in IGNORED_COMMANDS:
+            return
+        collection, shape = command_shape(event.command_name, event.command)
+        command = event.command if self.explain_ms and event.command_name in EXPLAINABLE_COMMANDS else None
+        with self._lock:
+            self._pending[(event.connection_id, event.request_id)] = (
+                shape, collection, _current_method.get(), event.database_name, command
+            )
+
+    def succeeded(self, event):
+        self._finish(event, documents_returned(event.command_name, event.reply), failed=False)
+
+    def failed(self, event):
+        self._finish(event, 0, failed=True)
+
+    def _finish(self, event, documents, failed):
+        with self._lock:
+            pending = self._pending.pop((event.connection_id, event.request_id), None)
+        if pending is None:
+            return
+
+        shape, collection, method, database_name, command = pending
+        duration_ms = event.duration_micros / 1000
+        self.record(shape, collection, method, duration_ms, documents, failed)
+
+        if command is not None and duration_ms >= self.explain_ms:
+            self._schedule_explain(shape, database_name, command, duration_ms)
+
+    # --- Agrégation ---
+
+    def record(self, shape, collection, method, duration_ms, documents=0, failed=False):
+        now = time.monotonic()
+        key = (shape, method)
+        with self._lock:
+            if now - self._window_started >= self.window_seconds:
+                self._previous = self._current
+                self._current = {}
+                self._window_started = now
+
+            stats = self._current.get(key)
+            if stats is None:
+                if len(self._current) >= self.max_shapes:
+                    # Fenêtre pleine : la forme la moins coûteuse laisse sa place
+                    cheapest = min(self._current, key=lambda k: self._current[k].total_ms)
+                    del self._current[cheapest]
+                stats = self._current[key] = _ShapeStats(shape, collection, method)
+
+            stats.count += 1
+            stats.total_ms += duration_ms
+            stats.max_ms = max(stats.max_ms, duration_ms)
+            stats.documents += documents
+            stats.last_seen = time.time()
+            if duration_ms >= self.slow_ms:
+                stats.slow_count += 1
+            if failed:
+                stats.failures += 1
+
+    def top(self, limit=20, sort='max_ms'):
+        """Formes de requêtes les plus lentes des deux dernières fenêtres"""
+        with self._lock:
+            merged = {}
+            for window in (self._previous, self._current):
+                for key, stats in window.items():
+                    if key not in merged:
+                        merged[key] = _ShapeStats(stats.shape, stats.collection, stats.method)
+                    merged[key].merge(stats)
+
+        if sort not in ('max_ms', 'total_ms', 'slow_count', 'count', 'avg_ms'):
+            sort = 'max_ms'
+        rows = [
+            {
+                'shape': stats.shape,
+                'collection': stats.collection,
+                'method': stats.method,
+                'count': stats.count,
+                'slow_count': stats.slow_count,
+                'failures': stats.failures,
+                'avg_ms': round(stats.total_ms / stats.count, 3),
+                'max_ms': round(stats.max_ms, 3),
+                'total_ms': round(stats.total_ms, 3),
+                'avg_documents': round(stats.documents / stats.count, 1),
+                'last_seen': stats.last_seen
+            }
+            for stats in merged.values()
+        ]
+        rows.sort(key=lambda row: row[sort], reverse=True)
+        return rows[:limit]
+
+    def reset(self):
+        with self._lock:
+            self._pending.clear()
+            self._current = {}
+            self._previous = {}
+            self._window_started = time.monotonic()
+
+    # --- Plans d'exécution ---
+
+    def _schedule_explain(self, shape, database_name, command, duration_ms):
+        now = time.monotonic()
+        with self._lock:
+            last = self._explained.get(shape)
+            if self.client is None or (last is not None and now - last < EXPLAIN_INTERVAL_SECONDS):
+                return
+            self._explained[shape] = now
+
+        explained = {key: value for key, value in command.items() if key not in _TRANSPORT_FIELDS}
+        threading.Thread(
+            target=self._explain, args=(shape, database_name, explained, duration_ms), daemon=True
+        ).start()
+
+    def _explain(self, shape, database_name, command, duration_ms):
+        try:
+            plan = self.client[database_name].command('explain', command, verbosity='queryPlanner')
+            winning = plan.get('queryPlanner', {}).get('winningPlan', plan)
+            logger.warning("Requête lente (%.1f ms) : %s", duration_ms, shape,
+                           extra={'shape': shape, 'duration_ms': duration_ms, 'winning_plan': winning})
+        except Exception as e:
+            logger.error("Erreur explain requête lente: %s", e)
+
+# Instance globale (branchée sur le MongoClient par MongoDBManager.connect)
+query_profiler = QueryProfiler()
@@ -0,0 +1,343 @@
+import calendar
+import json
+import os
+import random
+import struct
+import sys
+import time
+from datetime import datetime, timedelta
+from bson import ObjectId
+from services.pregnancy_progress import MAX_PREGNANCY_WEEK, progress_fields
+from services.vaccine_schedule import SCHEDULE
+from services.vaccine_tracker import build_vaccine_due_entries
+
+# ============ DONNÉES SYNTHÉTIQUES ============
+#
+# Génère des utilisatrices au schéma de MongoDBManager (save_user, save_pregnancy,
+# save_consultation, save_notification, vaccine_due) : enfants avec vaccins faits
+# ou en retard, grossesses réparties sur toutes les semaines, historiques de
+# consultations tirés des patterns de nlp/intents.json et notifications déjà
+# reçues. Chaque utilisatrice est tirée d'un générateur propre (graine, rang) :
+# une même graine redonne les mêmes documents, quel que soit le découpage en
+# lots ou en plages (--start). Les documents sont écrits par insert_many non
+# ordonnés de `batch_size` documents, sans passer par les méthodes unitaires.
+# Lancement : `flask --app app seed --users 1000000` ou `python -m services.seed`.
+
+SEED_EMAIL_DOMAIN = 'seed.example.com'
+SEED_PASSWORD = os.getenv('SEED_PASSWORD', 'MamanBebe2025!')
+DEFAULT_BATCH_SIZE = 5000
+
+SEEDED_COLLECTIONS = ('users', 'pregnancies', 'consultations', 'notifications', 'vaccine_due')
+
+INTENTS_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'nlp', 'intents.json')
+
+# Répartition des profils (champ statut du formulaire d'inscription)
+STATUTS = (('enceinte', 45), ('maman', 40), ('les_deux', 15))
+
+# Intentions des intents (nlp/intents.json) selon le profil
+PREGNANCY_INTENTIONS = frozenset({
+    'grossesse_generale', 'nutrition_grossesse', 'soins_prenatals', 'preparation_accouchement',
+    'sante_mentale', 'symptomes_alerte'
+})
+CHILD_INTENTIONS = frozenset({
+    'alimentation_bebe', 'allaitement', 'developpement_bebe', 'soins_bebe', 'soins_postnatal',
+    'vaccination', 'sante_mentale'
+})
+ALERT_INTENTION = 'symptomes_alerte'
+
+PRENOMS = ('Awa', 'Aminata', 'Fatoumata', 'Mariam', 'Salimata', 'Rasmata', 'Alimata', 'Adja',
+           'Habibou', 'Safiatou', 'Claire', 'Sophie', 'Julie', 'Nadia', 'Inès', 'Léa')
+NOMS = ('Ouédraogo', 'Sawadogo', 'Compaoré', 'Kaboré', 'Traoré', 'Zongo', 'Ouattara', 'Diallo',
+        'Kiemde', 'Bationo', 'Sanou', 'Coulibaly', 'Martin', 'Bernard', 'Dubois', 'Nikiema')
+PRENOMS_ENFANTS = ('Moussa', 'Issa', 'Ali', 'Yacouba', 'Aïcha', 'Kadi', 'Nafi', 'Rokia',
+                   'Noah', 'Adam', 'Emma', 'Jade', 'Ibrahim', 'Salif', 'Zénabou', 'Bintou')
+GROUPES_SANGUINS = ('O+', 'O+', 'O+', 'A+', 'A+', 'B+', 'B+', 'AB+', 'O-', 'A-', 'B-', '')
+
+def seed_email(index):
+    """Email de l'utilisatrice synthétique de rang `index` (mot de passe SEED_PASSWORD)"""
+    return f"user{index:07d}@{SEED_EMAIL_DOMAIN}"
+
+def seed_phone(index):
+    """Téléphone unique (index users.phone unique) de l'utilisatrice de rang `index`"""
+    return f"+2267{index:07d}"
+
+def load_intents(path=INTENTS_PATH):
+    """Intents ayant des patterns et des réponses, avec leur intention"""
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+
+    intents = []
+    for intent in data.get('intents', []):
+        if not intent.get('patterns') or not intent.get('responses'):
+            continue
+        intents.append({
+            'tag': intent['tag'],
+            'intention': intent.get('intention'),
+            'patterns': intent['patterns'],
+            'responses': intent['responses']
+        })
+    return intents
+
+def _object_id(rng, when):
+    """ObjectId reproductible dont l'horodatage est celui du document"""
+    return ObjectId(struct.pack('>I', calendar.timegm(when.utctimetuple())) + rng.randbytes(8))
+
+def _between(rng, start, end):
+    if end <= start:
+        return start
+    return start + timedelta(seconds=rng.randint(0, int((end - start).total_seconds())))
+
+class SeedGenerator:
+    """Documents d'une utilisatrice synthétique, à partir de (graine, rang)"""
+
+    def __init__(self, seed=42, now=None, password_hash=None, intents=None):
+        self.seed = seed
+        self.now = now or datetime.utcnow().replace(microsecond=0)
+        self.password_hash = password_hash or ''
+        intents = intents if intents is not None else load_intents()
+        self.pregnancy_intents = [i for i in intents if i['intention'] in PREGNANCY_INTENTIONS] or intents
+        self.child_intents = [i for i in intents if i['intention'] in CHILD_INTENTIONS] or intents
+        self.intents = intents
+        self.statuts = [statut for statut, _ in STATUTS]
+        self.weights = [weight for _, weight in STATUTS]
+
+    def user_documents(self, index):
+        """{collection: [documents]} de l'utilisatrice de rang `index`"""
+        rng = random.Random(f"{self.seed}:{index}")
+        now = self.now
+        statut = rng.choices(self.statuts, self.weights)[0]
+
+        date_creation = now - timedelta(days=rng.randint(0, 720), seconds=rng.randint(0, 86399))
+        user_id = _object_id(rng, date_creation)
+        uid = str(user_id)
+
+        children = self._children(rng, statut) if statut != 'enceinte' else []
+        user = {
+            '_id': user_id,
+            'prenom': rng.choice(PRENOMS),
+            'nom': rng.choice(NOMS),
+            'email': seed_email(index),
+            'phone': seed_phone(index),
+            'password_hash': self.password_hash,
+            'date_naissance': datetime(now.year - rng.randint(17, 42), rng.randint(1, 12), rng.randint(1, 28)),
+            'statut': statut,
+            'groupe_sanguin': rng.choice(GROUPES_SANGUINS),
+            'allergies': rng.choice(('', '', '', '', 'Pénicilline', 'Arachide')),
+            'traitements': rng.choice(('', '', '', '', 'Fer', 'Acide folique')),
+            'children': children,
+            # Le rang 0 administre l'application (routes /api/admin)
+            'role': 'admin' if index == 0 else 'user',
+            'is_active': rng.random() < 0.97,
+            'date_creation': date_creation,
+            'date_modification': _between(rng, date_creation, now)
+        }
+
+        documents = {'users': [user], 'pregnancies': [], 'consultations': [], 'notifications': []}
+        if statut in ('enceinte', 'les_deux'):
+            documents['pregnancies'].append(self._pregnancy(rng, uid, date_creation))
+
+        vaccine_due = build_vaccine_due_entries(uid, children)
+        documents['vaccine_due'] = vaccine_due
+
+        documents['consultations'] = self._consultations(rng, uid, statut, date_creation)
+        documents['notifications'] = self._notifications(rng, uid, vaccine_due, documents['consultations'])
+        user['unread_notifications'] = sum(not notification['read'] for notification in documents['notifications'])
+        return documents
+
+    def _children(self, rng, statut):
+        count = rng.choices((1, 2, 3), (60, 30, 10) if statut == 'maman' else (75, 20, 5))[0]
+        children = []
+        # Plus jeune enfant : surtout dans les deux premières années (calendrier vaccinal
+        # chargé), au moins 13 mois si la mère est de nouveau enceinte
+        youngest = 400 if statut == 'les_deux' else 0
+        age_days = int(rng.triangular(youngest, 6 * 365, max(youngest, 200)))
+        for _ in range(count):
+            birth_date = self.now - timedelta(days=age_days)
+            vaccines_done = {}
+            for milestone, days, _ in SCHEDULE:
+                due_date = birth_date + timedelta(days=days)
+                if due_date > self.now:
+                    break
+                # Environ 85 % des doses faites, en général dans les trois semaines
+                if rng.random() < 0.85:
+                    administered_at = due_date + timedelta(days=int(rng.expovariate(1 / 7)))
+                    vaccines_done[milestone] = min(administered_at, self.now)
+
+            child = {
+                'name': rng.choice(PRENOMS_ENFANTS),
+                'birth_date': birth_date,
+                'gender': rng.choice(('F', 'M')),
+                'birth_weight': f"{rng.gauss(3.2, 0.45):.1f}",
+                'created_at': birth_date + timedelta(days=rng.randint(0, 30))
+            }
+            child['child_id'] = str(_object_id(rng, child['created_at']))
+            if vaccines_done:
+                child['vaccines_done'] = vaccines_done
+            children.append(child)
+
+            # Aînés : 15 mois à 4 ans d'écart
+            age_days += rng.randint(450, 1460)
+        return children
+
+    def _pregnancy(self, rng, user_id, date_creation):
+        # Toutes les semaines représentées, de 0 à MAX_PREGNANCY_WEEK
+        week = rng.randint(0, MAX_PREGNANCY_WEEK)
+        start_date = (self.now - timedelta(weeks=week, days=rng.randint(0, 6))).replace(
+            hour=0, minute=0, second=0)
+        created_at = max(start_date, date_creation)
+
+        pregnancy = {
+            '_id': _object_id(rng, created_at),
+            'user_id': user_id,
+            'start_date': start_date,
+            'due_date': start_date + timedelta(days=280),
+            'created_at': created_at,
+            'updated_at': created_at
+        }
+        pregnancy.update(progress_fields(start_date, self.now))
+        pregnancy['week_changed_at'] = start_date + timedelta(weeks=pregnancy['current_week'])
+        return pregnancy
+
+    def _consultations(self, rng, user_id, statut, date_creation):
+        if statut == 'enceinte':
+            preferred = self.pregnancy_intents
+        elif statut == 'maman':
+            preferred = self.child_intents
+        else:
+            preferred = self.pregnancy_intents + self.child_intents
+
+        # Longue traîne : la plupart posent quelques questions, quelques-unes des dizaines
+        count = min(int(rng.expovariate(1 / 8)), 120)
+        consultations = []
+        for _ in range(count):
+            intent = rng.choice(preferred if rng.random() < 0.85 else self.intents)
+            question = rng.choice(intent['patterns'])
+            if intent['intention'] == ALERT_INTENTION:
+                urgency = rng.choice(('high', 'medium', 'medium'))
+            else:
+                urgency = 'medium' if rng.random() < 0.03 else 'low'
+
+            date_consultation = _between(rng, date_creation, self.now)
+            consultations.append({
+                '_id': _object_id(rng, date_consultation),
+                'user_id': user_id,
+                'question': question[:1].upper() + question[1:] + ' ?',
+                'response': rng.choice(intent['responses']),
+                'urgency': urgency,
+                'date_consultation': date_consultation,
+                'status': 'completed'
+            })
+        return consultations
+
+    def _notifications(self, rng, user_id, vaccine_due, consultations):
+        notifications = []
+
+        # Rappels vaccins déjà envoyés (14 jours avant chaque échéance passée)
+        for entry in vaccine_due:
+            created_at = entry['due_date'] - timedelta(days=14)
+            if created_at > self.now or entry['due_date'] < self.now - timedelta(days=730):
+                continue
+            notifications.append(self._notification(rng, user_id, created_at, {
+                'type': 'vaccine',
+                'title': 'Rappel vaccin',
+                'message': f"{entry['child_name']} - {', '.join(entry['vaccines'])}",
+                'data': {
+                    'child_name': entry['child_name'],
+                    'vaccines': entry['vaccines'],
+                    'due_date': entry['due_date'],
+                    'status': 'pending'
+                }
+            }))
+
+        # Alertes des consultations urgentes
+        for consultation in consultations:
+            if consultation['urgency'] != 'high':
+                continue
+            notifications.append(self._notification(rng, user_id, consultation['date_consultation'], {
+                'type': 'emergency',
+                'title': 'Alerte Urgente',
+                'message': f"Symptômes: {consultation['question']}",
+                'data': {'symptoms': consultation['question'], 'timestamp': consultation['date_consultation']}
+            }))
+        return notifications
+
+    def _notification(self, rng, user_id, created_at, fields):
+        # Les anciennes notifications sont presque toutes lues, les récentes moins
+        recent = created_at > self.now - timedelta(days=7)
+        notification = dict(fields, _id=_object_id(rng, created_at), user_id=user_id,
+                            read=rng.random() < (0.35 if recent else 0.9), created_at=created_at)
+        if notification['read']:
+            notification['read_at'] = _between(rng, created_at, min(created_at + timedelta(days=3), self.now))
+        return notification
+
+def seed_database(manager, users, seed=42, start=0, batch_size=DEFAULT_BATCH_SIZE,
+                  now=None, password_hash=None, progress=None):
+    """Insère les utilisatrices de rang [start, start + users) par lots d'insert_many
+
+    Renvoie le nombre de documents insérés par collection. `progress(done, total)`
+    est appelé après chaque lot d'utilisatrices.
+    """
+    generator = SeedGenerator(seed, now, password_hash)
+    buffers = {name: [] for name in SEEDED_COLLECTIONS}
+    counts = dict.fromkeys(SEEDED_COLLECTIONS, 0)
+
+    def flush(name):
+        if buffers[name]:
+            manager.db[name].insert_many(buffers[name], ordered=False)
+            counts[name] += len(buffers[name])
+            buffers[name] = []
+
+    for offset in range(users):
+        for name, documents in generator.user_documents(start + offset).items():
+            buffers[name].extend(documents)
+            if len(buffers[name]) >= batch_size:
+                flush(name)
+        if progress and (offset + 1) % batch_size == 0:
+            progress(offset + 1, users)
+
+    for name in SEEDED_COLLECTIONS:
+        flush(name)
+    if progress and users % batch_size:
+        progress(users, users)
+    return counts
+
+def seed_password_hash(password=SEED_PASSWORD):
+    """Hash bcrypt partagé par toutes les utilisatrices synthétiques (calculé une fois)"""
+    from services.passwords import PasswordHasher
+    return PasswordHasher(pool_size=0).hash(password)
+
+def run_seed(manager, users, seed=42, start=0, batch_size=DEFAULT_BATCH_SIZE, database=None, drop=False):
+    """Applique les migrations puis peuple la base (ou une base voisine `database`)"""
+    from services.migrations import run_migrations
+
+    target = manager.sibling(database) if database else manager
+    if drop:
+        # Supprimer une collection supprime ses index : schema_migrations part avec
+        # elles pour que run_migrations recrée tous les index sur la base vidée
+        for name in SEEDED_COLLECTIONS + ('notification_keys', 'schema_migrations'):
+            target.db[name].drop()
+    run_migrations(target)
+    password_hash = seed_password_hash()
+
+    started = time.perf_counter()
+
+    def progress(done, total):
+        elapsed = time.perf_counter() - started
+        print(f"  {done}/{total} utilisatrices ({done / elapsed:.0f}/s)")
+
+    print(f"🌱 Génération de {users} utilisatrices (graine {seed}) dans {target.db.name}")
+    counts = seed_database(target, users, seed, start, batch_size,
+                           password_hash=password_hash, progress=progress)
+    for name, count in counts.items():
+        print(f"  {name:<14} {count:>10}")
+    print(f"✅ Terminé en {time.perf_counter() - started:.1f}s "
+          f"(connexion : {seed_email(start)} / SEED_PASSWORD)")
+    return counts
+
+if __name__ == '__main__':
+    from dotenv import load_dotenv
+    load_dotenv()
+
+    from services.database import db_manager
+
+    run_seed(db_manager, int(sys.argv[1]) if len(sys.argv) > 1 else 1000)
@@ -0,0 +1,66 @@
+import json
+from datetime import date, datetime
+from bson import ObjectId, Decimal128
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # Encodeur JSON rapide optionnel
+    orjson = None
+
+# ============ SÉRIALISATION BSON -> JSON ============
+#
+# Les documents MongoDB sont renvoyés tels quels par MongoDBManager (ObjectId,
+# datetime) : la conversion a lieu une seule fois, à l'encodage de la réponse.
+# orjson encode nativement dict/list/str/datetime en C et n'appelle json_default
+# que pour les ObjectId ; sans orjson, l'encodeur standard prend le relais.
+
+if orjson:
+    ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+def json_default(value):
+    """Types BSON et dates non gérés nativement par l'encodeur JSON"""
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal128):
+        return str(value.to_decimal())
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    if hasattr(value, 'item'):  # scalaires NumPy (moteur du calendrier vaccinal)
+        return value.item()
+    raise TypeError(f"Type non sérialisable en JSON: {type(value).__name__}")
+
+def dumps_bytes(obj):
+    """Encode un objet (documents MongoDB compris) en JSON UTF-8"""
+    if orjson:
+        return orjson.dumps(obj, default=json_default, option=ORJSON_OPTIONS)
+    return json.dumps(obj, default=json_default, ensure_ascii=False,
+                      separators=(',', ':')).encode('utf-8')
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Fournisseur JSON de Flask (jsonify, tojson) branché sur dumps_bytes"""
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            kwargs.setdefault('default', json_default)
+            return json.dumps(obj, **kwargs)
+        return dumps_bytes(obj).decode('utf-8')
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps_bytes(obj), mimetype=self.mimetype)
+
+def isodate(value):
+    """Filtre Jinja : date ISO (YYYY-MM-DD) d'un datetime ou d'une chaîne ISO"""
+    if isinstance(value, (datetime, date)):
+        return value.strftime('%Y-%m-%d')
+    return str(value)[:10] if value else ''
+
+def init_serialization(app):
+    """Remplace le fournisseur JSON de l'application"""
+    app.json_provider_class = FastJSONProvider
+    app.json = FastJSONProvider(app)
+    app.jinja_env.policies['json.dumps_function'] = app.json.dumps
+    app.jinja_env.filters['isodate'] = isodate
@@ -0,0 +1,97 @@
+from datetime import datetime
+import numpy as np
+
+# Calendrier vaccinal : définition unique (étape, âge en jours, vaccins)
+SCHEDULE = (
+    ('naissance', 0, ('BCG', 'Hépatite B')),
+    ('2_mois', 60, ('DTP', 'Hib', 'Hépatite B', 'Pneumocoque', 'Rotavirus')),
+    ('4_mois', 120, ('DTP', 'Hib', 'Hépatite B', 'Pneumocoque', 'Rotavirus')),
+    ('11_mois', 335, ('DTP', 'Hib', 'Hépatite B', 'Pneumocoque')),
+    ('12_mois', 365, ('ROR', 'Méningocoque C')),
+    ('16_18_mois', 480, ('ROR',)),
+    ('6_ans', 2190, ('DTP',)),
+    ('11_13_ans', 4015, ('DTP', 'Hépatite B', 'HPV')),
+)
+
+# Fenêtre de rappel autour de chaque échéance : 14 jours avant, 30 jours après
+REMINDER_DAYS_BEFORE = 14
+REMINDER_DAYS_AFTER = 30
+
+# Relances des doses en retard : au plus une par semaine, pendant 180 jours
+OVERDUE_REMINDER_INTERVAL_DAYS = 7
+OVERDUE_REMINDER_MAX_DAYS = 180
+
+MILESTONES = tuple(milestone for milestone, _, _ in SCHEDULE)
+MILESTONE_DAYS = {milestone: days for milestone, days, _ in SCHEDULE}
+VACCINE_SCHEDULE = {milestone: list(vaccines) for milestone, _, vaccines in SCHEDULE}
+OFFSETS = np.array([days for _, days, _ in SCHEDULE], dtype='timedelta64[D]')
+
+# Codes de statut par (enfant, étape)
+STATUS_INVALID = -1   # date de naissance absente ou illisible
+STATUS_FUTURE = 0     # échéance lointaine
+STATUS_UPCOMING = 1   # dans les 14 jours précédant l'échéance
+STATUS_DUE = 2        # échéance atteinte, dans la fenêtre de 30 jours
+STATUS_OVERDUE = 3    # fenêtre de rappel dépassée
+
+STATUS_LABELS = {
+    STATUS_INVALID: 'invalid',
+    STATUS_FUTURE: 'future',
+    STATUS_UPCOMING: 'upcoming',
+    STATUS_DUE: 'due',
+    STATUS_OVERDUE: 'overdue'
+}
+
+def to_datetime64(birth_dates):
+    """Convertit une séquence de dates (datetime ou string ISO) en tableau datetime64[D]"""
+    values = []
+    for birth_date in birth_dates:
+        if isinstance(birth_date, datetime):
+            values.append(np.datetime64(birth_date.date(), 'D'))
+        elif isinstance(birth_date, str) and birth_date:
+            try:
+                values.append(np.datetime64(birth_date[:10], 'D'))
+            except ValueError:
+                values.append(np.datetime64('NaT', 'D'))
+        else:
+            values.append(np.datetime64('NaT', 'D'))
+
+    return np.array(values, dtype='datetime64[D]')
+
+def due_dates(birth_dates):
+    """Matrice (enfants x étapes) des dates d'échéance"""
+    birth_dates = np.asarray(birth_dates, dtype='datetime64[D]')
+    return birth_dates[:, None] + OFFSETS[None, :]
+
+def evaluate(birth_dates, today=None):
+    """Statut de chaque étape pour chaque enfant, en une passe vectorisée
+
+    Retourne (dates d'échéance, codes de statut), deux matrices (enfants x étapes).
+    """
+    if today is None:
+        today = datetime.utcnow()
+    today = np.datetime64(today.date() if isinstance(today, datetime) else today, 'D')
+
+    due = due_dates(birth_dates)
+    elapsed = (today - due).astype('timedelta64[D]').astype(np.int64)
+
+    status = np.full(due.shape, STATUS_FUTURE, dtype=np.int8)
+    status[elapsed >= -REMINDER_DAYS_BEFORE] = STATUS_UPCOMING
+    status[elapsed >= 0] = STATUS_DUE
+    status[elapsed > REMINDER_DAYS_AFTER] = STATUS_OVERDUE
+    status[np.isnat(due)] = STATUS_INVALID
+
+    return due, status
+
+def coverage_report(birth_dates, today=None):
+    """Nombre d'enfants par étape et par statut sur toute la population"""
+    _, status = evaluate(birth_dates, today)
+
+    report = {}
+    for column, milestone in enumerate(MILESTONES):
+        counts = np.bincount(status[:, column] + 1, minlength=len(STATUS_LABELS))
+        report[milestone] = {
+            STATUS_LABELS[code]: int(counts[code + 1])
+            for code in STATUS_LABELS if code != STATUS_INVALID
+        }
+
+    return report
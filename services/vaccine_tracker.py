@@ -1,17 +1,81 @@
+import logging
 from datetime import datetime, timedelta
 from services.database import db_manager
+from services import vaccine_schedule
+from services.vaccine_schedule import (
+    SCHEDULE, MILESTONES, MILESTONE_DAYS, VACCINE_SCHEDULE,
+    REMINDER_DAYS_BEFORE, REMINDER_DAYS_AFTER,
+    STATUS_UPCOMING, STATUS_DUE, STATUS_OVERDUE
+)
+
+logger = logging.getLogger(__name__)
+
+def parse_birth_date(birth_date):
+    """Convertit une date de naissance (string ISO ou datetime) en datetime"""
+    if isinstance(birth_date, datetime):
+        return birth_date
+    if isinstance(birth_date, str) and birth_date:
+        try:
+            return datetime.fromisoformat(birth_date.replace('Z', '+00:00'))
+        except ValueError:
+            return None
+    return None
+
+def build_vaccine_due_entries(user_id, children):
+    """Matérialise les échéances vaccinales des enfants pour la collection vaccine_due"""
+    entries = []
+    for child in children or []:
+        if not child:
+            continue
+        birth_date = parse_birth_date(child.get('birth_date'))
+        if not birth_date:
+            continue
+        
+        vaccines_done = child.get('vaccines_done') or {}
+        
+        for milestone, days, vaccines in SCHEDULE:
+            entries.append({
+                'user_id': user_id,
+                'child_id': child.get('child_id'),
+                'child_name': child.get('name', 'Bébé'),
+                'milestone': milestone,
+                'vaccines': list(vaccines),
+                'birth_date': birth_date,
+                'due_date': birth_date + timedelta(days=days),
+                'status': 'completed' if milestone in vaccines_done else 'pending',
+                'administered_at': vaccines_done.get(milestone)
+            })
+    
+    return entries
+
+def reminder_window(now=None):
+    """Bornes (exclusive, inclusive) des échéances à rappeler à la date donnée"""
+    now = now or datetime.utcnow()
+    return now - timedelta(days=REMINDER_DAYS_AFTER + 1), now + timedelta(days=REMINDER_DAYS_BEFORE)
 
 class VaccineTracker:
     def __init__(self):
-        self.vaccine_schedule = {
-            'naissance': ['BCG', 'Hépatite B'],
-            '2_mois': ['DTP', 'Hib', 'Hépatite B', 'Pneumocoque', 'Rotavirus'],
-            '4_mois': ['DTP', 'Hib', 'Hépatite B', 'Pneumocoque', 'Rotavirus'],
-            '11_mois': ['DTP', 'Hib', 'Hépatite B', 'Pneumocoque'],
-            '12_mois': ['ROR', 'Méningocoque C'],
-            '16_18_mois': ['ROR'],
-            '6_ans': ['DTP'],
-            '11_13_ans': ['DTP', 'Hépatite B', 'HPV']
+        self.vaccine_schedule = VACCINE_SCHEDULE
+    
+    def get_user_reminders(self, user_id):
+        """Rappels de vaccins d'un utilisateur lus depuis les échéances matérialisées"""
+        now = datetime.utcnow()
+        start, end = reminder_window(now)
+        entries = db_manager.get_vaccine_due(user_id=user_id, start=start, end=end, status='pending')
+        return [self.entry_to_reminder(entry, now) for entry in entries]
+    
+    def entry_to_reminder(self, entry, now=None):
+        """Convertit une échéance vaccine_due au format des rappels"""
+        now = now or datetime.utcnow()
+        due_date = entry['due_date']
+        return {
+            'milestone': entry['milestone'],
+            'vaccines': entry['vaccines'],
+            'recommended_date': due_date,
+            'status': 'due' if now >= due_date else 'upcoming',
+            'child_name': entry.get('child_name', 'Bébé'),
+            'child_id': entry.get('child_id'),
+            'days_left': max((due_date - now).days, 0)
         }
     
     def get_upcoming_vaccines(self, birth_date):
@@ -19,27 +83,16 @@ class VaccineTracker:
         if isinstance(birth_date, str):
             birth_date = datetime.fromisoformat(birth_date.replace('Z', '+00:00'))
         
-        age_days = (datetime.utcnow() - birth_date).days
+        _, status = vaccine_schedule.evaluate(vaccine_schedule.to_datetime64([birth_date]))
         upcoming = []
         
-        milestones = {
-            'naissance': 0,
-            '2_mois': 60,
-            '4_mois': 120,
-            '11_mois': 335,
-            '12_mois': 365,
-            '16_18_mois': 480,
-            '6_ans': 2190,
-            '11_13_ans': 4015
-        }
-        
-        for milestone, days in milestones.items():
-            if age_days >= days - 14 and age_days <= days + 30:  # Fenêtre ±2 semaines
+        for column, milestone in enumerate(MILESTONES):
+            if status[0, column] in (STATUS_UPCOMING, STATUS_DUE):
                 upcoming.append({
                     'milestone': milestone,
                     'vaccines': self.vaccine_schedule[milestone],
-                    'recommended_date': birth_date + timedelta(days=days),
-                    'status': 'due' if age_days >= days else 'upcoming'
+                    'recommended_date': birth_date + timedelta(days=MILESTONE_DAYS[milestone]),
+                    'status': 'due' if status[0, column] == STATUS_DUE else 'upcoming'
                 })
         
         return upcoming
@@ -47,55 +100,77 @@ class VaccineTracker:
     def send_vaccine_reminders(self):
         """Envoie les rappels de vaccins (à appeler périodiquement)"""
         try:
-            users_col = db_manager.db['users']
-            users_with_children = users_col.find({'children': {'$exists': True, '$ne': []}})
+            now = datetime.utcnow()
+            start, _ = reminder_window(now)
             
-            reminders_sent = 0
-            for user in users_with_children:
-                for child in user.get('children', []):
-                    birth_date = child.get('birth_date')
-                    if birth_date:
-                        upcoming = self.get_upcoming_vaccines(birth_date)
-                        for vaccine_info in upcoming:
-                            if vaccine_info['status'] == 'due':
-                                message = f"Rappel vaccin {child.get('name', 'Bébé')}: {', '.join(vaccine_info['vaccines'])} - Date recommandée: {vaccine_info['recommended_date'].strftime('%d/%m/%Y')}"
-                                
-                                # Envoyer SMS/notification
-                                from services.notification import send_sms_alert
-                                if send_sms_alert(user.get('phone'), message):
-                                    reminders_sent += 1
+            # Une seule requête sur l'index (status, due_date) : échéances atteintes dans la fenêtre
+            entries = db_manager.get_vaccine_due(start=start, end=now, status='pending')
             
-            print(f"📧 {reminders_sent} rappels de vaccins envoyés")
-            return reminders_sent
+            # Dédupliqués et regroupés par famille avec les autres rappels du jour
+            from services.notification import notification_service
+            return notification_service.send_vaccine_digests(entries, now)
         except Exception as e:
-            print(f"❌ Erreur envoi rappels vaccins: {e}")
+            logger.error("Erreur envoi rappels vaccins: %s", e)
             return 0
     
-    def get_child_vaccine_schedule(self, birth_date, child_name="Bébé"):
+    def get_overdue_vaccines(self, birth_date, vaccines_done=None):
+        """Vaccins dont la fenêtre de rappel est dépassée sans dose enregistrée"""
+        if isinstance(birth_date, str):
+            birth_date = datetime.fromisoformat(birth_date.replace('Z', '+00:00'))
+        
+        vaccines_done = vaccines_done or {}
+        _, status = vaccine_schedule.evaluate(vaccine_schedule.to_datetime64([birth_date]))
+        
+        overdue = []
+        for column, milestone in enumerate(MILESTONES):
+            if status[0, column] == STATUS_OVERDUE and milestone not in vaccines_done:
+                overdue.append({
+                    'milestone': milestone,
+                    'vaccines': self.vaccine_schedule[milestone],
+                    'recommended_date': birth_date + timedelta(days=MILESTONE_DAYS[milestone]),
+                    'status': 'overdue'
+                })
+        
+        return overdue
+    
+    def get_child_vaccine_schedule(self, birth_date, child_name="Bébé", vaccines_done=None):
         """Retourne le calendrier vaccinal complet pour un enfant"""
         if isinstance(birth_date, str):
             birth_date = datetime.fromisoformat(birth_date.replace('Z', '+00:00'))
         
+        vaccines_done = vaccines_done or {}
+        _, status = vaccine_schedule.evaluate(vaccine_schedule.to_datetime64([birth_date]))
+        
         schedule = []
-        for milestone, days in {
-            'naissance': 0,
-            '2_mois': 60,
-            '4_mois': 120,
-            '11_mois': 335,
-            '12_mois': 365,
-            '16_18_mois': 480,
-            '6_ans': 2190,
-            '11_13_ans': 4015
-        }.items():
-            vaccine_date = birth_date + timedelta(days=days)
-            status = 'completed' if (datetime.utcnow() - vaccine_date).days > 30 else 'pending'
+        for column, milestone in enumerate(MILESTONES):
+            # Seule une dose enregistrée marque l'étape comme faite
+            if milestone in vaccines_done:
+                dose_status = 'completed'
+            elif status[0, column] == STATUS_OVERDUE:
+                dose_status = 'overdue'
+            else:
+                dose_status = 'pending'
             
             schedule.append({
                 'milestone': milestone,
                 'vaccines': self.vaccine_schedule.get(milestone, []),
-                'date': vaccine_date,
-                'status': status,
+                'date': birth_date + timedelta(days=MILESTONE_DAYS[milestone]),
+                'status': dose_status,
+                'administered_at': vaccines_done.get(milestone),
                 'child_name': child_name
             })
         
-        return schedule
\ No newline at end of file
+        return schedule
+    
+    def get_population_report(self, today=None):
+        """Couverture vaccinale de toute la population, évaluée en une passe vectorisée"""
+        birth_dates = db_manager.get_children_birth_dates()
+        report = vaccine_schedule.coverage_report(
+            vaccine_schedule.to_datetime64(birth_dates), today
+        )
+        
+        return {
+            'children': len(birth_dates),
+            'milestones': report,
+            'generated_at': datetime.utcnow().isoformat()
+        }
\ No newline at end of file
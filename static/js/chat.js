@@ -16,6 +16,10 @@ class HealthChat {
         this.sendButton = document.getElementById('sendButton');
         this.consultationsList = document.getElementById('consultationsList');
 
+        // Pagination de l'historique (curseur renvoyé par l'API)
+        this.nextCursor = null;
+        this.loadingHistory = false;
+
         // Vérifier que les éléments existent
         if (!this.messagesContainer || !this.messageInput || !this.chatForm) {
             console.error('❌ Éléments du chat non trouvés');
@@ -109,6 +113,14 @@ class HealthChat {
 
         // Auto-resize du textarea
         this.messageInput.addEventListener('input', this.autoResize.bind(this));
+
+        // Défilement infini de l'historique
+        this.consultationsList?.addEventListener('scroll', () => {
+            const list = this.consultationsList;
+            if (list.scrollTop + list.clientHeight >= list.scrollHeight - 50) {
+                this.loadMoreConsultations();
+            }
+        });
     }
 
     autoResize() {
@@ -281,10 +293,11 @@ class HealthChat {
 
     async loadConsultationHistory() {
         try {
-            const response = await fetch('/api/consultations?limit=10');
+            const response = await fetch('/api/consultations?limit=20');
             const data = await response.json();
             
             if (response.ok && data.consultations) {
+                this.nextCursor = data.next_cursor;
                 this.updateConsultationsList(data.consultations);
             }
         } catch (error) {
@@ -292,6 +305,25 @@ class HealthChat {
         }
     }
 
+    async loadMoreConsultations() {
+        if (!this.nextCursor || this.loadingHistory) return;
+
+        this.loadingHistory = true;
+        try {
+            const response = await fetch(`/api/consultations?limit=20&cursor=${encodeURIComponent(this.nextCursor)}`);
+            const data = await response.json();
+
+            if (response.ok && data.consultations) {
+                this.nextCursor = data.next_cursor;
+                this.appendConsultations(data.consultations);
+            }
+        } catch (error) {
+            console.error('Erreur chargement historique:', error);
+        } finally {
+            this.loadingHistory = false;
+        }
+    }
+
     updateConsultationHistory() {
         // Recharger l'historique après un nouveau message
         setTimeout(() => {
@@ -314,6 +346,10 @@ class HealthChat {
             return;
         }
 
+        this.appendConsultations(consultations);
+    }
+
+    appendConsultations(consultations) {
         consultations.forEach(consult => {
             const consultDiv = document.createElement('div');
             consultDiv.className = `consultation-item p-3 border-bottom urgency-${consult.urgency}`;
@@ -353,13 +389,25 @@ class HealthChat {
         return colors[urgency] || 'secondary';
     }
 
-    loadConsultation(consultation) {
-        // Vider la conversation actuelle
-        this.messagesContainer.innerHTML = '';
-        
-        // Recréer la conversation
-        this.addMessage(consultation.question, 'user');
-        this.addMessage(consultation.response, 'bot', consultation.urgency);
+    async loadConsultation(consultation) {
+        // La liste ne contient pas le texte des réponses : chargement à la demande
+        try {
+            const response = await fetch(`/api/consultations/${consultation._id}`);
+            const data = await response.json();
+
+            if (!response.ok) {
+                throw new Error(data.error || 'Consultation introuvable');
+            }
+
+            // Vider la conversation actuelle
+            this.messagesContainer.innerHTML = '';
+
+            // Recréer la conversation
+            this.addMessage(data.consultation.question, 'user');
+            this.addMessage(data.consultation.response, 'bot', data.consultation.urgency);
+        } catch (error) {
+            console.error('Erreur chargement consultation:', error);
+        }
     }
 
     clearConversation() {
@@ -38,7 +38,7 @@ class VaccineTracker {
             return;
         }
 
-        container.innerHTML = this.reminders.map(reminder => `
+        container.innerHTML = this.reminders.map((reminder, index) => `
             <div class="alert alert-${this.getReminderAlertType(reminder)}">
                 <div class="d-flex justify-content-between align-items-start">
                     <div>
@@ -59,7 +59,7 @@ class VaccineTracker {
                 </div>
                 ${reminder.status === 'due' ? `
                 <div class="mt-2">
-                    <button class="btn btn-sm btn-outline-primary me-2" onclick="vaccineTracker.markAsDone('${reminder.child_name}', ${JSON.stringify(reminder.vaccines).replace(/'/g, "\\'")})">
+                    <button class="btn btn-sm btn-outline-primary me-2" onclick="vaccineTracker.markAsDone(${index})">
                         <i class="fas fa-check me-1"></i>Marquer comme fait
                     </button>
                     <button class="btn btn-sm btn-outline-secondary" onclick="vaccineTracker.snoozeReminder('${reminder.child_name}', ${JSON.stringify(reminder.vaccines).replace(/'/g, "\\'")})">
@@ -115,12 +115,25 @@ class VaccineTracker {
         }
     }
 
-    async markAsDone(childName, vaccines) {
-        if (confirm(`Marquer les vaccins ${vaccines.join(', ')} de ${childName} comme effectués ?`)) {
+    async markAsDone(index) {
+        const reminder = this.reminders[index];
+        if (!reminder) return;
+
+        if (confirm(`Marquer les vaccins ${reminder.vaccines.join(', ')} de ${reminder.child_name} comme effectués ?`)) {
             try {
-                // Ici, vous enverriez une requête au backend pour marquer comme fait
-                console.log(`Vaccins marqués comme faits: ${vaccines.join(', ')} pour ${childName}`);
-                
+                const response = await fetch('/api/vaccines/dose', {
+                    method: 'POST',
+                    headers: { 'Content-Type': 'application/json' },
+                    body: JSON.stringify({
+                        child_id: reminder.child_id,
+                        milestone: reminder.milestone
+                    })
+                });
+
+                if (!response.ok) {
+                    throw new Error(`Erreur ${response.status}`);
+                }
+
                 window.healthApp.showSuccess('Vaccins marqués comme effectués !');
                 await this.loadVaccineReminders();
             } catch (error) {